@@ -11,8 +11,7 @@ import pandas as pd
 import plotly.express as px
 import os
 from datetime import datetime, date
-from src.azure_blob import container_client
-from src.azure_blob import read_csv_blob, blob_exists
+from src.azure_blob import read_csv_blob, blobs_existentes, read_bytes_blob
 from io import BytesIO
 from PIL import Image
 
@@ -300,9 +299,8 @@ def show_home():
     col1, col2 = st.columns([1, 1])
     with col1:
         blob_path = f"wordclouds/wordcloud_{fecha_seleccionada}.png"
-        if blob_exists(blob_path):
-            blob_client = container_client.get_blob_client(blob_path)
-            img_data = blob_client.download_blob().readall()
+        if blob_path in blobs_existentes("wordclouds/"):
+            img_data = read_bytes_blob(blob_path)
             img = Image.open(BytesIO(img_data))
             st.image(img, ...)
         else:
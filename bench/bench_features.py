@@ -0,0 +1,68 @@
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from src.features import FeatureEngineer, ENGAGEMENT_VARS
+
+# Benchmark de la agregación ponderada por engagement de FeatureEngineer: implementación
+# anterior (groupby().apply por variable + merges) contra el groupby().sum() único.
+#   python bench/bench_features.py [n_tweets] [n_dias]
+
+
+def tweets_sinteticos(n: int, dias: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "date": pd.to_datetime("2024-01-01") + pd.to_timedelta(rng.integers(0, dias, n), unit="D"),
+        "score_positive": rng.random(n).astype("float32"),
+        "score_negative": rng.random(n).astype("float32"),
+        "score_neutral": rng.random(n).astype("float32"),
+        **{var: rng.normal(size=n) for var in ENGAGEMENT_VARS},
+    })
+
+
+def ponderados_anterior(fe: FeatureEngineer, df: pd.DataFrame) -> pd.DataFrame:
+    weighted_features = []
+    for var in ENGAGEMENT_VARS:
+        df_w = df.groupby("date", group_keys=False).apply(
+            lambda x: pd.Series({
+                f"weighted_positive_{var}": fe.weighted_avg(x["score_positive"], x[var]),
+                f"weighted_negative_{var}": fe.weighted_avg(x["score_negative"], x[var]),
+                f"weighted_neutral_{var}": fe.weighted_avg(x["score_neutral"], x[var])
+            })
+        ).reset_index()
+        weighted_features.append(df_w)
+    df_weighted_all = weighted_features[0]
+    for df_w in weighted_features[1:]:
+        df_weighted_all = df_weighted_all.merge(df_w, on="date", how="left")
+    return df_weighted_all
+
+
+def medir(n: int = 1_000_000, dias: int = 730) -> dict:
+    fe = FeatureEngineer(None, None, None)
+    df = tweets_sinteticos(n, dias)
+
+    inicio = time.perf_counter()
+    antes = ponderados_anterior(fe, df)
+    t_antes = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    despues = fe.agregados_ponderados(df, ENGAGEMENT_VARS)
+    t_despues = time.perf_counter() - inicio
+
+    diff = np.abs(antes.drop(columns="date").to_numpy(float) - despues.drop(columns="date").to_numpy(float)).max()
+    return {"tweets": n, "dias": dias, "s_antes": t_antes, "s_despues": t_despues,
+            "speedup": t_antes / t_despues, "max_diff": float(diff)}
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    dias = int(sys.argv[2]) if len(sys.argv) > 2 else 730
+    r = medir(n, dias)
+    print(f"⚖️ {r['tweets']} tweets en {r['dias']} días")
+    print(f"   antes:   {r['s_antes']:.2f} s")
+    print(f"   después: {r['s_despues']:.2f} s ({r['speedup']:.1f}x)")
+    print(f"   diferencia máxima: {r['max_diff']:.2e}")
@@ -0,0 +1,78 @@
+import re
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from src.normalizacion import normalizar_serie, lema_wordnet
+from src.preprocessing import get_stopwords
+
+# Benchmark de la limpieza de texto: implementación anterior (4 re.sub + filtro de stopwords +
+# WordNetLemmatizer por palabra y por tweet) contra la normalización en batch.
+#   python bench/bench_normalizacion.py [n_tweets]
+
+VOCABULARIO = (
+    "gobierno presidente boric reforma pensiones seguridad congreso ministro chile economía "
+    "inflación delincuencia apruebo rechazo gestión anuncio medidas país votación encuesta"
+).split()
+RUIDO = ["https://t.co/abc123", "@usuario", "#Chile", "¡", "!!", "😡", "👏", "...", "de", "la", "que", "el"]
+
+
+def tweets_sinteticos(n: int, seed: int = 0) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    palabras = np.array(VOCABULARIO + RUIDO)
+    largos = rng.integers(4, 30, size=n)
+    return pd.Series([" ".join(rng.choice(palabras, size=k)) for k in largos])
+
+
+def clean_text_anterior(text, stopwords_final, lemmatizer):
+    if pd.isna(text):
+        return None
+    text = text.lower()
+    text = re.sub(r"http\S+|www\S+|https\S+", "", text)
+    text = re.sub(r"@\w+", "", text)
+    text = re.sub(r"[^\w\sáéíóúñü]", "", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    words = [w for w in text.split() if w not in stopwords_final]
+    words = [lemmatizer.lemmatize(w) for w in words]
+    if len(words) < 3 or len(words) > 50:
+        return None
+    return " ".join(words)
+
+
+def medir(n: int = 50_000) -> dict:
+    from nltk.stem import WordNetLemmatizer
+
+    tweets = tweets_sinteticos(n)
+    stopwords_final = get_stopwords()
+    lemmatizer = WordNetLemmatizer()
+    lema_wordnet("calentamiento")  # carga WordNet fuera de la medición
+
+    inicio = time.perf_counter()
+    antes = tweets.apply(clean_text_anterior, args=(stopwords_final, lemmatizer))
+    t_antes = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    despues = normalizar_serie(tweets, stopwords_set=stopwords_final)
+    t_despues = time.perf_counter() - inicio
+
+    iguales = (antes.fillna("∅") == despues.fillna("∅")).mean()
+    return {
+        "tweets": n,
+        "us_por_tweet_antes": t_antes / n * 1e6,
+        "us_por_tweet_despues": t_despues / n * 1e6,
+        "speedup": t_antes / t_despues,
+        "coincidencia": float(iguales),
+    }
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    r = medir(n)
+    print(f"🧹 {r['tweets']} tweets")
+    print(f"   antes:   {r['us_por_tweet_antes']:.1f} µs/tweet")
+    print(f"   después: {r['us_por_tweet_despues']:.1f} µs/tweet ({r['speedup']:.1f}x)")
+    print(f"   resultados idénticos: {r['coincidencia']:.1%}")
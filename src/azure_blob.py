@@ -1,59 +1,606 @@
 import os
 from dotenv import load_dotenv
-from azure.storage.blob import BlobClient
-from azure.storage.blob import BlobServiceClient
 import pandas as pd
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
+from pathlib import Path
 from tqdm import tqdm
 import sys
+from src.config import DATA_DIR
+import io
+from src.storage import (
+    get_storage,
+    es_parquet,
+    leer_parquet,
+    leer_csv,
+    iter_csv,
+    iter_parquet,
+    normalizar_fechas,
+    serializar,
+    serializar_por_bloques,
+    iter_rangos,
+    ChunkStream,
+    RangeFile,
+    STREAMING_TRANSFERS,
+    TRANSFER_CHUNK_SIZE,
+    codificacion_para,
+    comprimir,
+    comprimir_chunks,
+    descomprimir_chunks,
+)
+from src.schemas import aplicar_schema, dtypes_de_parseo, schema_para_blob
 
 # Cargar variables de entorno
 load_dotenv()
 
-AZURE_CONN_STR = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
-AZURE_BLOB_CONTAINER = os.getenv("AZURE_BLOB_CONTAINER", "data")
+# El backend (Azure o carpeta local) se elige con STORAGE_BACKEND en src/storage.py.
+# El cliente de Azure recién se crea en la primera operación, no al importar.
 
-# Cliente base
-blob_service_client = BlobServiceClient.from_connection_string(AZURE_CONN_STR)
-container_client = blob_service_client.get_container_client(AZURE_BLOB_CONTAINER)
 
-def read_csv_blob(blob_name: str) -> pd.DataFrame:
-    """Descarga un archivo CSV desde Azure Blob Storage con barra de progreso."""
-    print(f"📦 Intentando abrir: {blob_name}")
-    blob_client = container_client.get_blob_client(blob_name)
+def __getattr__(name):
+    # Compatibilidad con código que usaba el cliente global de Azure
+    if name == "container_client":
+        return get_storage().container_client
+    raise AttributeError(name)
 
-    if not blob_client.exists():
-        raise FileNotFoundError(f"❌ No existe el blob: {blob_name}")
 
-    blob_props = blob_client.get_blob_properties()
-    total_size = blob_props.size
-    print(f"📦 Tamaño del blob: {total_size / 1024 / 1024:.2f} MB")
+def es_particionado(blob_name: str) -> bool:
+    """Indica si la ruta es un prefijo de dataset particionado por día (termina en "/")."""
+    return str(blob_name).endswith("/")
+
+
+def _read_parquet_blob(storage, blob_name: str, total_size: int, columns=None, date_range=None) -> pd.DataFrame:
+    """Lee un Parquet remoto descargando solo las columnas y row groups requeridos."""
+    with RangeFile(storage, blob_name, total_size) as f:
+        df = leer_parquet(f, columns=columns, date_range=date_range)
+        print(f"📦 Descargado {f.bytes_descargados / 1024 / 1024:.2f} MB (lectura por rangos)")
+    return df
+
+
+# ========================
+# 🗄️ CACHÉ LOCAL DE BLOBS (validada por ETag)
+# ========================
+# Cada blob se guarda en disco como <sha1(nombre)>.data junto a <sha1(nombre)>.etag.
+# Una lectura repetida hace un GET condicional (If-None-Match): si el blob no cambió,
+# Azure responde 304 sin cuerpo y se usa la copia local. Los DataFrames ya parseados
+# se memorizan en proceso con la misma clave (nombre + ETag + proyección).
+
+BLOB_CACHE_DIR = Path(os.getenv("BLOB_CACHE_DIR", DATA_DIR / "blob_cache"))
+BLOB_CACHE_MAX_MB = float(os.getenv("BLOB_CACHE_MAX_MB", "2048"))
+BLOB_CACHE_ENABLED = os.getenv("BLOB_CACHE_ENABLED", "1") == "1"
+FRAME_CACHE_MAX_MB = float(os.getenv("FRAME_CACHE_MAX_MB", "512"))
+
+cache_stats = {"hits": 0, "misses": 0, "frame_hits": 0}
+_frame_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _clave_cache(blob_name: str) -> Path:
+    return BLOB_CACHE_DIR / hashlib.sha1(blob_name.encode("utf-8")).hexdigest()
+
+
+def _etag_cacheado(blob_name: str):
+    """ETag de la copia local, o None si no hay copia utilizable."""
+    base = _clave_cache(blob_name)
+    etag_path, data_path = base.with_suffix(".etag"), base.with_suffix(".data")
+    if not (etag_path.exists() and data_path.exists()):
+        return None
+    return etag_path.read_text(encoding="utf-8").strip() or None
+
+
+def _ruta_cacheada(blob_name: str, etag: str):
+    """Ruta local del blob si la copia en caché corresponde a `etag`."""
+    if not BLOB_CACHE_ENABLED or etag is None or _etag_cacheado(blob_name) != etag:
+        return None
+    data_path = _clave_cache(blob_name).with_suffix(".data")
+    os.utime(data_path)  # marca de uso para el LRU
+    return data_path
+
+
+def _guardar_en_cache(blob_name: str, etag: str, data) -> Path:
+    """Guarda el contenido del blob en caché (escritura atómica) y aplica la política LRU."""
+    BLOB_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    base = _clave_cache(blob_name)
+    tmp = base.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, base.with_suffix(".data"))
+    base.with_suffix(".etag").write_text(etag, encoding="utf-8")
+    _evictar_cache()
+    return base.with_suffix(".data")
+
+
+def _evictar_cache() -> None:
+    """Elimina los blobs menos usados hasta quedar bajo BLOB_CACHE_MAX_MB."""
+    archivos = sorted(BLOB_CACHE_DIR.glob("*.data"), key=lambda p: p.stat().st_mtime)
+    total = sum(p.stat().st_size for p in archivos)
+    limite = BLOB_CACHE_MAX_MB * 1024 * 1024
+    while archivos and total > limite:
+        viejo = archivos.pop(0)
+        total -= viejo.stat().st_size
+        viejo.unlink(missing_ok=True)
+        viejo.with_suffix(".etag").unlink(missing_ok=True)
+
+
+class _EscrituraCache:
+    """Copia a la caché los bytes de una transferencia en streaming y la publica al terminar."""
+
+    def __init__(self, blob_name: str):
+        BLOB_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        self._base = _clave_cache(blob_name)
+        self._tmp = self._base.with_suffix(".tmp")
+        self._f = open(self._tmp, "wb")
+
+    def write(self, chunk) -> None:
+        self._f.write(chunk)
+
+    def publicar(self, etag: str) -> Path:
+        self._f.close()
+        self._base.with_suffix(".etag").unlink(missing_ok=True)
+        os.replace(self._tmp, self._base.with_suffix(".data"))
+        self._base.with_suffix(".etag").write_text(etag, encoding="utf-8")
+        _evictar_cache()
+        return self._base.with_suffix(".data")
+
+    def descartar(self) -> None:
+        self._f.close()
+        self._tmp.unlink(missing_ok=True)
+
+
+def _con_barra(chunks, pbar):
+    for chunk in chunks:
+        pbar.update(len(chunk))
+        yield chunk
+
+
+def _chunks_con_progreso(storage, blob_name: str, info, cache: "_EscrituraCache" = None):
+    """Rangos descargados en paralelo (en orden) y descomprimidos, copiados a la caché a medida que llegan."""
+    with tqdm(total=info.size, unit='B', unit_scale=True, desc=f"⬇️ Descargando {blob_name}") as pbar:
+        crudos = _con_barra(iter_rangos(storage, blob_name, info.size), pbar)
+        for chunk in descomprimir_chunks(crudos, info.encoding):
+            if cache is not None:
+                cache.write(chunk)
+            yield chunk
+    if cache is not None:
+        cache.publicar(info.etag)
+
 
-    stream = blob_client.download_blob()
+def _descargar_en_paralelo(storage, blob_name: str):
+    """Variante en streaming de _descargar_cacheado: HEAD + rangos paralelos directo a disco."""
+    info = storage.properties(blob_name)
+    local = _ruta_cacheada(blob_name, info.etag)
+    if local is not None:
+        cache_stats["hits"] += 1
+        print(f"♻️ Caché vigente para {blob_name} (ETag sin cambios)")
+        return local, info.etag
+
+    cache_stats["misses"] += 1
+    if not BLOB_CACHE_ENABLED:
+        return BytesIO(b"".join(_chunks_con_progreso(storage, blob_name, info))), info.etag
+    cache = _EscrituraCache(blob_name)
+    for _ in _chunks_con_progreso(storage, blob_name, info, cache):
+        pass
+    return _ruta_cacheada(blob_name, info.etag), info.etag
+
+
+def _leer_csv_en_streaming(storage, blob_name: str, info, columns=None, dtype=None) -> pd.DataFrame:
+    """Parsea el CSV mientras se descarga: sin buffer intermedio con el archivo completo."""
+    cache = _EscrituraCache(blob_name) if BLOB_CACHE_ENABLED else None
+    stream = io.BufferedReader(ChunkStream(_chunks_con_progreso(storage, blob_name, info, cache)),
+                               buffer_size=TRANSFER_CHUNK_SIZE)
+    try:
+        return leer_csv(stream, columns=columns, dtype=dtype)
+    except Exception:
+        if cache is not None:
+            cache.descartar()
+        raise
+
+
+def _descargar_cacheado(storage, blob_name: str, streaming: bool = False):
+    """Devuelve (ruta_local, etag) del blob usando un GET condicional contra la caché.
+
+    Lanza FileNotFoundError si el blob no existe.
+    """
+    if streaming:
+        return _descargar_en_paralelo(storage, blob_name)
+
+    etag_local = _etag_cacheado(blob_name) if BLOB_CACHE_ENABLED else None
+    stream = storage.open_stream(blob_name, if_none_match=etag_local)
+    if stream is None:
+        cache_stats["hits"] += 1
+        print(f"♻️ Caché vigente para {blob_name} (ETag sin cambios)")
+        return _ruta_cacheada(blob_name, etag_local), etag_local
+
+    cache_stats["misses"] += 1
+    total_size = stream.size
+    print(f"📦 Tamaño del blob: {total_size / 1024 / 1024:.2f} MB")
     buffer = BytesIO()
 
-    # Barra de carga mientras se descarga
+    # Barra de carga mientras se descarga (sobre los bytes transferidos, comprimidos o no)
     with tqdm(total=total_size, unit='B', unit_scale=True, desc=f"⬇️ Descargando {blob_name}") as pbar:
-        for chunk in stream.chunks():
+        for chunk in descomprimir_chunks(_con_barra(stream.chunks(), pbar), stream.encoding):
             buffer.write(chunk)
-            pbar.update(len(chunk))
 
-    buffer.seek(0)
-    df = pd.read_csv(buffer, low_memory=False, parse_dates=["date"])
-    if "date" in df.columns:
-        df["date"] = pd.to_datetime(df["date"], errors="coerce") 
+    if not BLOB_CACHE_ENABLED:
+        buffer.seek(0)
+        return buffer, stream.etag
+    return _guardar_en_cache(blob_name, stream.etag, buffer.getbuffer()), stream.etag
+
+
+def _clave_frame(blob_name: str, etag: str, columns, date_range, schema=None):
+    cols = tuple(columns) if columns is not None else None
+    rango = tuple(str(x) for x in date_range) if date_range is not None else None
+    return (blob_name, etag, cols, rango, schema)
+
+
+def _resolver_schema(blob_name: str, schema):
+    """None → schema registrado para el blob; False → sin schema; str → ese schema."""
+    if schema is None:
+        return schema_para_blob(blob_name)
+    return schema or None
+
+
+def _tipar(df: pd.DataFrame, schema, date_range=None) -> pd.DataFrame:
+    """Fechas + filtro de rango + dtypes compactos del schema, antes de memorizar el DataFrame."""
+    return aplicar_schema(normalizar_fechas(df, date_range), schema)
+
+
+def _frame_memorizado(clave):
+    with _cache_lock:
+        df = _frame_cache.get(clave)
+        if df is None:
+            return None
+        _frame_cache.move_to_end(clave)
+    cache_stats["frame_hits"] += 1
+    return df.copy()
+
+
+def _memorizar_frame(clave, df: pd.DataFrame) -> None:
+    """Guarda una copia del DataFrame parseado (LRU acotado por FRAME_CACHE_MAX_MB)."""
+    limite = FRAME_CACHE_MAX_MB * 1024 * 1024
+    tamano = df.memory_usage(index=True).sum()
+    if not BLOB_CACHE_ENABLED or tamano > limite:
+        return
+    with _cache_lock:
+        # Una nueva versión del blob invalida las anteriores
+        for k in [k for k in _frame_cache if k[0] == clave[0] and k[1] != clave[1]]:
+            del _frame_cache[k]
+        _frame_cache[clave] = df.copy()
+        while sum(f.memory_usage(index=True).sum() for f in _frame_cache.values()) > limite:
+            _frame_cache.popitem(last=False)
+
+
+def resumen_cache() -> str:
+    """Texto con hits/misses de la caché de blobs (para logs del pipeline)."""
+    total = cache_stats["hits"] + cache_stats["misses"]
+    tasa = cache_stats["hits"] / total if total else 0.0
+    return (f"Caché de blobs: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+            f"({tasa:.0%}), {cache_stats['frame_hits']} DataFrames reutilizados")
+
+
+# ========================
+# ⏳ SUBIDAS EN SEGUNDO PLANO (write-behind)
+# ========================
+# Con WRITE_BEHIND=1, write_csv_blob/append_csv_blob encolan la subida y devuelven un Future.
+# Las escrituras a un mismo blob se ejecutan en el orden en que se pidieron, y mientras una
+# subida está pendiente las lecturas de ese blob se sirven desde la copia en memoria.
+# main() llama a flush_uploads() al final para esperar (y reportar errores de) todas las subidas.
+
+WRITE_BEHIND = os.getenv("WRITE_BEHIND", "0") == "1"
+WRITE_BEHIND_WORKERS = int(os.getenv("WRITE_BEHIND_WORKERS", "2"))
+
+_upload_pool = None
+_subidas_pendientes = {}   # blob → (DataFrame en memoria o None, Future de la última escritura)
+_subidas_encoladas = []    # todos los Futures desde el último flush
+_subidas_lock = threading.Lock()
+_hilo_subida = threading.local()
+
+
+def _pool_subidas() -> ThreadPoolExecutor:
+    global _upload_pool
+    if _upload_pool is None:
+        _upload_pool = ThreadPoolExecutor(max_workers=WRITE_BEHIND_WORKERS, thread_name_prefix="subida")
+    return _upload_pool
+
+
+def _encolar_subida(blob_name: str, df, tarea):
+    """Encola `tarea` detrás de la escritura anterior del mismo blob y devuelve su Future."""
+    with _subidas_lock:
+        anterior = _subidas_pendientes.get(blob_name)
+        previo = anterior[1] if anterior is not None else None
+
+        def _ejecutar():
+            _hilo_subida.activo = True
+            try:
+                if previo is not None:
+                    # El pool es FIFO: la escritura anterior ya empezó, esperarla no bloquea el pool
+                    try:
+                        previo.result()
+                    except Exception:
+                        pass  # su error se reporta en flush_uploads(); la escritura nueva la reemplaza
+                return tarea()
+            finally:
+                _hilo_subida.activo = False
+
+        futuro = _pool_subidas().submit(_ejecutar)
+        _subidas_pendientes[blob_name] = (df, futuro)
+        _subidas_encoladas.append(futuro)
+    futuro.add_done_callback(lambda f: _liberar_subida(blob_name, f))
+    print(f"⏳ Subida de {blob_name} encolada en segundo plano")
+    return futuro
+
+
+def _liberar_subida(blob_name: str, futuro) -> None:
+    with _subidas_lock:
+        entrada = _subidas_pendientes.get(blob_name)
+        if entrada is not None and entrada[1] is futuro:
+            del _subidas_pendientes[blob_name]
+
+
+def _copia_pendiente(blob_name: str):
+    """DataFrame aún no subido de `blob_name`, o None si no hay una subida pendiente."""
+    with _subidas_lock:
+        entrada = _subidas_pendientes.get(blob_name)
+    if entrada is None or entrada[1].done():
+        return None
+    return entrada[0]
+
+
+def _esperar_subidas(blob_name: str) -> None:
+    """Espera las subidas pendientes que afectan a `blob_name` (el blob, o su dataset particionado)."""
+    if getattr(_hilo_subida, "activo", False):
+        return  # dentro de una subida: la propia tarea ya respeta el orden
+    with _subidas_lock:
+        futuros = [f for nombre, (_, f) in _subidas_pendientes.items()
+                   if nombre == blob_name or (es_particionado(nombre) and blob_name.startswith(nombre))]
+    for futuro in futuros:
+        try:
+            futuro.result()
+        except Exception:
+            pass  # se reporta en flush_uploads()
+
+
+def flush_uploads() -> int:
+    """Espera todas las subidas en segundo plano. Relanza el primer error, si hubo alguno.
+
+    Returns:
+        int: Cantidad de subidas completadas.
+    """
+    with _subidas_lock:
+        futuros = list(_subidas_encoladas)
+        _subidas_encoladas.clear()
+    errores = []
+    for futuro in futuros:
+        try:
+            futuro.result()
+        except Exception as e:
+            errores.append(e)
+    if futuros:
+        print(f"✅ {len(futuros) - len(errores)}/{len(futuros)} subidas en segundo plano completadas")
+    if errores:
+        raise errores[0]
+    return len(futuros)
+
+
+def _leer_copia_pendiente(df: pd.DataFrame, columns, date_range, schema) -> pd.DataFrame:
+    if columns is not None:
+        df = df[[c for c in columns if c in df.columns]]
+    df = _tipar(df.copy(), schema, date_range)
+    print(f"⏳ Dataset servido desde la copia en memoria (subida pendiente): {df.shape}")
+    return df
+
+
+def read_csv_blob(blob_name: str, columns=None, date_range=None, streaming: bool = None,
+                  schema=None) -> pd.DataFrame:
+    """Descarga un dataset (CSV o Parquet) desde Azure Blob Storage con barra de progreso.
+
+    Args:
+        blob_name (str): Nombre del blob. Si termina en ".parquet" se lee en formato columnar.
+        columns (list, opcional): Subconjunto de columnas a leer.
+        date_range (tuple, opcional): (desde, hasta) inclusivo sobre la columna "date".
+            En Parquet se usan las estadísticas de los row groups para no descargar otros días.
+        streaming (bool, opcional): Descarga por rangos en paralelo y parsea a medida que llegan
+            los datos. Por defecto según STREAMING_TRANSFERS.
+        schema (str, opcional): Schema de src/schemas.py a aplicar (ids como texto, float32,
+            categorías, fechas parseadas). Por defecto el registrado para el blob; False lo desactiva.
+    """
+    streaming = STREAMING_TRANSFERS if streaming is None else streaming
+    schema = _resolver_schema(blob_name, schema)
+    if es_particionado(blob_name):
+        from src.particiones import leer_particionado
+        _esperar_subidas(blob_name)
+        return leer_particionado(blob_name, columns=columns, date_range=date_range, schema=schema or False)
+    dtype = dtypes_de_parseo(schema)
+
+    print(f"📦 Intentando abrir: {blob_name}")
+    storage = get_storage()
+
+    columns = list(columns) if columns is not None else None
+    if columns is not None and date_range is not None and "date" not in columns:
+        columns.append("date")
+
+    copia = _copia_pendiente(blob_name)
+    if copia is not None:
+        return _leer_copia_pendiente(copia, columns, date_range, schema)
+    _esperar_subidas(blob_name)
+
+    if storage.es_local:
+        # Backend local: lectura directa con memory map, sin caché intermedia
+        clave = _clave_frame(blob_name, storage.properties(blob_name).etag, columns, date_range, schema)
+        df = _frame_memorizado(clave)
+        if df is None:
+            df = aplicar_schema(storage.read_frame(blob_name, columns=columns, date_range=date_range,
+                                                   dtype=dtype), schema)
+            _memorizar_frame(clave, df)
+        print(f"✅ Dataset leído: {df.shape}")
+        return df
+
+    if es_parquet(blob_name):
+        # HEAD: tamaño + ETag. Con copia local vigente se lee del disco; si no, por rangos.
+        blob_props = storage.properties(blob_name)
+        clave = _clave_frame(blob_name, blob_props.etag, columns, date_range, schema)
+        df = _frame_memorizado(clave)
+        if df is not None:
+            print(f"♻️ DataFrame reutilizado desde caché: {blob_name} {df.shape}")
+            return df
+
+        local = _ruta_cacheada(blob_name, blob_props.etag)
+        if local is not None:
+            cache_stats["hits"] += 1
+            df = leer_parquet(local, columns=columns, date_range=date_range)
+        elif columns is None and date_range is None:
+            local, _ = _descargar_cacheado(storage, blob_name, streaming=streaming)
+            df = leer_parquet(local)
+        else:
+            cache_stats["misses"] += 1
+            df = _read_parquet_blob(storage, blob_name, blob_props.size, columns=columns, date_range=date_range)
+        df = _tipar(df, schema, date_range)
+        _memorizar_frame(clave, df)
+        print(f"✅ Parquet leído: {df.shape}")
+        return df
+
+    if streaming:
+        info = storage.properties(blob_name)
+        clave = _clave_frame(blob_name, info.etag, columns, date_range, schema)
+        df = _frame_memorizado(clave)
+        if df is not None:
+            print(f"♻️ DataFrame reutilizado desde caché: {blob_name} {df.shape}")
+            return df
+        local = _ruta_cacheada(blob_name, info.etag)
+        if local is not None:
+            cache_stats["hits"] += 1
+            df = leer_csv(local, columns=columns, dtype=dtype)
+        else:
+            cache_stats["misses"] += 1
+            df = _leer_csv_en_streaming(storage, blob_name, info, columns=columns, dtype=dtype)
+        df = _tipar(df, schema, date_range)
+        _memorizar_frame(clave, df)
+        print(f"✅ CSV leído en streaming: {df.shape}")
+        return df
+
+    local, etag = _descargar_cacheado(storage, blob_name)
+    clave = _clave_frame(blob_name, etag, columns, date_range, schema)
+    df = _frame_memorizado(clave)
+    if df is not None:
+        print(f"♻️ DataFrame reutilizado desde caché: {blob_name} {df.shape}")
+        return df
+
+    df = _tipar(leer_csv(local, columns=columns, dtype=dtype), schema, date_range)
+    _memorizar_frame(clave, df)
     print(f"✅ CSV leído: {df.shape}")
     return df
 
-def write_csv_blob(df: pd.DataFrame, blob_name: str) -> None:
-    """Sube un DataFrame como CSV a Azure Blob Storage con feedback visual."""
+def iter_csv_blob(blob_name: str, filas: int, columns=None, schema=None):
+    """Recorre un dataset (CSV, Parquet o particionado) en bloques de ~`filas` filas.
+
+    A diferencia de read_csv_blob nunca se arma el DataFrame completo: los CSV remotos se
+    parsean mientras se descargan, los Parquet por lotes y los particionados por grupos de días.
+    Cada bloque llega con el schema aplicado. Los bloques no se memorizan.
+    """
+    schema = _resolver_schema(blob_name, schema)
+    if es_particionado(blob_name):
+        from src.particiones import iter_particionado
+        _esperar_subidas(blob_name)
+        yield from iter_particionado(blob_name, filas, columns=columns, schema=schema or False)
+        return
+
+    copia = _copia_pendiente(blob_name)
+    if copia is not None:
+        for inicio in range(0, len(copia), filas):
+            yield _leer_copia_pendiente(copia.iloc[inicio:inicio + filas], columns, None, schema)
+        return
+    _esperar_subidas(blob_name)
+
+    storage = get_storage()
+    if storage.es_local:
+        info, local = None, storage.local_path(blob_name)
+    else:
+        info = storage.properties(blob_name)
+        local = _ruta_cacheada(blob_name, info.etag)
+
+    if es_parquet(blob_name):
+        with (open(local, "rb") if local is not None else RangeFile(storage, blob_name, info.size)) as f:
+            for bloque in iter_parquet(f, filas, columns=columns):
+                yield _tipar(bloque, schema)
+        return
+
+    # Sin copia local: se parsea a medida que llegan los rangos (sin escribir la caché)
+    fuente = local if local is not None else io.BufferedReader(
+        ChunkStream(_chunks_con_progreso(storage, blob_name, info)), buffer_size=TRANSFER_CHUNK_SIZE
+    )
+    for bloque in iter_csv(fuente, filas, columns=columns, dtype=dtypes_de_parseo(schema)):
+        yield _tipar(bloque, schema)
+
+
+def _write_en_streaming(df: pd.DataFrame, blob_name: str, storage) -> None:
+    """Serializa y sube por bloques: cada bloque se envía (en paralelo) apenas se produce."""
+    cache = _EscrituraCache(blob_name) if BLOB_CACHE_ENABLED and not storage.es_local else None
+    codificacion = None if storage.es_local else codificacion_para(blob_name)
+
+    def _bloques():
+        for bloque in serializar_por_bloques(df, blob_name):
+            if cache is not None:
+                cache.write(bloque)  # la caché guarda el contenido sin comprimir
+            yield bloque
+
+    try:
+        with tqdm(unit='B', unit_scale=True, desc=f"⬆️ Subiendo {blob_name} (bloques)") as pbar:
+            enviados = _con_barra(comprimir_chunks(_bloques(), codificacion), pbar)
+            etag = storage.write_stream(blob_name, enviados, encoding=codificacion)
+    except Exception:
+        if cache is not None:
+            cache.descartar()
+        raise
+    if cache is not None:
+        if etag:
+            cache.publicar(etag)
+        else:
+            cache.descartar()
+    print(f"✅ Archivo actualizado: {blob_name}")
+
+
+def write_csv_blob(df: pd.DataFrame, blob_name: str, streaming: bool = None, background: bool = None):
+    """Sube un DataFrame como CSV (o Parquet si el blob termina en ".parquet") a Azure Blob Storage.
+
+    Si el destino es un dataset particionado solo se reescriben los días presentes en `df`.
+    Con `streaming` (por defecto STREAMING_TRANSFERS) se sube por bloques a medida que se serializa.
+    Antes de serializar se aplica el schema registrado para el blob (ver src/schemas.py).
+
+    Con `background` (por defecto WRITE_BEHIND) la subida se encola y se devuelve un Future;
+    si no, se sube en el momento y se devuelve None.
+    """
+    if WRITE_BEHIND if background is None else background:
+        copia = df.copy()
+        en_memoria = None if es_particionado(blob_name) else copia
+        return _encolar_subida(
+            blob_name, en_memoria,
+            lambda: write_csv_blob(copia, blob_name, streaming=streaming, background=False)
+        )
+
+    if es_particionado(blob_name):
+        from src.particiones import escribir_particionado
+        escribir_particionado(df, blob_name)
+        return
+
+    df = aplicar_schema(df, schema_para_blob(blob_name))
+
     print(f"📤 Subiendo {blob_name}...")
-    blob_client = container_client.get_blob_client(blob_name)
-    buffer = BytesIO()
-    df.to_csv(buffer, index=False)
-    buffer.seek(0)
+    storage = get_storage()
+    if STREAMING_TRANSFERS if streaming is None else streaming:
+        _write_en_streaming(df, blob_name, storage)
+        return
+    buffer = serializar(df, blob_name)
+    codificacion = None if storage.es_local else codificacion_para(blob_name)
+    data = buffer
+    if codificacion:
+        data = comprimir(buffer.getbuffer(), codificacion)
+        print(f"🗜️ {codificacion}: {buffer.getbuffer().nbytes / 1024 / 1024:.2f} MB → {len(data) / 1024 / 1024:.2f} MB")
 
-    total_size = buffer.getbuffer().nbytes
+    total_size = len(data) if codificacion else buffer.getbuffer().nbytes
 
     with tqdm(total=total_size, unit='B', unit_scale=True, desc=f"⬆️ Subiendo {blob_name}") as pbar:
         def progress_hook(current, total):
@@ -64,25 +611,47 @@ def write_csv_blob(df: pd.DataFrame, blob_name: str) -> None:
                 except Exception:
                     pass  # evita errores inesperados por inconsistencias en el hook
 
-        blob_client.upload_blob(
-            buffer,
-            overwrite=True,
-            raw_response_hook=lambda resp: progress_hook(
+        etag = storage.write_bytes(
+            blob_name,
+            data,
+            progress_hook=lambda resp: progress_hook(
                 resp.context.get('upload_stream_current'), total_size
-            )
+            ),
+            encoding=codificacion,
         )
 
+    # Lo recién subido queda en caché con su ETag: las lecturas siguientes no descargan
+    if BLOB_CACHE_ENABLED and etag and not storage.es_local:
+        _guardar_en_cache(blob_name, etag, buffer.getbuffer())
     print(f"✅ Archivo actualizado: {blob_name}")
 
-def append_csv_blob(df_new: pd.DataFrame, blob_name: str):
-    """Concatena nuevo contenido con lo ya existente y lo guarda de nuevo."""
+def append_csv_blob(df_new: pd.DataFrame, blob_name: str, background: bool = None):
+    """Concatena nuevo contenido con lo ya existente y lo guarda de nuevo.
+
+    En datasets particionados solo se agregan partes nuevas para los días de `df_new`.
+    Con `background` (por defecto WRITE_BEHIND) la escritura se encola y se devuelve un Future.
+    """
+    if es_particionado(blob_name):
+        from src.particiones import append_particionado
+        if WRITE_BEHIND if background is None else background:
+            copia = df_new.copy()
+            return _encolar_subida(blob_name, None, lambda: append_particionado(copia, blob_name))
+        append_particionado(df_new, blob_name)
+        return
+
     try:
         df_existing = read_csv_blob(blob_name)
         df_combined = pd.concat([df_existing, df_new], ignore_index=True).drop_duplicates(subset=["id"])
     except FileNotFoundError:
         df_combined = df_new
 
-    write_csv_blob(df_combined, blob_name)
+    return write_csv_blob(df_combined, blob_name, background=background)
+
+def convertir_csv_a_parquet(csv_blob: str, parquet_blob: str) -> None:
+    """Migra un dataset CSV existente a su equivalente Parquet (una sola vez)."""
+    df = read_csv_blob(csv_blob)
+    write_csv_blob(df, parquet_blob)
+    print(f"🔁 Migrado {csv_blob} → {parquet_blob}")
 
 def upload_image_blob(local_path_or_bytes, blob_path, content_type="image/png"):
     """Sube una imagen al contenedor de Azure Blob Storage."""
@@ -93,21 +662,80 @@ def upload_image_blob(local_path_or_bytes, blob_path, content_type="image/png"):
         data = local_path_or_bytes
 
     print(f"🖼️ Subiendo imagen a {blob_path}...")
-    blob = blob_service_client.get_blob_client(container=AZURE_BLOB_CONTAINER, blob=blob_path)
-    blob.upload_blob(data, overwrite=True, content_type=content_type)
+    get_storage().write_bytes(blob_path, data, content_type=content_type)
+    _registrar_en_indices(blob_path, existe=True)
     print(f"✅ Imagen subida: {blob_path}")
 
+def read_bytes_blob(blob_name: str) -> bytes:
+    """Descarga el contenido binario completo de un blob (pasando por la caché local)."""
+    _esperar_subidas(blob_name)
+    storage = get_storage()
+    if storage.es_local:
+        return storage.read_bytes(blob_name)
+    local, _ = _descargar_cacheado(storage, blob_name)
+    if isinstance(local, BytesIO):
+        return local.getvalue()
+    return Path(local).read_bytes()
+
+def ruta_local_blob(blob_name: str):
+    """Ruta en disco con el contenido del blob (archivo del backend local o copia en caché).
+
+    Permite abrir archivos binarios con memory map (p. ej. numpy.load(..., mmap_mode="r")).
+    Si la caché está deshabilitada devuelve None.
+    """
+    _esperar_subidas(blob_name)
+    storage = get_storage()
+    if storage.es_local:
+        return storage.local_path(blob_name)
+    local, _ = _descargar_cacheado(storage, blob_name, streaming=STREAMING_TRANSFERS)
+    return None if isinstance(local, BytesIO) else Path(local)
+
+def write_bytes_blob(data: bytes, blob_name: str, content_type: str = "application/octet-stream") -> None:
+    """Sube contenido binario a un blob (sobrescribe)."""
+    get_storage().write_bytes(blob_name, data, content_type=content_type)
+    _registrar_en_indices(blob_name, existe=True)
+
+def delete_blob(blob_name: str) -> None:
+    """Elimina un blob si existe."""
+    _esperar_subidas(blob_name)
+    get_storage().delete(blob_name)
+    _registrar_en_indices(blob_name, existe=False)
+
 def blob_exists(blob_path: str) -> bool:
     """Verifica si un blob ya existe en el contenedor."""
-    blob_client = blob_service_client.get_blob_client(container=AZURE_BLOB_CONTAINER, blob=blob_path)
-    return blob_client.exists()
+    _esperar_subidas(blob_path)
+    return get_storage().exists(blob_path)
+
+# Índice de existencia por prefijo: un solo list_blobs reemplaza N consultas blob_exists
+BLOB_INDEX_TTL = float(os.getenv("BLOB_INDEX_TTL", "300"))
+_indices_prefijo = {}
+
+def blobs_existentes(prefix: str, ttl: float = None) -> set:
+    """Conjunto de blobs bajo `prefix`, obtenido con un único listado y cacheado `ttl` segundos."""
+    ttl = BLOB_INDEX_TTL if ttl is None else ttl
+    with _cache_lock:
+        entrada = _indices_prefijo.get(prefix)
+        if entrada is not None and time.monotonic() - entrada[0] < ttl:
+            return set(entrada[1])
+
+    nombres = set(get_storage().list_prefix(prefix))
+    with _cache_lock:
+        _indices_prefijo[prefix] = (time.monotonic(), nombres)
+    return set(nombres)
+
+def _registrar_en_indices(blob_name: str, existe: bool) -> None:
+    """Mantiene vigentes los índices cacheados cuando el propio proceso sube o borra un blob."""
+    with _cache_lock:
+        for prefix, (_, nombres) in _indices_prefijo.items():
+            if blob_name.startswith(prefix):
+                if existe:
+                    nombres.add(blob_name)
+                else:
+                    nombres.discard(blob_name)
 
 def download_blob_file(blob_name: str, local_path: str):
     """Descarga un archivo binario desde Azure Blob Storage a una ruta local."""
-    blob_client = container_client.get_blob_client(blob_name)
-    if not blob_client.exists():
-        raise FileNotFoundError(f"❌ No se encontró el blob: {blob_name}")
+    data = read_bytes_blob(blob_name)
     with open(local_path, "wb") as f:
-        download_stream = blob_client.download_blob()
-        f.write(download_stream.readall())
-    print(f"📥 Descargado {blob_name} a {local_path}")
\ No newline at end of file
+        f.write(data)
+    print(f"📥 Descargado {blob_name} a {local_path}")
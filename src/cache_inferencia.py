@@ -0,0 +1,137 @@
+import hashlib
+import time
+from io import BytesIO
+
+import numpy as np
+
+from src.azure_blob import read_bytes_blob, write_bytes_blob
+from src.config import INFERENCE_CACHE_BLOB, INFERENCE_CACHE_MAX_ENTRIES, EMBEDDING_DIM
+from src.logger import get_logger
+
+logger = get_logger(__name__, "cache_inferencia.log")
+
+# Caché persistente de inferencia por texto limpio:
+#   clave   → hash(texto limpio + identificador de los modelos)
+#   valores → probabilidades de sentimiento (3,) float32 + embedding (768,) float32
+# Todo en float32 (lo mismo que entrega la inferencia): un hit devuelve exactamente el vector de
+# la inferencia original, así las features no dependen de si el texto ya se había visto.
+# Se guarda como un único .npz en INFERENCE_CACHE_BLOB; al superar el máximo de entradas se
+# descartan las usadas hace más tiempo.
+N_SCORES = 3
+
+
+def hash_texto(texto: str, clave_modelo: str) -> str:
+    return hashlib.blake2b(f"{clave_modelo}\x00{texto}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+class InferenceCache:
+    """Resultados de sentimiento y embeddings ya calculados, indexados por hash del texto."""
+
+    def __init__(self, clave_modelo: str, blob_name: str = INFERENCE_CACHE_BLOB,
+                 max_entries: int = INFERENCE_CACHE_MAX_ENTRIES):
+        self.clave_modelo = clave_modelo
+        self.blob_name = blob_name
+        self.max_entries = max_entries
+        self._indice = {}
+        self._scores = np.zeros((0, N_SCORES), dtype=np.float32)
+        self._embeddings = np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        self._usos = np.zeros(0, dtype=np.int64)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._indice)
+
+    def cargar(self) -> "InferenceCache":
+        """Lee la caché del blob. Si no existe o es de otros modelos, se parte vacía."""
+        try:
+            data = np.load(BytesIO(read_bytes_blob(self.blob_name)), allow_pickle=False)
+        except FileNotFoundError:
+            logger.info(f"Sin caché de inferencia previa en {self.blob_name}")
+            return self
+        if str(data["clave_modelo"]) != self.clave_modelo:
+            logger.info("Caché de inferencia de otros modelos: se descarta")
+            return self
+        if data["embeddings"].dtype != np.float32:
+            # Cachés anteriores en float16: sus vectores ya no coinciden con la inferencia
+            logger.info("Caché de inferencia con embeddings float16: se descarta")
+            return self
+        self._indice = {h: i for i, h in enumerate(data["hashes"].tolist())}
+        self._scores = data["scores"]
+        self._embeddings = data["embeddings"]
+        self._usos = data["usos"]
+        logger.info(f"Caché de inferencia cargada: {len(self)} textos")
+        return self
+
+    def buscar(self, textos: list):
+        """Separa los textos con resultado en caché de los que hay que inferir.
+
+        Returns:
+            tuple: (posiciones con hit, probabilidades (k, 3), embeddings (k, 768) float32,
+            posiciones sin hit).
+        """
+        ahora = int(time.time())
+        hits, filas, misses = [], [], []
+        for pos, texto in enumerate(textos):
+            fila = self._indice.get(hash_texto(texto, self.clave_modelo))
+            if fila is None:
+                misses.append(pos)
+            else:
+                hits.append(pos)
+                filas.append(fila)
+        self._usos[filas] = ahora
+        self.hits += len(hits)
+        self.misses += len(misses)
+        return (hits, self._scores[filas], self._embeddings[filas], misses)
+
+    def agregar(self, textos: list, scores: np.ndarray, embeddings: np.ndarray) -> None:
+        """Incorpora resultados nuevos (textos aún no presentes en la caché)."""
+        nuevos = {}
+        for pos, texto in enumerate(textos):
+            h = hash_texto(texto, self.clave_modelo)
+            if h not in self._indice and h not in nuevos:
+                nuevos[h] = pos
+        if not nuevos:
+            return
+        posiciones = list(nuevos.values())
+        inicio = len(self._usos)
+        self._indice.update({h: inicio + i for i, h in enumerate(nuevos)})
+        self._scores = np.concatenate([self._scores, np.asarray(scores, dtype=np.float32)[posiciones]])
+        self._embeddings = np.concatenate(
+            [self._embeddings, np.asarray(embeddings, dtype=np.float32)[posiciones]]
+        )
+        self._usos = np.concatenate([self._usos, np.full(len(posiciones), int(time.time()), dtype=np.int64)])
+
+    def _evictar(self) -> None:
+        if len(self._usos) <= self.max_entries:
+            return
+        conservar = np.sort(np.argsort(-self._usos, kind="stable")[:self.max_entries])
+        hashes = np.array(list(self._indice.keys()))[np.argsort(list(self._indice.values()))]
+        self._scores, self._embeddings, self._usos = (
+            self._scores[conservar], self._embeddings[conservar], self._usos[conservar]
+        )
+        self._indice = {h: i for i, h in enumerate(hashes[conservar].tolist())}
+
+    def guardar(self) -> None:
+        """Aplica el límite de entradas y sube la caché."""
+        self._evictar()
+        hashes = sorted(self._indice, key=self._indice.get)
+        buffer = BytesIO()
+        np.savez(
+            buffer,
+            clave_modelo=np.array(self.clave_modelo),
+            hashes=np.array(hashes, dtype="U32"),
+            scores=self._scores,
+            embeddings=self._embeddings,
+            usos=self._usos,
+        )
+        write_bytes_blob(buffer.getvalue(), self.blob_name)
+        logger.info(f"Caché de inferencia guardada: {len(self)} textos")
+
+    def tasa_aciertos(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def resumen(self) -> str:
+        return (f"Caché de inferencia: {self.hits} hits, {self.misses} misses "
+                f"({self.tasa_aciertos():.0%}), {len(self)} textos guardados")
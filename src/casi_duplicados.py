@@ -0,0 +1,93 @@
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from src.config import NEAR_DUP_THRESHOLD, NEAR_DUP_NUM_PERM, NEAR_DUP_BANDS, NEAR_DUP_SHINGLE
+from src.logger import get_logger
+
+logger = get_logger(__name__, "casi_duplicados.log")
+
+# Agrupación de tweets casi idénticos (variantes "RT", el mismo titular con distinto link o
+# emoji) sobre el texto ya limpio:
+#   1. cada texto → conjunto de shingles de NEAR_DUP_SHINGLE caracteres → firma MinHash
+#   2. LSH: la firma se corta en NEAR_DUP_BANDS bandas; textos que comparten una banda son candidatos
+#   3. un texto se une al grupo de un representante candidato si su Jaccard estimado ≥ umbral;
+#      si no, pasa a ser representante de un grupo nuevo (todos los miembros se comparan contra
+#      el representante, así los grupos no se encadenan)
+
+_PRIMO = np.uint64((1 << 31) - 1)
+
+
+def _coeficientes(num_perm: int, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, int(_PRIMO), size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, int(_PRIMO), size=num_perm, dtype=np.uint64)
+    return a[:, None], b[:, None]
+
+
+def _shingles(texto: str, k: int) -> np.ndarray:
+    """Hashes (crc32 mod primo) de los k-gramas de caracteres distintos del texto."""
+    if len(texto) <= k:
+        grams = {texto}
+    else:
+        grams = {texto[i:i + k] for i in range(len(texto) - k + 1)}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64) % _PRIMO
+
+
+def firmas_minhash(textos, num_perm: int = NEAR_DUP_NUM_PERM, k: int = NEAR_DUP_SHINGLE) -> np.ndarray:
+    """Firma MinHash (n, num_perm) de cada texto."""
+    a, b = _coeficientes(num_perm)
+    firmas = np.empty((len(textos), num_perm), dtype=np.uint64)
+    for i, texto in enumerate(textos):
+        # a, b < 2^31 y x < 2^31: a·x + b cabe en uint64
+        firmas[i] = ((a * _shingles(texto or "", k)[None, :] + b) % _PRIMO).min(axis=1)
+    return firmas
+
+
+def representantes(textos, umbral: float = NEAR_DUP_THRESHOLD, num_perm: int = NEAR_DUP_NUM_PERM,
+                   bandas: int = NEAR_DUP_BANDS) -> np.ndarray:
+    """Posición del representante del grupo de cada texto (él mismo si encabeza un grupo).
+
+    El representante es el primer texto del grupo en el orden de entrada.
+    """
+    textos = list(textos)
+    firmas = firmas_minhash(textos, num_perm)
+    filas = num_perm // bandas
+    cubetas = [{} for _ in range(bandas)]
+    reps = np.arange(len(textos))
+
+    for i in range(len(textos)):
+        claves = [firmas[i, j * filas:(j + 1) * filas].tobytes() for j in range(bandas)]
+        candidatos = {r for j, clave in enumerate(claves) for r in cubetas[j].get(clave, ())}
+        if candidatos:
+            candidatos = sorted(candidatos)
+            similitud = (firmas[candidatos] == firmas[i]).mean(axis=1)
+            mejor = int(np.argmax(similitud))
+            if similitud[mejor] >= umbral:
+                reps[i] = candidatos[mejor]
+                continue
+        for j, clave in enumerate(claves):
+            cubetas[j].setdefault(clave, []).append(i)
+    return reps
+
+
+def resumen_por_dia(fechas, textos, reps) -> pd.DataFrame:
+    """Inferencias evitadas por día: tweets, textos distintos y representantes inferidos.
+
+    Returns:
+        pd.DataFrame: columnas date, tweets, textos_unicos, inferencias, ahorradas.
+    """
+    reps = np.asarray(reps)
+    df = pd.DataFrame({
+        "date": pd.to_datetime(pd.Series(fechas), utc=True).dt.strftime("%Y-%m-%d").to_numpy(),
+        "text": list(textos),
+        "es_rep": reps == np.arange(len(reps)),
+    })
+    resumen = df.groupby("date").agg(
+        tweets=("text", "size"),
+        textos_unicos=("text", "nunique"),
+        inferencias=("es_rep", "sum"),
+    ).reset_index()
+    resumen["ahorradas"] = resumen["tweets"] - resumen["inferencias"]
+    return resumen
@@ -10,19 +10,141 @@ load_dotenv()
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
 
+# Formato de almacenamiento de los datasets del pipeline: "csv" o "parquet" (columnar).
+# Para migrar blobs existentes usar azure_blob.convertir_csv_a_parquet.
+STORAGE_FORMAT = os.getenv("STORAGE_FORMAT", "csv")
+_EXT = "parquet" if STORAGE_FORMAT == "parquet" else "csv"
+
 # Nombres de blobs (rutas lógicas en Azure)
-RAW_DATA_PATH = "raw_data.csv"
-PREPROCESSED_PATH = "preprocessed.csv"
-SENTIMENT_DATA_PATH = "sentiment_analysis.csv"
-PROCESSED_DATA_PATH = "processed_data.csv"
-EMBEDDING_DATA_PATH = "embedding_data.csv"
-FEATURES_DATASET_PATH = "features_dataset.csv"
+RAW_DATA_PATH = f"raw_data.{_EXT}"
+PREPROCESSED_PATH = f"preprocessed.{_EXT}"
+SENTIMENT_DATA_PATH = f"sentiment_analysis.{_EXT}"
+PROCESSED_DATA_PATH = f"processed_data.{_EXT}"
+EMBEDDING_DATA_PATH = f"embedding_data.{_EXT}"
+FEATURES_DATASET_PATH = f"features_dataset.{_EXT}"
+
+# Layout particionado por día (append-only + manifest) para raw y processed.
+# Un path terminado en "/" indica a azure_blob que es un dataset particionado.
+PARTITIONED_LAYOUT = os.getenv("PARTITIONED_LAYOUT", "0") == "1"
+if PARTITIONED_LAYOUT:
+    RAW_DATA_PATH = "raw/"
+    PROCESSED_DATA_PATH = "processed/"
+# Día de la semana (0=lunes) en que main.py compacta las particiones
+COMPACTION_WEEKDAY = int(os.getenv("COMPACTION_WEEKDAY", "6"))
+
+# Embeddings: "csv" (768 columnas robertuito_* en processed_data) o "store"
+# (arrays binarios por día bajo EMBEDDINGS_STORE_PREFIX, ver src/embeddings_store.py)
+EMBEDDINGS_FORMAT = os.getenv("EMBEDDINGS_FORMAT", "csv")
+EMBEDDINGS_STORE_PREFIX = "embeddings/"
+# Precisión en el store: "float32", "float16" o "int8" (con escala por vector)
+EMBEDDINGS_STORE_DTYPE = os.getenv("EMBEDDINGS_STORE_DTYPE", "float32")
+EMBEDDING_DIM = 768
 PREDICTIONS_PATH = "predicciones_diarias.csv"
 ENCUESTAS_PATH = "encuestas.csv"
 
 # Model 
 MODEL_DIR = Path("models")
 
+# ========================
+# 🤖 INFERENCIA
+# ========================
+
+# Tweets por batch (se agrupan por largo en tokens para minimizar el padding)
+INFERENCE_BATCH_SIZE = int(os.getenv("INFERENCE_BATCH_SIZE", "32"))
+# Largo máximo en tokens del modelo de sentimiento (RoBERTuito admite 128)
+SENTIMENT_MAX_LENGTH = int(os.getenv("SENTIMENT_MAX_LENGTH", "128"))
+# Origen del embedding de 768 dimensiones: "encoder" (robertuito-base-uncased, forward aparte)
+# o "sentiment" (hidden states del modelo de sentimiento, en el mismo forward que los scores).
+# Los modelos entrenados con embeddings "encoder" requieren mantener ese modo.
+EMBEDDING_SOURCE = os.getenv("EMBEDDING_SOURCE", "encoder")
+# Backend de inferencia en CPU: "torch" (fp32), "quantized" (int8 dinámico) u "onnx" (onnxruntime)
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+# Verifica el backend contra PyTorch fp32 al cargar (si no cumple la tolerancia, se usa fp32)
+INFERENCE_PARITY_CHECK = os.getenv("INFERENCE_PARITY_CHECK", "1") == "1"
+ONNX_DIR = MODEL_DIR / "onnx"
+# Inferencia multi-proceso para reprocesos grandes: procesos (1 = sin pool), hilos de torch por
+# proceso (0 = núcleos / procesos) y textos por shard enviado a cada proceso
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "1"))
+INFERENCE_THREADS_PER_WORKER = int(os.getenv("INFERENCE_THREADS_PER_WORKER", "0"))
+INFERENCE_SHARD_SIZE = int(os.getenv("INFERENCE_SHARD_SIZE", "256"))
+# Caché persistente de resultados por texto limpio (scores + embeddings), ver src/cache_inferencia.py
+INFERENCE_CACHE = os.getenv("INFERENCE_CACHE", "0") == "1"
+INFERENCE_CACHE_BLOB = "cache/inferencia.npz"
+INFERENCE_CACHE_MAX_ENTRIES = int(os.getenv("INFERENCE_CACHE_MAX_ENTRIES", "50000"))
+# Copias locales de los pesos de Hugging Face y de los corpus de NLTK. Los modelos y corpus se
+# cargan recién cuando se usan, primero desde estas carpetas sin consultar la red; solo si
+# faltan se descargan (una vez). MODELS_OFFLINE=1 prohíbe la descarga.
+HF_CACHE_DIR = Path(os.getenv("HF_CACHE_DIR", str(MODEL_DIR / "hf")))
+NLTK_DATA_DIR = Path(os.getenv("NLTK_DATA_DIR", str(MODEL_DIR / "nltk_data")))
+MODELS_OFFLINE = os.getenv("MODELS_OFFLINE", "0") == "1"
+
+# ========================
+# 🧩 PREPROCESAMIENTO POR CHUNKS
+# ========================
+# Tweets por chunk: cada chunk pasa por limpieza → sentimiento → embeddings y se confirma
+# (parte propia + entrada del ledger) antes de seguir; processed_data se escribe una vez al final
+# y una corrida interrumpida retoma en el chunk siguiente.
+PREPROCESS_CHUNK_SIZE = int(os.getenv("PREPROCESS_CHUNK_SIZE", "2000"))
+PREPROCESS_LEDGER_PREFIX = "cache/preprocesamiento/"
+# Guarda también los CSV intermedios de la corrida (texto limpio, sentimiento, embeddings)
+PREPROCESS_INTERMEDIATES = os.getenv("PREPROCESS_INTERMEDIATES", "0") == "1"
+
+# ========================
+# 👯 CASI DUPLICADOS (MinHash + LSH)
+# ========================
+# Agrupa tweets casi idénticos tras la limpieza; solo se infiere un representante por grupo y
+# su resultado se copia a los miembros (columna "dup_group" = id del representante).
+NEAR_DUP_DEDUP = os.getenv("NEAR_DUP_DEDUP", "0") == "1"
+# Jaccard estimado mínimo entre un tweet y el representante de su grupo
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.8"))
+NEAR_DUP_NUM_PERM = 64
+NEAR_DUP_BANDS = 16
+NEAR_DUP_SHINGLE = 5
+# FeatureEngineer: cada tweet pesa 1/tamaño de su dup_group en las medias diarias de sentimiento
+FEATURES_DEWEIGHT_DUPLICATES = os.getenv("FEATURES_DEWEIGHT_DUPLICATES", "0") == "1"
+
+# ========================
+# 📈 FEATURES INCREMENTALES
+# ========================
+# Con FEATURES_INCREMENTAL solo se agregan los días con tweets nuevos (según el conteo por día
+# guardado en el estado) y se recalcula la ventana que necesitan los lags y rollings. La
+# primera corrida hace el cálculo completo y congela los parámetros del RobustScaler.
+FEATURES_INCREMENTAL = os.getenv("FEATURES_INCREMENTAL", "0") == "1"
+FEATURES_STATE_BLOB = "cache/features_estado.npz"
+# Sin manifest (layout de un solo archivo) solo se revisan los días desde el último del estado
+# menos esta cantidad de días (tweets que llegan atrasados); los anteriores se dan por cerrados
+# (un CSV de un solo archivo se sigue leyendo completo: el incremental barato requiere Parquet
+# o el layout particionado)
+FEATURES_INCREMENTAL_LOOKBACK = int(os.getenv("FEATURES_INCREMENTAL_LOOKBACK", "3"))
+# Con FEATURES_FROM_MODELS el flujo diario solo calcula las features que usan los modelos
+# desplegados (feature_names de los bundles) y sus dependencias; para reentrenar se deja en "0"
+FEATURES_FROM_MODELS = os.getenv("FEATURES_FROM_MODELS", "0") == "1"
+# Con FEATURES_CHUNK_ROWS > 0, FeatureEngineer y calcular_metricas recorren processed_data en
+# bloques de esa cantidad de tweets acumulando sumas por día, en vez de cargar todo el histórico
+FEATURES_CHUNK_ROWS = int(os.getenv("FEATURES_CHUNK_ROWS", "0"))
+
+# ========================
+# 🧭 PROYECCIÓN DE EMBEDDINGS
+# ========================
+# Con EMBEDDING_PROJECTION ("pca" o "random") las 768 medias diarias robertuito_i se reemplazan
+# en features_dataset por EMBEDDING_PROJECTION_DIMS columnas embedding_proy_i. La proyección se
+# ajusta una sola vez y se guarda junto a los modelos (models/ en el storage).
+EMBEDDING_PROJECTION = os.getenv("EMBEDDING_PROJECTION", "").lower()
+EMBEDDING_PROJECTION_DIMS = int(os.getenv("EMBEDDING_PROJECTION_DIMS", "24"))
+EMBEDDING_PROJECTION_SEED = 42
+EMBEDDING_PROJECTION_BLOB = "models/proyeccion_embeddings.npz"
+
+# ========================
+# 🌐 FILTRO DE IDIOMA
+# ========================
+# Descarta antes de la inferencia los tweets que no están en español (ver src/idioma.py).
+# Con `fasttext` instalado y el modelo lid.176.ftz en LANG_MODEL_PATH se usa fastText; si no,
+# un modelo de trigramas de caracteres entrenado con el corpus incluido en src/idioma_corpus.py (es/en/pt).
+LANG_FILTER = os.getenv("LANG_FILTER", "0") == "1"
+LANG_MODEL_PATH = Path(os.getenv("LANG_MODEL_PATH", str(MODEL_DIR / "lid.176.ftz")))
+# Probabilidad mínima de fastText para rechazar un tweet de otro idioma
+LANG_MIN_CONFIDENCE = float(os.getenv("LANG_MIN_CONFIDENCE", "0.5"))
+
 # LOGS
 LOGS_DIR = BASE_DIR / "logs"
 TEST_LOG_PATH = LOGS_DIR / "tests.log"
@@ -0,0 +1,154 @@
+import re
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from src.azure_blob import read_csv_blob, read_bytes_blob, write_bytes_blob, ruta_local_blob, blobs_existentes
+from src.config import EMBEDDINGS_STORE_PREFIX, EMBEDDINGS_STORE_DTYPE, EMBEDDING_DIM, PROCESSED_DATA_PATH
+from src.logger import get_logger
+
+logger = get_logger(__name__, "embeddings_store.log")
+
+# Layout por día:
+#   embeddings/date=YYYY-MM-DD/vectors.npy  → (n, 768) float32 | float16 | int8
+#   embeddings/date=YYYY-MM-DD/scales.npy   → (n,) float32, solo para int8 (vector = q * escala)
+#   embeddings/date=YYYY-MM-DD/ids.npy      → (n,) ids de tweet como texto (se escribe al final)
+DTYPES_VALIDOS = ("float32", "float16", "int8")
+_RE_DIA = re.compile(r"date=(\d{4}-\d{2}-\d{2})/ids\.npy$")
+
+EMBEDDING_COLUMNS = [f"robertuito_{i}" for i in range(EMBEDDING_DIM)]
+
+
+def dia_utc(fechas) -> pd.Series:
+    """Día (YYYY-MM-DD) de cada tweet, con la misma convención que FeatureEngineer (UTC, sin tz)."""
+    fechas = pd.to_datetime(pd.Series(fechas), errors="coerce", utc=True)
+    return fechas.dt.tz_localize(None).dt.floor("D").dt.strftime("%Y-%m-%d")
+
+
+def _a_npy(array: np.ndarray) -> bytes:
+    buffer = BytesIO()
+    np.save(buffer, array, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def _cargar_npy(blob_name: str, mmap: bool = True) -> np.ndarray:
+    """Carga un .npy del store; con `mmap` se abre con numpy.memmap sobre la copia local."""
+    if mmap:
+        ruta = ruta_local_blob(blob_name)
+        if ruta is not None:
+            return np.load(ruta, mmap_mode="r", allow_pickle=False)
+    return np.load(BytesIO(read_bytes_blob(blob_name)), allow_pickle=False)
+
+
+class EmbeddingStore:
+    """Store binario de embeddings robertuito por día, indexado por id de tweet."""
+
+    def __init__(self, prefix: str = EMBEDDINGS_STORE_PREFIX, dtype: str = EMBEDDINGS_STORE_DTYPE):
+        if dtype not in DTYPES_VALIDOS:
+            raise ValueError(f"❌ dtype de embeddings no soportado: {dtype} (usar {DTYPES_VALIDOS})")
+        self.prefix = prefix
+        self.dtype = dtype
+
+    def _ruta(self, dia: str, archivo: str) -> str:
+        return f"{self.prefix}date={dia}/{archivo}"
+
+    def _cuantizar(self, vectores: np.ndarray):
+        """Convierte vectores float32 al dtype del store. Devuelve (datos, escalas o None)."""
+        if self.dtype == "int8":
+            escalas = np.abs(vectores).max(axis=1) / 127.0
+            escalas[escalas == 0] = 1.0
+            datos = np.round(vectores / escalas[:, None]).astype(np.int8)
+            return datos, escalas.astype(np.float32)
+        return vectores.astype(self.dtype), None
+
+    def dias(self) -> list:
+        """Días con embeddings guardados (un solo listado del prefijo)."""
+        encontrados = (_RE_DIA.search(n) for n in blobs_existentes(self.prefix, ttl=0))
+        return sorted(m.group(1) for m in encontrados if m)
+
+    def cargar_dia(self, dia: str, mmap: bool = True):
+        """Devuelve (ids, vectores) de un día. Los vectores int8 se devuelven ya escalados a float32."""
+        ids = _cargar_npy(self._ruta(dia, "ids.npy"), mmap=False)
+        vectores = _cargar_npy(self._ruta(dia, "vectors.npy"), mmap=mmap)
+        if vectores.shape[0] != ids.shape[0]:
+            raise ValueError(f"❌ Store inconsistente para {dia}: {vectores.shape[0]} vectores, {ids.shape[0]} ids")
+        if vectores.dtype == np.int8:
+            escalas = _cargar_npy(self._ruta(dia, "scales.npy"), mmap=False)
+            vectores = vectores.astype(np.float32) * escalas[:, None]
+        return ids, vectores
+
+    def guardar(self, ids, fechas, vectores) -> None:
+        """Agrega embeddings al store, fusionando por día con lo ya guardado (último id gana).
+
+        Args:
+            ids: Ids de tweet (se guardan como texto).
+            fechas: `createdAt` de cada tweet (define el día de la partición).
+            vectores: Array (n, 768) con los embeddings.
+        """
+        ids = pd.Series(ids).astype(str).to_numpy()
+        vectores = np.asarray(vectores, dtype=np.float32).reshape(len(ids), EMBEDDING_DIM)
+        dias = dia_utc(fechas).to_numpy()
+        existentes = set(self.dias())
+        sin_fecha = int(pd.isna(dias).sum())
+        if sin_fecha:
+            logger.warning(f"⚠️ {sin_fecha} embeddings sin createdAt válido no se guardan")
+
+        for dia in sorted(pd.unique(dias[pd.notna(dias)])):
+            mask = dias == dia
+            ids_dia, vec_dia = ids[mask], vectores[mask]
+            if dia in existentes:
+                ids_prev, vec_prev = self.cargar_dia(dia, mmap=False)
+                ids_dia = np.concatenate([ids_prev.astype(str), ids_dia])
+                vec_dia = np.concatenate([np.asarray(vec_prev, dtype=np.float32), vec_dia])
+
+            # Deduplicar por id conservando la última aparición
+            _, idx_ultimo = np.unique(ids_dia[::-1], return_index=True)
+            orden = np.sort(len(ids_dia) - 1 - idx_ultimo)
+            ids_dia, vec_dia = ids_dia[orden], vec_dia[orden]
+
+            datos, escalas = self._cuantizar(vec_dia)
+            write_bytes_blob(_a_npy(datos), self._ruta(dia, "vectors.npy"))
+            if escalas is not None:
+                write_bytes_blob(_a_npy(escalas), self._ruta(dia, "scales.npy"))
+            write_bytes_blob(_a_npy(ids_dia.astype(str)), self._ruta(dia, "ids.npy"))
+            logger.info(f"💾 {len(ids_dia)} embeddings ({self.dtype}) guardados para {dia}")
+
+    def medias_diarias(self, dias=None, columnas=None) -> pd.DataFrame:
+        """Promedio diario de cada dimensión (columnas robertuito_i), leyendo con memmap.
+
+        Args:
+            dias: Días a calcular (YYYY-MM-DD o fechas). Por defecto todos los del store.
+            columnas: Subconjunto de columnas robertuito_i a calcular. Por defecto todas.
+        """
+        columnas = EMBEDDING_COLUMNS if columnas is None else list(columnas)
+        indices = [EMBEDDING_COLUMNS.index(c) for c in columnas]
+        disponibles = set(self.dias())
+        if dias is None:
+            dias = sorted(disponibles)
+        else:
+            dias = sorted({pd.Timestamp(d).strftime("%Y-%m-%d") for d in dias} & disponibles)
+
+        filas = []
+        for dia in dias:
+            _, vectores = self.cargar_dia(dia)
+            if len(vectores):
+                filas.append(np.asarray(vectores[:, indices]).mean(axis=0, dtype=np.float64))
+            else:
+                filas.append(np.full(len(indices), np.nan))
+
+        df = pd.DataFrame(np.vstack(filas) if filas else np.empty((0, len(indices))), columns=columnas)
+        df.insert(0, "date", pd.to_datetime(dias))
+        return df
+
+
+def migrar_embeddings_desde_csv(blob_origen: str = PROCESSED_DATA_PATH, store: EmbeddingStore = None) -> None:
+    """Copia las columnas robertuito_* de un dataset existente al store binario."""
+    store = store or EmbeddingStore()
+    df = read_csv_blob(blob_origen, columns=["id", "createdAt"] + EMBEDDING_COLUMNS)
+    store.guardar(df["id"], df["createdAt"], df[EMBEDDING_COLUMNS].to_numpy(dtype=np.float32))
+    logger.info(f"🔁 {len(df)} embeddings migrados de {blob_origen} a {store.prefix}")
+
+
+if __name__ == "__main__":
+    migrar_embeddings_desde_csv()
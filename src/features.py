@@ -1,43 +1,499 @@
+from io import BytesIO
 import pandas as pd
 import numpy as np
-from src.azure_blob import read_csv_blob, write_csv_blob
+from src.storage import es_parquet, filtrar_fechas
+from src.azure_blob import read_csv_blob, iter_csv_blob, write_csv_blob, read_bytes_blob, write_bytes_blob, es_particionado
+from src.azure_blob import blob_exists
 from sklearn.preprocessing import RobustScaler
 from src.logger import get_logger
-from src.config import PROCESSED_DATA_PATH, ENCUESTAS_PATH, FEATURES_DATASET_PATH
+from src.config import PROCESSED_DATA_PATH, ENCUESTAS_PATH, FEATURES_DATASET_PATH, FEATURES_DEWEIGHT_DUPLICATES
+from src.config import FEATURES_INCREMENTAL, FEATURES_STATE_BLOB, FEATURES_INCREMENTAL_LOOKBACK
+from src.config import FEATURES_CHUNK_ROWS, EMBEDDING_PROJECTION, EMBEDDING_PROJECTION_BLOB
+from src.registro_features import (
+    ENGAGEMENT_VARS, SCORE_COLS, EMBEDDING_COLS, EMBEDDING_PROY_COLS, WEIGHTED_COLS, FEATURES_SIEMPRE,
+    cierre, calcular_derivadas,
+)
 
 logger = get_logger(__name__, "features.log")
 
+# Filas previas que necesitan los lags y rollings más largos (approval_lag_14d, sentiment_net_rolling14)
+VENTANA_DERIVADAS = 14
+
+
+# ========================
+# 📐 ESTADÍSTICOS SUFICIENTES POR DÍA (modo incremental)
+# ========================
+# Con el engagement escalado como w = (x - centro) / escala, todas las agregaciones diarias salen
+# de sumas sobre el engagement sin escalar:
+#   media(w)             = (Σx/n - centro) / escala
+#   Σ score·w / Σ w      = (Σ score·x - centro·Σ score) / (Σx - centro·n)   (la escala se cancela)
+# Por eso el estado guarda, por día, n, Σ score, Σ x y Σ score·x, más los parámetros del
+# RobustScaler congelados en la primera corrida.
+
+def estadisticas_diarias(df: pd.DataFrame) -> pd.DataFrame:
+    """n, Σ score, Σ engagement y Σ score·engagement por día (engagement sin escalar).
+
+    Returns:
+        pd.DataFrame: Una fila por "date" (índice) y columnas n, sum_<score>, sum_<var>, sum_<score>_x_<var>.
+    """
+    datos = {"n": np.ones(len(df))}
+    scores = {col: df[col].to_numpy(dtype="float64") for col in SCORE_COLS}
+    for col, valores in scores.items():
+        datos[f"sum_{col}"] = valores
+    for var in ENGAGEMENT_VARS:
+        x = df[var].astype("float64").to_numpy()
+        datos[f"sum_{var}"] = x
+        for col, valores in scores.items():
+            datos[f"sum_{col}_x_{var}"] = valores * x
+    return pd.DataFrame(datos).groupby(df["date"].to_numpy()).sum().rename_axis("date")
+
+
+def diario_desde_estadisticas(stats: pd.DataFrame, centro, escala) -> pd.DataFrame:
+    """Columnas diarias de sentimiento y engagement (como FeatureEngineer.run) a partir del estado."""
+    n = stats["n"].to_numpy()
+    df_daily = pd.DataFrame({"date": pd.to_datetime(stats.index)})
+    for col in SCORE_COLS:
+        df_daily[col] = stats[f"sum_{col}"].to_numpy() / n
+    for var, c, e in zip(ENGAGEMENT_VARS, centro, escala):
+        df_daily[var] = (stats[f"sum_{var}"].to_numpy() / n - c) / e
+    for var, c in zip(ENGAGEMENT_VARS, centro):
+        denominador = stats[f"sum_{var}"].to_numpy() - c * n
+        for col in SCORE_COLS:
+            nombre = f"weighted_{col.replace('score_', '')}_{var}"
+            numerador = stats[f"sum_{col}_x_{var}"].to_numpy() - c * stats[f"sum_{col}"].to_numpy()
+            with np.errstate(divide="ignore", invalid="ignore"):
+                # Sin peso total se usa la media simple (igual que weighted_avg)
+                df_daily[nombre] = np.where(denominador != 0, numerador / denominador, stats[f"sum_{col}"].to_numpy() / n)
+    return df_daily
+
+
+# ========================
+# 🧱 ACUMULADORES POR DÍA (modo por bloques)
+# ========================
+# Todo lo que se agrega por día es una suma, así que cada bloque de tweets se reduce a sumas por
+# día y se acumula. El RobustScaler necesita mediana e IQR de todo el histórico: se guardan los
+# conteos de cada valor de engagement (enteros, con pocos valores distintos) y los percentiles
+# se calculan exactos desde ellos, con la misma interpolación lineal de numpy.
+
+def acumular(total, bloque: pd.DataFrame) -> pd.DataFrame:
+    """Suma (alineando por índice y columnas) las sumas por día de un bloque al acumulado."""
+    return bloque if total is None else total.add(bloque, fill_value=0)
+
+
+def percentil_desde_conteos(conteos: pd.Series, q: float) -> float:
+    """Percentil q (0-100) de los datos descritos por {valor: repeticiones}, como np.percentile."""
+    conteos = conteos[conteos > 0].sort_index()
+    valores = conteos.index.to_numpy(dtype="float64")
+    acumulado = np.cumsum(conteos.to_numpy())
+    posicion = q / 100 * (acumulado[-1] - 1)
+    bajo, alto = np.searchsorted(acumulado, [np.floor(posicion), np.ceil(posicion)], side="right")
+    return valores[bajo] + (valores[alto] - valores[bajo]) * (posicion - np.floor(posicion))
+
+
+def escalado_robusto(conteos: dict):
+    """(centro, escala) de RobustScaler para cada variable de engagement desde sus conteos."""
+    centro = np.array([percentil_desde_conteos(conteos[var], 50) for var in ENGAGEMENT_VARS])
+    escala = np.array([
+        percentil_desde_conteos(conteos[var], 75) - percentil_desde_conteos(conteos[var], 25)
+        for var in ENGAGEMENT_VARS
+    ])
+    # RobustScaler deja en 1 las escalas nulas
+    return centro, np.where(escala == 0, 1.0, escala)
+
 class FeatureEngineer:
-    def __init__(self, input_path, encuestas_path, output_path):
+    def __init__(self, input_path, encuestas_path, output_path, features=None):
         self.input_path = input_path
         self.encuestas_path = encuestas_path
         self.output_path = output_path
+        # features=None calcula todo el registro (entrenamiento); con una lista (p. ej. las
+        # feature_names de los modelos desplegados) solo su cierre de dependencias
+        self.requeridas = None if features is None else cierre(list(features) + FEATURES_SIEMPRE)
+
+    def necesarias(self, columnas: list) -> list:
+        """Las columnas de la lista que hay que calcular en esta corrida."""
+        return list(columnas) if self.requeridas is None else [c for c in columnas if c in self.requeridas]
+
+    def proyeccion_activa(self) -> bool:
+        return bool(EMBEDDING_PROJECTION) and bool(self.necesarias(EMBEDDING_PROY_COLS))
+
+    def embeddings_a_calcular(self) -> list:
+        """Dimensiones robertuito_i cuya media diaria hay que calcular (todas si se proyectan)."""
+        return list(EMBEDDING_COLS) if self.proyeccion_activa() else self.necesarias(EMBEDDING_COLS)
+
+    def reducir_embeddings(self, df_daily: pd.DataFrame, ajustar: bool = True) -> pd.DataFrame:
+        """Reemplaza las medias robertuito_i por el bloque embedding_proy_i (si está activo).
+
+        La proyección guardada se reutiliza. Si no existe, solo se ajusta (y se guarda) cuando
+        `ajustar` es True, es decir, cuando df_daily tiene el histórico completo; el modo
+        incremental (solo días nuevos) nunca ajusta. Solo se conservan las robertuito_i pedidas
+        explícitamente.
+        """
+        if not self.proyeccion_activa():
+            return df_daily
+        from src.proyeccion_embeddings import ProyeccionEmbeddings
+
+        proyeccion = ProyeccionEmbeddings.cargar()
+        if proyeccion is None and not ajustar:
+            raise RuntimeError("No hay proyección de embeddings guardada y solo se tienen los días nuevos: "
+                               "corre el cálculo completo para ajustarla")
+        if proyeccion is None:
+            proyeccion = ProyeccionEmbeddings.ajustar(df_daily[EMBEDDING_COLS].to_numpy(), EMBEDDING_PROJECTION)
+            proyeccion.guardar()
+        if proyeccion.dims != len(EMBEDDING_PROY_COLS):
+            logger.error(f"❌ La proyección guardada tiene {proyeccion.dims} dims y se esperaban "
+                         f"{len(EMBEDDING_PROY_COLS)}: no se calcula el bloque reducido")
+            return df_daily
+
+        reducido = pd.DataFrame(proyeccion.transformar(df_daily[EMBEDDING_COLS].to_numpy()),
+                                columns=EMBEDDING_PROY_COLS, index=df_daily.index)
+        explicitas = [] if self.requeridas is None else [c for c in EMBEDDING_COLS if c in self.requeridas]
+        quitar = [c for c in EMBEDDING_COLS if c not in explicitas]
+        logger.info(f"Embeddings diarios proyectados con {proyeccion.metodo}: 768 → {proyeccion.dims} columnas")
+        return pd.concat([df_daily.drop(columns=quitar), reducido], axis=1)
+
+    def seleccionar(self, df_daily: pd.DataFrame) -> pd.DataFrame:
+        """Deja solo "date" y las features requeridas (todas si no hay selección)."""
+        if self.requeridas is None:
+            return df_daily
+        return df_daily[[c for c in df_daily.columns if c == "date" or c in self.requeridas]]
 
     def weighted_avg(self, values, weights):
         return (values * weights).sum() / weights.sum() if weights.sum() != 0 else values.mean()
 
+    def sumas_sin_duplicados(self, df: pd.DataFrame, columnas: list) -> pd.DataFrame:
+        """Σ valor·peso por día (y Σ peso en la columna "peso"), con peso = 1/tamaño del dup_group.
+
+        Las filas sin "dup_group" (procesadas antes de agrupar duplicados) pesan 1.
+        """
+        peso = (1.0 / df.groupby("dup_group")["dup_group"].transform("size")).fillna(1.0)
+        sumas = df[columnas].astype("float64").mul(peso, axis=0).groupby(df["date"]).sum()
+        sumas["peso"] = peso.groupby(df["date"]).sum()
+        return sumas
+
+    def medias_sin_duplicados(self, df: pd.DataFrame, columnas: list) -> pd.DataFrame:
+        """Medias diarias donde cada tweet pesa 1/tamaño de su grupo de casi duplicados."""
+        sumas = self.sumas_sin_duplicados(df, columnas)
+        return sumas[columnas].div(sumas["peso"], axis=0)
+
+    def agregados_ponderados(self, df: pd.DataFrame, engagement_vars: list) -> pd.DataFrame:
+        """weighted_<sentimiento>_<var> por día con un único groupby().sum().
+
+        Equivale a aplicar weighted_avg(score, var) en cada día: numeradores Σ score·peso y
+        denominadores Σ peso se suman juntos, y los días con Σ peso == 0 usan la media simple.
+        """
+        columnas = {}
+        for col in SCORE_COLS:
+            valores = df[col].to_numpy(dtype="float64")
+            columnas[f"sum_{col}"] = valores
+            columnas[f"cnt_{col}"] = ~np.isnan(valores)
+        for var in engagement_vars:
+            pesos = df[var].to_numpy(dtype="float64")
+            columnas[f"peso_{var}"] = pesos
+            for col in SCORE_COLS:
+                columnas[f"num_{col}_{var}"] = columnas[f"sum_{col}"] * pesos
+        sumas = pd.DataFrame(columnas).groupby(df["date"].to_numpy()).sum()
+
+        df_w = pd.DataFrame({"date": sumas.index})
+        for var in engagement_vars:
+            denominador = sumas[f"peso_{var}"].to_numpy()
+            for col in SCORE_COLS:
+                media = sumas[f"sum_{col}"].to_numpy() / sumas[f"cnt_{col}"].to_numpy()
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    ponderado = sumas[f"num_{col}_{var}"].to_numpy() / denominador
+                df_w[f"weighted_{col.replace('score_', '')}_{var}"] = np.where(denominador != 0, ponderado, media)
+        return df_w
+
+    def agregar_encuestas(self, df_daily: pd.DataFrame, df_encuestas: pd.DataFrame) -> pd.DataFrame:
+        """Agrega aprobación y desaprobación de la semana objetivo a cada día."""
+        start_date = df_encuestas["date"].min()
+        end_date = df_encuestas["date"].max() + pd.Timedelta(days=6)
+        df_cadem_expandido = pd.DataFrame({"date": pd.date_range(start=start_date, end=end_date, freq="D")})
+
+        df_cadem_expandido["semana_objetivo"] = df_cadem_expandido["date"].apply(
+            lambda d: d + pd.to_timedelta(6 - d.weekday(), unit="D")
+        )
+        df_encuestas_ren = df_encuestas.rename(columns={"date": "semana_objetivo"})
+        df_cadem_expandido = df_cadem_expandido.merge(df_encuestas_ren, on="semana_objetivo", how="left")
+
+        df_daily = df_daily.merge(
+            df_cadem_expandido[["date", "aprobacion_boric", "desaprobacion_boric"]],
+            on="date", how="left"
+        )
+        return df_daily
+
+    def variables_derivadas(self, df_daily: pd.DataFrame) -> pd.DataFrame:
+        """Lags, rollings y sentimiento neto sobre las filas diarias (ordenadas por fecha)."""
+        df_daily = df_daily.sort_values("date").reset_index(drop=True)
+        return calcular_derivadas(df_daily, self.requeridas)
+
+    def features_existentes(self, fechas):
+        """Filas de features_dataset de días que no están en `fechas` (None si no existe)."""
+        try:
+            df_existing = read_csv_blob(self.output_path, schema="features")
+        except FileNotFoundError:
+            return None
+        return df_existing[~df_existing["date"].isin(fechas)]
+
+    def guardar_features(self, df_daily: pd.DataFrame, df_existing=None) -> None:
+        """Escribe features_dataset: filas nuevas + días previos que ya no están en processed_data."""
+        df_daily["date"] = pd.to_datetime(df_daily["date"]).dt.date
+
+        if df_existing is not None:
+            df_daily = pd.concat([df_existing, df_daily], ignore_index=True).drop_duplicates(subset=["date"])
+        df_daily = self.seleccionar(df_daily)
+
+        write_csv_blob(df_daily, self.output_path)
+        logger.info(f"✅ Features guardados en: {self.output_path}")
+
+    # ========================
+    # 📈 MODO INCREMENTAL
+    # ========================
+    def cargar_estado(self):
+        """(estadísticos por día, centro, escala) del estado incremental, o None si no existe."""
+        try:
+            data = np.load(BytesIO(read_bytes_blob(FEATURES_STATE_BLOB)), allow_pickle=False)
+        except FileNotFoundError:
+            return None
+        stats = pd.DataFrame(data["valores"], columns=data["columnas"].tolist(),
+                             index=pd.DatetimeIndex(pd.to_datetime(data["dias"]), name="date"))
+        return stats, data["centro"], data["escala"]
+
+    def guardar_estado(self, stats: pd.DataFrame, centro, escala) -> None:
+        buffer = BytesIO()
+        np.savez(
+            buffer,
+            dias=pd.DatetimeIndex(stats.index).strftime("%Y-%m-%d").to_numpy(dtype="U10"),
+            columnas=np.array(stats.columns, dtype=str),
+            valores=stats.to_numpy(dtype="float64"),
+            centro=np.asarray(centro, dtype="float64"),
+            escala=np.asarray(escala, dtype="float64"),
+        )
+        write_bytes_blob(buffer.getvalue(), FEATURES_STATE_BLOB)
+        logger.info(f"Estado incremental guardado: {len(stats)} días en {FEATURES_STATE_BLOB}")
+
+    def conteos_por_dia(self) -> pd.Series:
+        """Tweets por día del dataset particionado, desde el manifest (sin leer datos)."""
+        from src.particiones import leer_manifest
+        particiones = leer_manifest(self.input_path)["partitions"]
+        conteos = pd.Series({dia: e["rows"] for dia, e in particiones.items()}, dtype="int64")
+        conteos.index = pd.to_datetime(conteos.index)
+        return conteos[conteos > 0].sort_index()
+
+    def leer_dias(self, dias) -> pd.DataFrame:
+        """Tweets procesados de los días indicados (solo el rango de esos días)."""
+        df = read_csv_blob(self.input_path, date_range=(min(dias), max(dias)), schema="processed")
+        df["date"] = df["createdAt"].dt.floor("D").dt.tz_localize(None)
+        return df[df["date"].isin(dias)].reset_index(drop=True)
+
+    def leer_desde(self, desde) -> pd.DataFrame:
+        """Tweets procesados desde `desde` (inclusive) en layout de un solo archivo.
+
+        Parquet solo descarga los row groups del rango. Un CSV no tiene índice por fecha: se
+        descarga y parsea completo (costo O(histórico) en cada corrida) y solo se conservan en
+        memoria las filas del rango. Para que el modo incremental sea O(tweets nuevos) el
+        dataset procesado debe estar en Parquet o particionado.
+        """
+        if es_parquet(self.input_path):
+            df = read_csv_blob(self.input_path, date_range=(desde, None), schema="processed")
+        else:
+            logger.warning(f"⚠️ {self.input_path} es un CSV de un solo archivo: el modo incremental lo lee "
+                           f"completo en cada corrida; usar Parquet o el layout particionado")
+            bloques = [
+                filtrar_fechas(bloque, (desde, None))
+                for bloque in iter_csv_blob(self.input_path, FEATURES_CHUNK_ROWS or 100_000, schema="processed")
+            ]
+            df = pd.concat(bloques, ignore_index=True) if bloques else pd.DataFrame()
+        df["date"] = df["createdAt"].dt.floor("D").dt.tz_localize(None)
+        return df
+
+    def run_incremental(self, estado) -> None:
+        """Agrega solo los días con tweets nuevos y recalcula la ventana de lags y rollings.
+
+        Un día se considera nuevo si su cantidad de tweets difiere de la guardada en el estado. En
+        layout particionado los conteos salen del manifest; en un solo archivo solo se revisan los
+        días desde el último del estado menos FEATURES_INCREMENTAL_LOOKBACK (en CSV eso igual
+        implica leer el archivo completo, ver leer_desde).
+        Los días anteriores se toman tal cual de features_dataset; de ellos solo se usan las
+        últimas VENTANA_DERIVADAS filas para recalcular lags y rollings.
+        """
+        logger.info("Inicio de feature engineering incremental")
+        stats, centro, escala = estado
+        try:
+            if es_particionado(self.input_path):
+                conteos, df = self.conteos_por_dia(), None
+            else:
+                # Sin manifest: los conteos salen de los días recientes, que igual hay que leer
+                df = self.leer_desde(stats.index.max() - pd.Timedelta(days=FEATURES_INCREMENTAL_LOOKBACK))
+                conteos = df["date"].value_counts().sort_index()
+            cambiados = list(conteos.index[stats["n"].reindex(conteos.index).ne(conteos)])
+            if not cambiados:
+                print("⏭️ Features al día: no hay tweets nuevos.")
+                logger.info("Features incrementales: no hay días con tweets nuevos.")
+                return
+
+            df = self.leer_dias(cambiados) if df is None else df[df["date"].isin(cambiados)].reset_index(drop=True)
+            df_encuestas = read_csv_blob(self.encuestas_path, schema="encuestas")
+            nuevas = estadisticas_diarias(df)
+            df_nuevos = diario_desde_estadisticas(nuevas, centro, escala)
+
+            if FEATURES_DEWEIGHT_DUPLICATES and "dup_group" in df.columns:
+                medias = self.medias_sin_duplicados(df, SCORE_COLS)
+                df_nuevos[SCORE_COLS] = medias.loc[df_nuevos["date"]].to_numpy()
+
+            embedding_cols = self.embeddings_a_calcular()
+            if embedding_cols and all(col in df.columns for col in EMBEDDING_COLS):
+                df_emb = df.groupby("date", as_index=False)[embedding_cols].mean()
+                df_nuevos = df_nuevos.merge(df_emb, on="date", how="left")
+            elif embedding_cols:
+                from src.embeddings_store import EmbeddingStore
+                df_emb = EmbeddingStore().medias_diarias(df_nuevos["date"], columnas=embedding_cols)
+                df_nuevos = df_nuevos.merge(df_emb, on="date", how="left")
+            df_nuevos = self.reducir_embeddings(df_nuevos, ajustar=False)
+
+            try:
+                df_existing = read_csv_blob(self.output_path, schema="features")
+                df_existing["date"] = pd.to_datetime(df_existing["date"])
+            except FileNotFoundError:
+                df_existing = pd.DataFrame(columns=["date"])
+
+            # Filas base a recalcular: la ventana previa al primer día nuevo, los días posteriores
+            # ya existentes y los días nuevos
+            inicio = min(cambiados)
+            anteriores = df_existing[df_existing["date"] < inicio].sort_values("date")
+            posteriores = df_existing[(df_existing["date"] >= inicio) & ~df_existing["date"].isin(cambiados)]
+            base = pd.concat(
+                [anteriores.tail(VENTANA_DERIVADAS), posteriores], ignore_index=True
+            ).reindex(columns=df_nuevos.columns)
+            base = pd.concat([base, df_nuevos], ignore_index=True)
+
+            recalculado = self.variables_derivadas(self.agregar_encuestas(base, df_encuestas))
+            recalculado = recalculado[recalculado["date"] >= inicio]
+            df_daily = pd.concat([anteriores, recalculado], ignore_index=True)
+            columnas = list(df_existing.columns) + [c for c in df_daily.columns if c not in df_existing.columns]
+            df_daily = self.seleccionar(df_daily[columnas]).copy()
+            df_daily["date"] = pd.to_datetime(df_daily["date"]).dt.date
+
+            write_csv_blob(df_daily, self.output_path)
+            stats = pd.concat([stats.drop(index=nuevas.index, errors="ignore"), nuevas]).sort_index()
+            self.guardar_estado(stats, centro, escala)
+            print(f"📈 Features incrementales: {len(cambiados)} días agregados ({len(df)} tweets)")
+            logger.info(f"✅ Features incrementales guardados en {self.output_path}: "
+                        f"{len(cambiados)} días, {len(df)} tweets, {len(recalculado)} filas recalculadas")
+
+        except Exception as e:
+            logger.error(f"Error durante feature engineering incremental: {e}")
+
+    # ========================
+    # 🧱 MODO POR BLOQUES
+    # ========================
+    def run_por_bloques(self, filas: int) -> None:
+        """Como run(), pero recorriendo processed_data en bloques de `filas` tweets.
+
+        Cada bloque se reduce a sumas por día (estadísticos suficientes, sumas de embeddings,
+        sumas de-ponderadas) y conteos de valores de engagement; la memoria depende del tamaño
+        del bloque y de la cantidad de días, no de la cantidad de tweets del histórico. Con
+        FEATURES_DEWEIGHT_DUPLICATES el tamaño de cada dup_group se cuenta dentro del bloque.
+        """
+        logger.info(f"Inicio de feature engineering por bloques de {filas} tweets")
+        embedding_cols = self.embeddings_a_calcular()
+        stats = sumas_emb = sumas_dedup = None
+        conteos = {var: pd.Series(dtype="float64") for var in ENGAGEMENT_VARS}
+        embeddings_en_df = False
+        tweets = 0
+
+        try:
+            df_encuestas = read_csv_blob(self.encuestas_path, schema="encuestas")
+            for df in iter_csv_blob(self.input_path, filas, schema="processed"):
+                df["date"] = df["createdAt"].dt.floor("D").dt.tz_localize(None)
+                tweets += len(df)
+                stats = acumular(stats, estadisticas_diarias(df))
+                for var in ENGAGEMENT_VARS:
+                    conteos[var] = conteos[var].add(df[var].astype("float64").value_counts(), fill_value=0)
+
+                embeddings_en_df = all(col in df.columns for col in EMBEDDING_COLS)
+                if embedding_cols and embeddings_en_df:
+                    emb = df[embedding_cols].astype("float64")
+                    sumas_emb = acumular(sumas_emb, pd.concat([
+                        emb.groupby(df["date"]).sum(),
+                        emb.notna().groupby(df["date"]).sum().add_prefix("n_"),
+                    ], axis=1))
+
+                if FEATURES_DEWEIGHT_DUPLICATES and "dup_group" in df.columns:
+                    sumas_dedup = acumular(sumas_dedup, self.sumas_sin_duplicados(df, SCORE_COLS))
+        except Exception as e:
+            logger.error(f"Error al recorrer {self.input_path} por bloques: {e}")
+            return
+
+        if stats is None:
+            logger.warning("No hay nuevos días para procesar.")
+            return
+        stats = stats.sort_index()
+        logger.info(f"Procesando {len(stats)} días ({tweets} tweets).")
+
+        try:
+            centro, escala = escalado_robusto(conteos)
+            diario = diario_desde_estadisticas(stats, centro, escala)
+            df_daily = diario[["date"] + SCORE_COLS + ENGAGEMENT_VARS].copy()
+
+            if sumas_dedup is not None:
+                medias = sumas_dedup[SCORE_COLS].div(sumas_dedup["peso"], axis=0)
+                df_daily[SCORE_COLS] = medias.loc[df_daily["date"]].to_numpy()
+                logger.info("Medias de sentimiento ponderadas por tamaño de grupo de duplicados")
+
+            if embedding_cols and embeddings_en_df:
+                medias = sumas_emb[embedding_cols].to_numpy() / sumas_emb[[f"n_{c}" for c in embedding_cols]].to_numpy()
+                df_emb = pd.DataFrame(medias, columns=embedding_cols)
+                df_emb.insert(0, "date", pd.to_datetime(sumas_emb.index))
+                df_daily = df_daily.merge(df_emb, on="date", how="left")
+            elif embedding_cols:
+                from src.embeddings_store import EmbeddingStore
+                df_emb = EmbeddingStore().medias_diarias(df_daily["date"], columnas=embedding_cols)
+                df_daily = df_daily.merge(df_emb, on="date", how="left")
+                logger.info(f"Medias de embeddings leídas del store para {len(df_emb)} días")
+            df_daily = self.reducir_embeddings(df_daily)
+
+            if self.necesarias(WEIGHTED_COLS):
+                df_daily = df_daily.merge(diario[["date"] + WEIGHTED_COLS], on="date", how="left")
+
+            df_daily = self.agregar_encuestas(df_daily, df_encuestas)
+            df_daily = self.variables_derivadas(df_daily)
+            self.guardar_features(df_daily, self.features_existentes(stats.index))
+            if FEATURES_INCREMENTAL:
+                self.guardar_estado(stats, centro, escala)
+            logger.info(f"Días nuevos procesados: {len(stats)}")
+
+        except Exception as e:
+            logger.error(f"Error durante feature engineering por bloques: {e}")
+
     def run(self):
+        if FEATURES_INCREMENTAL:
+            estado = self.cargar_estado()
+            if estado is not None and self.proyeccion_activa() and not blob_exists(EMBEDDING_PROJECTION_BLOB):
+                # Ajustar con los días nuevos daría una proyección pobre: se rehace el histórico
+                logger.warning("⚠️ Falta la proyección de embeddings guardada: se recalcula el histórico completo "
+                               "para ajustarla en vez del modo incremental")
+            elif estado is not None:
+                return self.run_incremental(estado)
+            # Primera corrida: cálculo completo que deja el estado inicial y congela el scaler
+            logger.info("Sin estado incremental: se calcula el histórico completo")
+
+        if FEATURES_CHUNK_ROWS > 0:
+            return self.run_por_bloques(FEATURES_CHUNK_ROWS)
+
         logger.info("Inicio de feature engineering")
 
         try:
-            df = read_csv_blob(self.input_path)
-            df_encuestas = read_csv_blob(self.encuestas_path)
+            df = read_csv_blob(self.input_path, schema="processed")
+            df_encuestas = read_csv_blob(self.encuestas_path, schema="encuestas")
             logger.info(f"Archivos cargados: {self.input_path}, {self.encuestas_path}")
         except Exception as e:
             logger.error(f"Error al cargar archivos: {e}")
             return
 
-        df["createdAt"] = pd.to_datetime(df["createdAt"], errors="coerce")
+        # createdAt (UTC) y date ya llegan parseados por el schema
         df["date"] = df["createdAt"].dt.floor("D").dt.tz_localize(None)
-        df_encuestas["date"] = pd.to_datetime(df_encuestas["date"], errors="coerce").dt.tz_localize(None)
 
-        try:
-            df_existing = read_csv_blob(self.output_path)
-            df_existing["date"] = pd.to_datetime(df_existing["date"], errors="coerce")
-            fechas_nuevas = df["date"].unique()
-            df_existing = df_existing[~df_existing["date"].isin(fechas_nuevas)]
-        except FileNotFoundError:
-            df_existing = None
+        df_existing = self.features_existentes(df["date"].unique())
 
         if df.empty:
             logger.warning("No hay nuevos días para procesar.")
@@ -47,87 +503,43 @@ class FeatureEngineer:
 
         try:
             # === Agregación diaria ===
-            engagement_vars = ["retweetCount", "replyCount", "likeCount", "quoteCount"]
+            estadisticas = estadisticas_diarias(df) if FEATURES_INCREMENTAL else None
             scaler = RobustScaler()
-            df[engagement_vars] = scaler.fit_transform(df[engagement_vars])
+            df[ENGAGEMENT_VARS] = scaler.fit_transform(df[ENGAGEMENT_VARS].astype("float64"))
+
+            # Solo las dimensiones de embedding requeridas (las 768 si no hay selección o se proyectan)
+            embedding_cols = self.embeddings_a_calcular()
+            embeddings_en_df = all(col in df.columns for col in EMBEDDING_COLS)
 
             df_daily = df.groupby("date", as_index=False).agg({
-                "score_positive": "mean",
-                "score_negative": "mean",
-                "score_neutral": "mean",
-                "retweetCount": "mean",
-                "replyCount": "mean",
-                "likeCount": "mean",
-                "quoteCount": "mean",
-                **{f"robertuito_{i}": "mean" for i in range(768)}
+                **{col: "mean" for col in SCORE_COLS + ENGAGEMENT_VARS},
+                **({col: "mean" for col in embedding_cols} if embeddings_en_df else {})
             })
 
-            # === Agregación ponderada por engagement ===
-            weighted_features = []
-            for var in engagement_vars:
-                df_w = df.groupby("date", group_keys=False).apply(
-                    lambda x: pd.Series({
-                        f"weighted_positive_{var}": self.weighted_avg(x["score_positive"], x[var]),
-                        f"weighted_negative_{var}": self.weighted_avg(x["score_negative"], x[var]),
-                        f"weighted_neutral_{var}": self.weighted_avg(x["score_neutral"], x[var])
-                    })
-                ).reset_index()
-                weighted_features.append(df_w)
-
-            df_weighted_all = weighted_features[0]
-            for df_w in weighted_features[1:]:
-                df_weighted_all = df_weighted_all.merge(df_w, on="date", how="left")
-
-            df_daily = df_daily.merge(df_weighted_all, on="date", how="left")
-
-            # === Expansión de encuestas ===
-            start_date = df_encuestas["date"].min()
-            end_date = df_encuestas["date"].max() + pd.Timedelta(days=6)
-            df_cadem_expandido = pd.DataFrame({"date": pd.date_range(start=start_date, end=end_date, freq="D")})
-
-            df_cadem_expandido["semana_objetivo"] = df_cadem_expandido["date"].apply(
-                lambda d: d + pd.to_timedelta(6 - d.weekday(), unit="D")
-            )
-            df_encuestas_ren = df_encuestas.rename(columns={"date": "semana_objetivo"})
-            df_cadem_expandido = df_cadem_expandido.merge(df_encuestas_ren, on="semana_objetivo", how="left")
-
-            df_daily = df_daily.merge(
-                df_cadem_expandido[["date", "aprobacion_boric", "desaprobacion_boric"]],
-                on="date", how="left"
-            )
-
-            # === Variables derivadas ===
-            df_daily = df_daily.sort_values("date").reset_index(drop=True)
-
-            df_daily["approval_rolling_7d"] = df_daily["aprobacion_boric"].shift(1).rolling(window=7, min_periods=7).mean().fillna(method="ffill") 
-            df_daily["approval_lag_7d"] = df_daily["aprobacion_boric"].shift(7)
-            df_daily["approval_lag_14d"] = df_daily["aprobacion_boric"].shift(14)
-
-            df_daily["disapproval_rolling_7d"] = df_daily["desaprobacion_boric"].shift(1).rolling(window=7, min_periods=7).mean().fillna(method="ffill") 
-            df_daily["disapproval_lag_7d"] = df_daily["desaprobacion_boric"].shift(7)
-            df_daily["disapproval_lag_14d"] = df_daily["desaprobacion_boric"].shift(14)
-
-            for lag in range(1, 8):
-                df_daily[f"score_positive_lag_{lag}"] = df_daily["score_positive"].shift(lag)
-                df_daily[f"score_negative_lag_{lag}"] = df_daily["score_negative"].shift(lag)
-                df_daily[f"score_neutral_lag_{lag}"] = df_daily["score_neutral"].shift(lag)
-
-            df_daily["score_negative_rolling7"] = df_daily["score_negative"].rolling(window=7, min_periods=7).mean()
-            df_daily["score_negative_rolling3"] = df_daily["score_negative"].rolling(window=3, min_periods=3).mean()
-
-            df_daily["sentiment_net"] = df_daily["score_positive"] - df_daily["score_negative"]
-            df_daily["sentiment_net_rolling3"] = df_daily["sentiment_net"].rolling(window=3, min_periods=3).mean()
-            df_daily["sentiment_net_rolling7"] = df_daily["sentiment_net"].rolling(window=7, min_periods=7).mean()
-            df_daily["sentiment_net_rolling14"] = df_daily["sentiment_net"].rolling(window=14, min_periods=14).mean()
-            df_daily["sentiment_net_change"] = df_daily["sentiment_net"] - df_daily["sentiment_net"].shift(1)
+            if FEATURES_DEWEIGHT_DUPLICATES and "dup_group" in df.columns:
+                medias = self.medias_sin_duplicados(df, SCORE_COLS)
+                df_daily[SCORE_COLS] = medias.loc[df_daily["date"]].to_numpy()
+                logger.info("Medias de sentimiento ponderadas por tamaño de grupo de duplicados")
 
-            df_daily["date"] = pd.to_datetime(df_daily["date"]).dt.date
+            if embedding_cols and not embeddings_en_df:
+                # Embeddings en el store binario: medias diarias directo desde memmap
+                from src.embeddings_store import EmbeddingStore
+                df_emb = EmbeddingStore().medias_diarias(df_daily["date"], columnas=embedding_cols)
+                df_daily = df_daily.merge(df_emb, on="date", how="left")
+                logger.info(f"Medias de embeddings leídas del store para {len(df_emb)} días")
+            df_daily = self.reducir_embeddings(df_daily)
 
-            if df_existing is not None:
-                df_daily = pd.concat([df_existing, df_daily], ignore_index=True).drop_duplicates(subset=["date"])
+            # === Agregación ponderada por engagement ===
+            if self.necesarias(WEIGHTED_COLS):
+                df_weighted_all = self.agregados_ponderados(df, ENGAGEMENT_VARS)
+                df_daily = df_daily.merge(df_weighted_all, on="date", how="left")
 
-            write_csv_blob(df_daily, self.output_path)
-            logger.info(f"✅ Features guardados en: {self.output_path}")
+            df_daily = self.agregar_encuestas(df_daily, df_encuestas)
+            df_daily = self.variables_derivadas(df_daily)
+
+            self.guardar_features(df_daily, df_existing)
+            if estadisticas is not None:
+                self.guardar_estado(estadisticas, scaler.center_, scaler.scale_)
             logger.info(f"Días nuevos procesados: {df['date'].nunique()}")
 
         except Exception as e:
@@ -0,0 +1,95 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from src.config import LANG_MODEL_PATH, LANG_MIN_CONFIDENCE
+from src.logger import get_logger
+from src.normalizacion import limpiar_serie
+
+logger = get_logger(__name__, "idioma.log")
+
+# Filtro de idioma en batch (se aplica al texto original, antes de quitar stopwords):
+#   - fastText lid.176 si está instalado `fasttext` y existe LANG_MODEL_PATH (predict en batch)
+#   - si no, un modelo de trigramas de caracteres (Naive Bayes) entrenado en el primer uso con
+#     el corpus de referencia de src/idioma_corpus.py (es/en/pt)
+# El filtro es conservador: un tweet se descarta solo si otro idioma le gana al español por
+# más de LANG_NGRAM_MARGIN nats por trigrama, y los textos con menos de LANG_NGRAM_MIN
+# trigramas (respuestas cortas, solo nombres o emojis) se conservan.
+
+LANG_NGRAM_MARGIN = 0.8
+LANG_NGRAM_MIN = 12
+_SUAVIZADO = 0.5
+
+
+def _trigramas(texto: str) -> list:
+    """Trigramas de caracteres de cada palabra, con un espacio como borde ("_el", "el_")."""
+    return [f" {w} "[i:i + 3] for w in texto.split() for i in range(len(w))]
+
+
+@lru_cache(maxsize=None)
+def _modelo_ngramas():
+    """(idiomas, {trigrama: log-probabilidad por idioma}, log-probabilidad de un trigrama no visto)."""
+    from collections import Counter
+    from src.idioma_corpus import CORPUS
+
+    idiomas = list(CORPUS)
+    conteos = {idioma: Counter(t for frase in limpiar_serie(CORPUS[idioma]).dropna()
+                               for t in _trigramas(frase)) for idioma in idiomas}
+    vocabulario = set().union(*conteos.values())
+    totales = np.array([sum(conteos[i].values()) + _SUAVIZADO * (len(vocabulario) + 1) for i in idiomas])
+    logprobs = {
+        t: np.log(np.array([conteos[i][t] + _SUAVIZADO for i in idiomas]) / totales) for t in vocabulario
+    }
+    return idiomas, logprobs, np.log(_SUAVIZADO / totales)
+
+
+def puntajes_por_idioma(textos) -> pd.DataFrame:
+    """Log-verosimilitud media por trigrama de cada idioma (columnas) y cantidad de trigramas ("n")."""
+    idiomas, logprobs, no_visto = _modelo_ngramas()
+    limpio = limpiar_serie(textos).fillna("")
+    filas = []
+    for texto in limpio:
+        trigramas = _trigramas(texto)
+        total = sum((logprobs.get(t, no_visto) for t in trigramas), np.zeros(len(idiomas)))
+        filas.append(np.append(total / max(len(trigramas), 1), len(trigramas)))
+    return pd.DataFrame(np.array(filas).reshape(-1, len(idiomas) + 1), columns=idiomas + ["n"], index=limpio.index)
+
+
+@lru_cache(maxsize=None)
+def _modelo_fasttext():
+    """Modelo lid.176 de fastText (una sola carga por proceso) o None si no está disponible."""
+    try:
+        import fasttext
+    except ImportError:
+        return None
+    if not LANG_MODEL_PATH.exists():
+        return None
+    logger.info(f"Modelo de idioma fastText cargado desde {LANG_MODEL_PATH}")
+    return fasttext.load_model(str(LANG_MODEL_PATH))
+
+
+def _espanol_fasttext(modelo, textos: pd.Series) -> np.ndarray:
+    limpios = limpiar_serie(textos).fillna("").str.split().str.join(" ").tolist()
+    etiquetas, probs = modelo.predict(limpios, k=1)
+    otro = np.array([e[0] != "__label__es" for e in etiquetas]) & (np.array([p[0] for p in probs]) >= LANG_MIN_CONFIDENCE)
+    vacios = np.array([t == "" for t in limpios])
+    return ~otro | vacios
+
+
+def es_espanol(textos) -> np.ndarray:
+    """Máscara booleana: True para los textos que se conservan (español o sin evidencia).
+
+    Args:
+        textos: Serie o lista con el texto original de los tweets.
+    """
+    textos = pd.Series(textos, dtype=object) if not isinstance(textos, pd.Series) else textos
+    if textos.empty:
+        return np.zeros(0, dtype=bool)
+    modelo = _modelo_fasttext()
+    if modelo is not None:
+        return _espanol_fasttext(modelo, textos)
+    puntajes = puntajes_por_idioma(textos)
+    otros = puntajes.drop(columns=["es", "n"]).max(axis=1)
+    rechazar = (puntajes["n"] >= LANG_NGRAM_MIN) & (otros - puntajes["es"] > LANG_NGRAM_MARGIN)
+    return (~rechazar).to_numpy()
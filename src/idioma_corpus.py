@@ -0,0 +1,102 @@
+# Corpus de referencia del detector de idioma por n-gramas de caracteres (src/idioma.py).
+# Frases cortas con el registro de los tweets (política, noticias, respuestas, negaciones);
+# de aquí salen los perfiles de trigramas de cada idioma en el primer uso.
+
+CORPUS = {
+    "es": [
+        "el gobierno anunció que la reforma de pensiones se vota la próxima semana en el congreso",
+        "boric no sabe nada, no hace nada y tampoco escucha a la gente",
+        "no, no y no al gobierno, basta de improvisar con la seguridad del país",
+        "no tenemos seguridad en los barrios y nadie se hace cargo",
+        "sí, estoy de acuerdo contigo, es una vergüenza lo que pasó ayer",
+        "qué terrible lo que dijo el ministro, no tiene idea de lo que vive la clase media",
+        "la delincuencia está desatada y el presidente sigue de vacaciones",
+        "hay que apoyar la reforma tributaria porque los más ricos tienen que pagar más impuestos",
+        "la encuesta cadem muestra que la aprobación del presidente bajó otra vez",
+        "los carabineros detuvieron a los sospechosos del asalto en la comuna de maipú",
+        "me parece bien que se discuta, pero con datos y no con consignas",
+        "nunca había visto un gobierno tan desordenado, cada semana un escándalo nuevo",
+        "el precio de la bencina subió de nuevo y el sueldo no alcanza para nada",
+        "la oposición rechazó el proyecto y pidió la renuncia de la ministra del interior",
+        "felicitaciones al equipo por el triunfo, se lo merecían después de tanto esfuerzo",
+        "ojalá que esta vez cumplan lo que prometieron en la campaña",
+        "yo voté por él y hoy me arrepiento, no cumplió ninguna promesa",
+        "a ver si ahora entienden que la gente está cansada de las peleas políticas",
+        "mañana hay paro de profesores, las clases se suspenden en varios colegios",
+        "el senado aprobó en general la ley de usurpaciones con votos de la derecha",
+        "jajaja no puede ser, qué vergüenza ajena",
+        "hay que decirlo claro: la economía no crece y el desempleo sigue alto",
+        "¿alguien sabe a qué hora es la cadena nacional del presidente?",
+        "¡qué buena noticia! por fin una medida que ayuda a las familias",
+        "la convención fue un fracaso y ahora quieren otra constitución",
+        "no es justo que los jubilados sigan recibiendo pensiones tan bajas",
+        "el alcalde dijo que no va a permitir más tomas en el cerro",
+        "todos sabemos que esto termina en nada, como siempre",
+        "se cayó el sistema del registro civil y nadie da explicaciones",
+        "la inflación bajó un poco pero los alimentos siguen carísimos",
+        "gracias por la información, muy clara",
+        "cuándo van a hacer algo con la migración irregular en el norte",
+        "vamos chile, todavía se puede",
+        "nada que ver, eso es mentira y lo saben",
+        "el diputado pidió disculpas después de la polémica en la comisión",
+        "estos políticos no representan a nadie, son todos iguales",
+        "hoy se cumple un año del incendio y las familias siguen esperando sus casas",
+        "la ministra vocera respondió las críticas en el punto de prensa",
+        "no me gusta el presidente, pero esta vez tiene razón",
+        "y después se preguntan por qué la gente no quiere votar",
+    ],
+    "en": [
+        "the president said that this is not what the people want",
+        "breaking news: the government announced new measures on security and the economy",
+        "i don't think they will ever fix this, it's just the same old politics",
+        "thanks for sharing, this is really helpful",
+        "what a terrible decision by the congress, they should be ashamed",
+        "the election results will be announced tomorrow morning",
+        "this is why we can't have nice things",
+        "they are going to vote on the new bill next week in the senate",
+        "i agree with you, but we need more data before making any decision",
+        "the economy is growing faster than expected according to the latest report",
+        "lol this is so funny, i can't stop laughing",
+        "people are tired of the same promises every single year",
+        "the minister resigned after the scandal went public",
+        "please stop spreading fake news about the protests",
+        "we should support the workers who are on strike this week",
+        "what happened to the money that was promised for schools",
+        "that's not true and you know it",
+        "who is going to pay for all of this in the end",
+        "the police arrested several people after the riots downtown",
+        "good morning everyone, have a great day",
+        "chile has a new president and the markets reacted with caution",
+        "the new constitution was rejected by a large majority of voters",
+        "it was the worst speech i have ever heard from a politician",
+        "there is no way they will win the next election with this approval rating",
+        "check out this thread about the history of the country",
+    ],
+    "pt": [
+        "o governo não vai fazer isso com a gente, é muito ruim",
+        "o presidente disse que a reforma vai ser votada na próxima semana",
+        "não aguento mais essa política, todo dia uma vergonha nova",
+        "obrigado pela informação, muito bom",
+        "a economia do brasil cresceu mais do que o esperado neste ano",
+        "você viu o que aconteceu ontem no congresso? que absurdo",
+        "a população está cansada de tanta promessa que nunca é cumprida",
+        "o ministro pediu demissão depois do escândalo",
+        "eu acho que ele não tem condições de continuar no cargo",
+        "a polícia prendeu os suspeitos do assalto no centro da cidade",
+        "hoje tem jogo do flamengo, vamos ver se ganha",
+        "kkkkk não acredito que ele falou isso",
+        "a inflação subiu de novo e o salário não dá para nada",
+        "o senado aprovou o projeto com os votos da oposição",
+        "bom dia a todos, tenham uma ótima semana",
+        "essa eleição vai ser muito difícil para o governo",
+        "os trabalhadores estão em greve por melhores salários",
+        "não é verdade, isso é mentira e todo mundo sabe",
+        "quem vai pagar essa conta no final somos nós",
+        "a nova lei foi sancionada pelo presidente nesta terça-feira",
+        "ele é o pior político que já vi na minha vida",
+        "as escolas vão ficar fechadas até a próxima segunda",
+        "também acho que eles deveriam ouvir mais a população",
+        "lula e bolsonaro trocaram acusações durante o debate",
+        "a situação da segurança pública está cada vez pior",
+    ],
+}
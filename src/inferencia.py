@@ -0,0 +1,290 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import torch
+from tqdm import tqdm
+
+from src.config import (
+    INFERENCE_BACKEND,
+    INFERENCE_PARITY_CHECK,
+    ONNX_DIR,
+    INFERENCE_WORKERS,
+    INFERENCE_THREADS_PER_WORKER,
+    INFERENCE_SHARD_SIZE,
+    EMBEDDING_DIM,
+)
+from src.logger import get_logger
+
+logger = get_logger(__name__, "inferencia.log")
+
+# Backends de inferencia en CPU para los modelos RoBERTuito:
+#   "torch"     → modelo fp32 tal como lo entrega transformers
+#   "quantized" → cuantización dinámica int8 de las capas Linear (torch.quantization)
+#   "onnx"      → exportado a ONNX y ejecutado con onnxruntime (requiere `onnx` y `onnxruntime`)
+BACKENDS = ("torch", "quantized", "onnx")
+
+# Textos de referencia para comparar un backend contra el modelo fp32
+TEXTOS_PARIDAD = [
+    "el presidente boric anunció nuevas medidas económicas",
+    "pésima gestión del gobierno en seguridad",
+    "excelente noticia para chile",
+    "hoy se discute la reforma de pensiones en el congreso",
+    "no le creo nada a este gobierno",
+    "gran trabajo de los ministros en la emergencia",
+]
+# Diferencia máxima aceptada en probabilidades de sentimiento y similitud coseno mínima en embeddings
+TOLERANCIA_SCORE = 0.05
+TOLERANCIA_COSENO = 0.99
+
+
+@dataclass
+class SalidaOnnx:
+    """Imita la salida de transformers para que el código que consume el modelo no cambie."""
+    logits: torch.Tensor = None
+    last_hidden_state: torch.Tensor = None
+    hidden_states: tuple = None
+
+
+class _EnvoltorioExportable(torch.nn.Module):
+    """Fija las salidas del modelo como tensores para exportar a ONNX."""
+
+    def __init__(self, modelo, tipo: str):
+        super().__init__()
+        self.modelo = modelo
+        self.tipo = tipo
+
+    def forward(self, input_ids, attention_mask):
+        if self.tipo == "sentiment":
+            salida = self.modelo(input_ids=input_ids, attention_mask=attention_mask, output_hidden_states=True)
+            return salida.logits, salida.hidden_states[-1]
+        return self.modelo(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+
+
+class ModeloOnnx:
+    """Sesión de onnxruntime con la interfaz de llamada de un modelo de transformers."""
+
+    def __init__(self, ruta, tipo: str):
+        import onnxruntime as ort
+
+        opciones = ort.SessionOptions()
+        opciones.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(str(ruta), opciones, providers=["CPUExecutionProvider"])
+        self.tipo = tipo
+        self._entradas = [i.name for i in self.session.get_inputs()]
+
+    def __call__(self, output_hidden_states: bool = False, **batch):
+        feed = {nombre: batch[nombre].cpu().numpy().astype(np.int64) for nombre in self._entradas}
+        salidas = [torch.from_numpy(s) for s in self.session.run(None, feed)]
+        if self.tipo == "sentiment":
+            return SalidaOnnx(logits=salidas[0], hidden_states=(salidas[1],))
+        return SalidaOnnx(last_hidden_state=salidas[0])
+
+    def eval(self):
+        return self
+
+
+def cuantizar_dinamico(modelo):
+    """Copia del modelo con las capas Linear cuantizadas a int8 (pesos) en tiempo de carga."""
+    return torch.quantization.quantize_dynamic(modelo, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def exportar_onnx(modelo, tokenizer, nombre: str, tipo: str, revision: str = None):
+    """Exporta el modelo a ONNX_DIR/<nombre>-<revisión>-<tipo>.onnx (una vez por revisión) y devuelve la ruta.
+
+    La revisión (commit del checkpoint) va en el nombre para que un modelo actualizado no
+    reutilice el grafo exportado de la versión anterior.
+    """
+    ruta = ONNX_DIR / f"{nombre.replace('/', '__')}-{revision or 'local'}-{tipo}.onnx"
+    if ruta.exists():
+        return ruta
+    ONNX_DIR.mkdir(parents=True, exist_ok=True)
+    ejemplo = tokenizer(["hola mundo"], return_tensors="pt")
+    ejes = {0: "batch", 1: "secuencia"}
+    if tipo == "sentiment":
+        salidas = {"logits": {0: "batch"}, "hidden": ejes}
+    else:
+        salidas = {"last_hidden_state": ejes}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            _EnvoltorioExportable(modelo.eval(), tipo),
+            (ejemplo["input_ids"], ejemplo["attention_mask"]),
+            str(ruta),
+            input_names=["input_ids", "attention_mask"],
+            output_names=list(salidas),
+            dynamic_axes={"input_ids": ejes, "attention_mask": ejes, **salidas},
+            opset_version=14,
+        )
+    logger.info(f"Modelo {nombre} exportado a ONNX: {ruta}")
+    return ruta
+
+
+def _salidas(modelo, tokenizer, textos, tipo: str):
+    """(probabilidades o None, embeddings mean-pooled) de un modelo sobre los textos.
+
+    Para "sentiment" los embeddings son los de hidden_states[-1], los mismos que usa el
+    preprocesador con EMBEDDING_SOURCE=sentiment.
+    """
+    batch = tokenizer(textos, return_tensors="pt", padding=True, truncation=True, max_length=128)
+    mask = batch["attention_mask"].unsqueeze(-1)
+    with torch.inference_mode():
+        if tipo == "sentiment":
+            salida = modelo(**batch, output_hidden_states=True)
+            logits = salida.logits.numpy()
+            exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+            probs, hidden = exp / exp.sum(axis=1, keepdims=True), salida.hidden_states[-1]
+        else:
+            probs, hidden = None, modelo(**batch).last_hidden_state
+        mask = mask.to(hidden.dtype)
+        return probs, ((hidden * mask).sum(dim=1) / mask.sum(dim=1)).numpy()
+
+
+def _coseno_minimo(esperado: np.ndarray, obtenido: np.ndarray) -> float:
+    coseno = (esperado * obtenido).sum(axis=1) / (
+        np.linalg.norm(esperado, axis=1) * np.linalg.norm(obtenido, axis=1)
+    )
+    return float(coseno.min())
+
+
+def verificar_paridad(referencia, candidato, tokenizer, tipo: str, textos=None) -> dict:
+    """Compara las salidas de un backend contra el modelo PyTorch fp32.
+
+    Args:
+        tipo: "sentiment" (probabilidades y embeddings de hidden_states[-1] por coseno) o
+            "encoder" (embeddings por coseno).
+
+    Returns:
+        dict: {"ok": bool, "min_coseno": float} y, para "sentiment", también "max_diff_score".
+    """
+    textos = textos or TEXTOS_PARIDAD
+    probs_esperadas, emb_esperados = _salidas(referencia, tokenizer, textos, tipo)
+    probs_obtenidas, emb_obtenidos = _salidas(candidato, tokenizer, textos, tipo)
+    min_coseno = _coseno_minimo(emb_esperados, emb_obtenidos)
+    resultado = {"ok": min_coseno >= TOLERANCIA_COSENO, "min_coseno": min_coseno}
+    if tipo == "sentiment":
+        diff = float(np.abs(probs_esperadas - probs_obtenidas).max())
+        resultado["max_diff_score"] = diff
+        resultado["ok"] = resultado["ok"] and diff <= TOLERANCIA_SCORE
+    return resultado
+
+
+def backend_en_uso(modelo) -> str:
+    """Backend con el que corre un modelo devuelto por preparar_modelo."""
+    return getattr(modelo, "backend_inferencia", "torch")
+
+
+def _con_backend(modelo, backend: str):
+    modelo.backend_inferencia = backend
+    return modelo
+
+
+def preparar_modelo(modelo, tokenizer, nombre: str, tipo: str, backend: str = INFERENCE_BACKEND,
+                    revision: str = None):
+    """Devuelve el modelo listo para inferencia en el backend pedido.
+
+    Si INFERENCE_PARITY_CHECK está activo y el backend no pasa la verificación contra el
+    modelo fp32, se registra una advertencia y se usa el modelo PyTorch original. El backend
+    que quedó en uso se consulta con backend_en_uso().
+
+    Args:
+        modelo: Modelo de transformers ya cargado (fp32).
+        tokenizer: Tokenizer del modelo (se usa para exportar y verificar).
+        nombre: Nombre del checkpoint (identifica el archivo ONNX exportado).
+        tipo: "sentiment" o "encoder".
+        backend: "torch", "quantized" u "onnx".
+        revision: Commit del checkpoint (versiona el archivo ONNX exportado).
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"❌ Backend de inferencia no soportado: {backend} (usar {BACKENDS})")
+    modelo.eval()
+    if backend == "torch":
+        return _con_backend(modelo, "torch")
+
+    try:
+        if backend == "quantized":
+            candidato = cuantizar_dinamico(modelo)
+        else:
+            candidato = ModeloOnnx(exportar_onnx(modelo, tokenizer, nombre, tipo, revision), tipo)
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo preparar el backend {backend} para {nombre}: {e}. Se usa PyTorch.")
+        return _con_backend(modelo, "torch")
+
+    if INFERENCE_PARITY_CHECK:
+        resultado = verificar_paridad(modelo, candidato, tokenizer, tipo)
+        logger.info(f"Paridad {backend} vs PyTorch ({nombre}): {resultado}")
+        if not resultado["ok"]:
+            logger.warning(f"⚠️ {backend} fuera de tolerancia para {nombre}: {resultado}. Se usa PyTorch.")
+            return _con_backend(modelo, "torch")
+
+    print(f"⚡ {nombre} ({tipo}) usando backend {backend}")
+    return _con_backend(candidato, backend)
+
+
+# ========================
+# 🧵 POOL DE INFERENCIA MULTI-PROCESO
+# ========================
+# Cada proceso carga los modelos una sola vez (initializer) con un presupuesto fijo de hilos
+# de torch, así N procesos × hilos no sobre-suscriben los núcleos de la máquina.
+
+_preprocesador_worker = None
+
+
+def _inicializar_worker(hilos: int) -> None:
+    global _preprocesador_worker
+    torch.set_num_threads(hilos)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # solo se puede fijar antes del primer uso de torch en el proceso
+    from src.preprocessing import TweetPreprocessor
+    _preprocesador_worker = TweetPreprocessor(input_path=None)
+
+
+def _procesar_shard(textos: list):
+    return _preprocesador_worker.inferir(textos, progreso=False)
+
+
+def abrir_pool(workers: int = INFERENCE_WORKERS, hilos: int = None) -> ProcessPoolExecutor:
+    """Pool de procesos con los modelos cargados una vez por proceso (reutilizable entre llamadas)."""
+    hilos = hilos or INFERENCE_THREADS_PER_WORKER or max(1, (os.cpu_count() or 1) // workers)
+    print(f"🧵 Pool de inferencia: {workers} procesos × {hilos} hilos")
+    logger.info(f"Pool de inferencia: {workers} procesos, {hilos} hilos")
+    contexto = multiprocessing.get_context("spawn")
+    return ProcessPoolExecutor(max_workers=workers, mp_context=contexto,
+                               initializer=_inicializar_worker, initargs=(hilos,))
+
+
+def inferir_en_paralelo(textos, workers: int = INFERENCE_WORKERS, hilos: int = None,
+                        shard_size: int = INFERENCE_SHARD_SIZE, pool: ProcessPoolExecutor = None):
+    """Sentimiento + embeddings repartiendo los textos en shards entre `workers` procesos.
+
+    Los resultados se entregan en el mismo orden de `textos` a medida que terminan los shards.
+    Con `pool` (ver abrir_pool) se reutiliza un pool ya abierto en vez de crear uno nuevo.
+
+    Returns:
+        tuple: (lista de tuplas de sentimiento, array (n, 768) float32 de embeddings).
+    """
+    textos = list(textos)
+    shards = [textos[i:i + shard_size] for i in range(0, len(textos), shard_size)]
+    resultados, embeddings = [], []
+    logger.info(f"Inferencia multi-proceso: {len(textos)} textos en {len(shards)} shards")
+
+    propio = pool is None
+    if propio:
+        pool = abrir_pool(workers, hilos)
+    try:
+        with tqdm(total=len(textos), desc="🧵 Inferencia por shards") as pbar:
+            for res, emb in pool.map(_procesar_shard, shards):
+                resultados.extend(res)
+                embeddings.append(np.asarray(emb, dtype=np.float32))
+                pbar.update(len(res))
+    finally:
+        if propio:
+            pool.shutdown()
+
+    if not embeddings:
+        return resultados, np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+    return resultados, np.vstack(embeddings)
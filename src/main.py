@@ -9,7 +9,9 @@ from src.config import (
     FEATURES_DATASET_PATH,
     ENCUESTAS_PATH,
     PREDICTIONS_PATH,
-    MODEL_DIR
+    MODEL_DIR,
+    COMPACTION_WEEKDAY,
+    FEATURES_FROM_MODELS
 )
 
 from src.scraping import TweetScraper
@@ -19,7 +21,8 @@ from src.modeling import ModelTrainer
 from src.predict import Predictor
 from src.metricas import calcular_metricas, generar_wordcloud_diario, generar_wordclouds_pendientes
 from src.utils import generar_resumen_diario, enviar_resumen_por_email
-from src.azure_blob import write_csv_blob
+from src.azure_blob import write_csv_blob, es_particionado, resumen_cache, flush_uploads
+from src.particiones import compactar_particiones
 import os
 import subprocess
 from datetime import datetime
@@ -82,10 +85,13 @@ def main():
 
     # Feature Engineering
     print(f"Comenzando con feature engineering")
+    # Con FEATURES_FROM_MODELS los modelos se cargan antes para calcular solo sus features
+    predictor = Predictor() if FEATURES_FROM_MODELS else None
     engineer = FeatureEngineer(
         input_path=PROCESSED_DATA_PATH,
         encuestas_path=ENCUESTAS_PATH,
-        output_path=FEATURES_DATASET_PATH
+        output_path=FEATURES_DATASET_PATH,
+        features=predictor.features_requeridas() if predictor else None
     )
     engineer.run()
     print("✅ Feature engineering completado.")
@@ -110,7 +116,7 @@ def main():
 
     # Predicción con el modelo entrenado
     print(f"Comenzando predicción")
-    predictor = Predictor()
+    predictor = predictor or Predictor()
     predicciones = predictor.predict()
     write_csv_blob(predicciones, PREDICTIONS_PATH)
     print(f"✅ Predicción generada y guardada en {PREDICTIONS_PATH}")
@@ -121,10 +127,21 @@ def main():
     print(f"Comenzamos el armado de la wordcloud")
     generar_wordclouds_pendientes()
     
+    # Esperar las subidas en segundo plano (WRITE_BEHIND=1) antes de compactar y resumir
+    flush_uploads()
+
+    # Compactación semanal de los datasets particionados
+    if datetime.today().weekday() == COMPACTION_WEEKDAY:
+        for dataset in (RAW_DATA_PATH, PROCESSED_DATA_PATH):
+            if es_particionado(dataset):
+                compactar_particiones(dataset)
+
     # === Generar y enviar resumen diario ===
     print("Generando resumen diario...")
     resumen = generar_resumen_diario()
     enviar_resumen_por_email(contenido_md=resumen)
+
+    print(f"📊 {resumen_cache()}")
     
 
 
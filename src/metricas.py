@@ -7,8 +7,8 @@ from io import BytesIO
 import os
 import re
 from tqdm import tqdm
-from src.config import PROCESSED_DATA_PATH, WORDCLOUD_PATH, PREDICTIONS_PATH, FEATURES_DATASET_PATH
-from src.azure_blob import read_csv_blob, write_csv_blob, blob_exists, upload_image_blob
+from src.config import PROCESSED_DATA_PATH, WORDCLOUD_PATH, PREDICTIONS_PATH, FEATURES_DATASET_PATH, FEATURES_CHUNK_ROWS
+from src.azure_blob import read_csv_blob, iter_csv_blob, write_csv_blob, blobs_existentes, upload_image_blob
 from src.logger import get_logger
 logger = get_logger(__name__, "metricas.log")
 
@@ -26,6 +26,20 @@ def clasificar_sentimiento(row):
         return "neutro"  # asignamos neutro en caso de empate
     return candidatos[0]
 
+def conteos_por_sentimiento(df_raw: pd.DataFrame) -> pd.DataFrame:
+    """Tweets por día (índice date_only) y sentimiento dominante (columnas; empates como "neutro")."""
+    df_raw = df_raw.dropna(subset=["score_positive", "score_negative", "score_neutral"])
+    df_raw = df_raw.assign(date_only=df_raw["createdAt"].dt.date)
+
+    # Vectorizado sin .apply
+    scores = df_raw[["score_positive", "score_negative", "score_neutral"]]
+    clasificado = scores.idxmax(axis=1).str.replace("score_", "")
+
+    empates = scores.eq(scores.max(axis=1), axis=0).sum(axis=1) > 1
+    clasificado[empates] = "neutro"
+
+    return clasificado.groupby(df_raw["date_only"]).value_counts().unstack(fill_value=0)
+
 def calcular_metricas():
     logger.info("Iniciando cálculo de métricas")
 
@@ -37,8 +51,7 @@ def calcular_metricas():
         return
 
     try:
-        df_features = read_csv_blob(FEATURES_DATASET_PATH)
-        df_features["date"] = pd.to_datetime(df_features["date"], errors="coerce")
+        df_features = read_csv_blob(FEATURES_DATASET_PATH, columns=["date", "score_negative"])
         negatividad_por_dia = df_features.groupby(df_features['date'].dt.date)['score_negative'].mean().reset_index()
         negatividad_por_dia.columns = ['date', 'indice_negatividad']
         negatividad_por_dia["date"] = pd.to_datetime(negatividad_por_dia["date"])
@@ -49,29 +62,20 @@ def calcular_metricas():
 
     try:
         print("Comenzando cálculo de % tweets negativos")
-        df_raw = read_csv_blob(PROCESSED_DATA_PATH)
-
-        if "createdAt" not in df_raw.columns:
-            raise ValueError("❌ La columna 'createdAt' no está presente en processed_data.csv")
-
-        # Forzar conversión de fechas
-        df_raw["createdAt"] = pd.to_datetime(df_raw["createdAt"], errors="coerce")
-
-        # Verifica si hay muchas fechas mal parseadas
-        invalid_dates = df_raw["createdAt"].isna().sum()
-        df_raw = df_raw.dropna(subset=["score_positive", "score_negative", "score_neutral"])
-        #print("se eliminó NaNs")
-        df_raw["date_only"] = df_raw["createdAt"].dt.date
-        #print(f"🔍 Filas restantes antes de clasificar: {len(df_raw)}")
-        
-        # Vectorizado sin .apply
-        scores = df_raw[["score_positive", "score_negative", "score_neutral"]]
-        df_raw["sentimiento_clasificado"] = scores.idxmax(axis=1).str.replace("score_", "")
-
-        empates = scores.eq(scores.max(axis=1), axis=0).sum(axis=1) > 1
-        df_raw.loc[empates, "sentimiento_clasificado"] = "neutro"
-
-        conteos = df_raw.groupby("date_only")["sentimiento_clasificado"].value_counts().unstack(fill_value=0).reset_index()
+        columnas = ["createdAt", "score_positive", "score_negative", "score_neutral"]
+        # Con FEATURES_CHUNK_ROWS se recorre processed_data por bloques y se suman los conteos por día
+        if FEATURES_CHUNK_ROWS > 0:
+            bloques = iter_csv_blob(PROCESSED_DATA_PATH, FEATURES_CHUNK_ROWS, columns=columnas)
+        else:
+            bloques = [read_csv_blob(PROCESSED_DATA_PATH, columns=columnas)]
+
+        conteos = None
+        for df_raw in bloques:
+            if "createdAt" not in df_raw.columns:
+                raise ValueError("❌ La columna 'createdAt' no está presente en processed_data.csv")
+            bloque = conteos_por_sentimiento(df_raw)
+            conteos = bloque if conteos is None else pd.concat([conteos, bloque]).groupby(level=0).sum()
+        conteos = conteos.fillna(0).astype("int64").reset_index()
         conteos.columns.name = None
 
         # Asegurar que todas las clases estén presentes
@@ -127,12 +131,15 @@ def generar_wordcloud_diario():
 def generar_wordcloud_para_fecha(target_date):
     os.makedirs(WORDCLOUD_PATH, exist_ok=True)
 
-    df = read_csv_blob(PROCESSED_DATA_PATH)
+    df = read_csv_blob(
+        PROCESSED_DATA_PATH,
+        columns=["createdAt", "text"],
+        date_range=(target_date, target_date)
+    )
     if "createdAt" not in df.columns or "text" not in df.columns:
         logger.warning("El archivo no tiene las columnas requeridas: createdAt y text")
         return
 
-    df["createdAt"] = pd.to_datetime(df["createdAt"], errors='coerce')
     df = df.dropna(subset=["createdAt", "text"])
     df_target = df[df["createdAt"].dt.date == target_date]
 
@@ -167,11 +174,10 @@ def generar_wordcloud_para_fecha(target_date):
 
 
 def generar_wordclouds_historicos():
-    df = read_csv_blob(PROCESSED_DATA_PATH)
+    df = read_csv_blob(PROCESSED_DATA_PATH, columns=["createdAt", "text"])
     df = df.dropna(subset=["createdAt", "text"])
 
     # Convertir a datetime naive (sin timezone)
-    df["createdAt"] = pd.to_datetime(df["createdAt"], errors="coerce")
     df["createdAt"] = df["createdAt"].dt.tz_localize(None)
 
     fecha_inicio = pd.to_datetime("2024-10-01")
@@ -189,8 +195,9 @@ def generar_wordclouds_pendientes():
     fecha_hoy = datetime.today().date()
     fechas_totales = [fecha_inicio + timedelta(days=i) for i in range((fecha_hoy - fecha_inicio).days + 1)]
 
-    # ✅ Filtrar solo las fechas que realmente faltan
-    fechas_pendientes = [fecha for fecha in fechas_totales if not blob_exists(f"wordclouds/wordcloud_{fecha}.png")]
+    # ✅ Filtrar solo las fechas que realmente faltan (un solo listado del prefijo)
+    existentes = blobs_existentes("wordclouds/")
+    fechas_pendientes = [fecha for fecha in fechas_totales if f"wordclouds/wordcloud_{fecha}.png" not in existentes]
 
     if not fechas_pendientes:
         print("✅ Todas las wordclouds ya están generadas.")
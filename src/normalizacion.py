@@ -0,0 +1,119 @@
+import re
+from functools import lru_cache
+
+import pandas as pd
+
+from src.config import NLTK_DATA_DIR, MODELS_OFFLINE
+from src.logger import get_logger
+
+logger = get_logger(__name__, "normalizacion.log")
+
+# ========================
+# 🧹 NORMALIZACIÓN DE TEXTO EN BATCH
+# ========================
+# Limpieza compartida por TweetPreprocessor.clean_text y topic_analysis_scraping.clean_text:
+#   1. minúsculas + links, menciones (y hashtags) y símbolos fuera en una sola pasada de regex
+#      precompilada, sobre la Serie completa (pandas .str); los emojis caen con los símbolos
+#   2. por texto, filtro de stopwords con un set y lema memoizado (cada palabra distinta se
+#      lematiza una sola vez en todo el proceso)
+#   3. se descartan los textos con menos de min_words o más de max_words palabras
+
+PATRON_RUIDO = re.compile(r"http\S+|www\S+|@\w+|[^\w\sáéíóúñü]")
+PATRON_RUIDO_HASHTAGS = re.compile(r"http\S+|www\S+|@\w+|#\w+|[^\w\sáéíóúñü]")
+
+
+def _recurso_nltk(ruta: str, paquete: str) -> None:
+    """Asegura un corpus de NLTK, descargándolo a NLTK_DATA_DIR solo si no está disponible."""
+    import nltk
+    if str(NLTK_DATA_DIR) not in nltk.data.path:
+        nltk.data.path.insert(0, str(NLTK_DATA_DIR))
+    try:
+        nltk.data.find(ruta)
+    except LookupError:
+        if MODELS_OFFLINE:
+            raise
+        logger.info(f"Descargando corpus NLTK {paquete} a {NLTK_DATA_DIR}")
+        nltk.download(paquete, download_dir=str(NLTK_DATA_DIR), quiet=True)
+
+
+@lru_cache(maxsize=None)
+def stopwords_es() -> frozenset:
+    """Stopwords en español de NLTK (se cargan en el primer uso)."""
+    from nltk.corpus import stopwords
+    _recurso_nltk("corpora/stopwords", "stopwords")
+    return frozenset(stopwords.words("spanish"))
+
+
+@lru_cache(maxsize=None)
+def _lemmatizer():
+    from nltk.stem import WordNetLemmatizer
+    _recurso_nltk("corpora/wordnet", "wordnet")
+    return WordNetLemmatizer()
+
+
+@lru_cache(maxsize=200_000)
+def lema_wordnet(palabra: str) -> str:
+    """Lema de WordNet memoizado (el vocabulario de los tweets se repite mucho)."""
+    return _lemmatizer().lemmatize(palabra)
+
+
+def _como_texto(textos) -> pd.Series:
+    """Serie object con los valores que no son string como None (para usar el accesor .str)."""
+    textos = pd.Series(textos, dtype=object) if not isinstance(textos, pd.Series) else textos
+    return textos.astype(object).where(textos.map(lambda t: isinstance(t, str)), None)
+
+
+def limpiar_serie(textos, quitar_hashtags: bool = False) -> pd.Series:
+    """Minúsculas y eliminación de links, menciones, símbolos (y hashtags) en una pasada."""
+    patron = PATRON_RUIDO_HASHTAGS if quitar_hashtags else PATRON_RUIDO
+    return _como_texto(textos).str.lower().str.replace(patron, "", regex=True)
+
+
+def normalizar_serie(textos, stopwords_set=None, lematizar=lema_wordnet, min_words: int = 3,
+                     max_words: int = 50, quitar_hashtags: bool = False) -> pd.Series:
+    """Normaliza una Serie completa de textos.
+
+    Args:
+        textos: Serie (o lista) de textos; los valores que no son string se devuelven como None.
+        stopwords_set: Palabras a eliminar (por defecto stopwords_es()).
+        lematizar: Función palabra → lema, idealmente memoizada (None para no lematizar).
+        min_words, max_words: Rango de palabras aceptado tras filtrar stopwords.
+        quitar_hashtags: Elimina también los #hashtags completos.
+
+    Returns:
+        pd.Series: Texto normalizado con el mismo índice de entrada, o None si se descarta.
+    """
+    stopwords_set = stopwords_es() if stopwords_set is None else stopwords_set
+    palabras = limpiar_serie(textos, quitar_hashtags).str.split()
+
+    def unir(lista):
+        lista = [w for w in lista if w not in stopwords_set]
+        if len(lista) < min_words or len(lista) > max_words:
+            return None
+        return " ".join(map(lematizar, lista) if lematizar is not None else lista)
+
+    return pd.Series([unir(p) if p is not None else None for p in palabras],
+                     index=palabras.index, dtype=object)
+
+
+def normalizar_serie_spacy(textos, nlp, stopwords_set, min_words: int = 3, max_words: int = 50,
+                           quitar_hashtags: bool = True, batch_size: int = 256) -> pd.Series:
+    """Como normalizar_serie, pero con lemas de spaCy (dependen del contexto de la oración).
+
+    Cada texto limpio distinto pasa una sola vez por `nlp.pipe`, sin parser ni NER.
+    """
+    limpio = limpiar_serie(textos, quitar_hashtags).str.split().str.join(" ")
+    unicos = limpio.dropna().unique()
+    deshabilitar = [p for p in ("parser", "ner") if p in nlp.pipe_names]
+
+    normalizado = {}
+    for texto, doc in zip(unicos, nlp.pipe(unicos, batch_size=batch_size, disable=deshabilitar)):
+        lemas = [
+            token.lemma_ for token in doc
+            if token.lemma_ not in stopwords_set
+            and not token.is_punct
+            and not token.is_space
+            and not token.is_digit
+        ]
+        normalizado[texto] = " ".join(lemas) if min_words <= len(lemas) <= max_words else None
+    return pd.Series([normalizado.get(t) for t in limpio], index=limpio.index, dtype=object)
@@ -0,0 +1,238 @@
+import json
+import uuid
+from datetime import datetime
+
+import pandas as pd
+
+from src.azure_blob import read_csv_blob, write_csv_blob, read_bytes_blob, write_bytes_blob, delete_blob
+from src.logger import get_logger
+from src.schemas import aplicar_schema, schema_para_blob
+
+logger = get_logger(__name__, "particiones.log")
+
+# Layout:  <prefijo>date=YYYY-MM-DD/part-<timestamp>-<uuid>.parquet
+#          <prefijo>_manifest.json   → {"partitions": {"YYYY-MM-DD": {"parts": [...], "rows": n, "pendientes": k}}}
+MANIFEST_NAME = "_manifest.json"
+
+
+def _ruta_manifest(prefix: str) -> str:
+    return f"{prefix}{MANIFEST_NAME}"
+
+
+def _ruta_particion(prefix: str, dia: str) -> str:
+    return f"{prefix}date={dia}/"
+
+
+def _nueva_parte(prefix: str, dia: str) -> str:
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    return f"{_ruta_particion(prefix, dia)}part-{stamp}-{uuid.uuid4().hex[:8]}.parquet"
+
+
+def leer_manifest(prefix: str) -> dict:
+    """Lee el manifest del dataset. Lanza FileNotFoundError si el dataset no existe."""
+    data = read_bytes_blob(_ruta_manifest(prefix))
+    return json.loads(data)
+
+
+def _escribir_manifest(prefix: str, manifest: dict) -> None:
+    manifest["updated_at"] = datetime.utcnow().isoformat()
+    data = json.dumps(manifest, indent=1, sort_keys=True).encode("utf-8")
+    write_bytes_blob(data, _ruta_manifest(prefix), content_type="application/json")
+
+
+def _manifest_o_vacio(prefix: str) -> dict:
+    try:
+        return leer_manifest(prefix)
+    except FileNotFoundError:
+        return {"partitions": {}}
+
+
+def _dia_de_cada_fila(df: pd.DataFrame) -> pd.Series:
+    """Clave de partición (YYYY-MM-DD) por fila: columna "date" o, si no existe, "createdAt" en UTC."""
+    if "date" in df.columns:
+        fechas = pd.to_datetime(df["date"], errors="coerce")
+    else:
+        fechas = pd.to_datetime(df["createdAt"], errors="coerce", utc=True)
+    if fechas.dt.tz is not None:
+        fechas = fechas.dt.tz_convert("UTC").dt.tz_localize(None)
+    sin_fecha = int(fechas.isna().sum())
+    if sin_fecha:
+        # groupby descarta las claves NaN: estas filas no llegan a ninguna partición
+        logger.warning(f"⚠️ {sin_fecha} filas sin fecha válida se descartan al particionar")
+    return fechas.dt.strftime("%Y-%m-%d")
+
+
+def _pendientes(df: pd.DataFrame) -> int:
+    """Filas aún no procesadas (flag "processed" del raw_data); 0 si el dataset no lo usa."""
+    if "processed" not in df.columns:
+        return 0
+    return int((df["processed"] != True).sum())  # noqa: E712
+
+
+def _dedup(df: pd.DataFrame) -> pd.DataFrame:
+    if "id" not in df.columns:
+        return df
+    return df.drop_duplicates(subset=["id"], keep="last").reset_index(drop=True)
+
+
+def _ids_existentes(prefix: str, entrada: dict) -> set:
+    """Ids ya guardados en una partición (solo se descarga la columna "id")."""
+    ids = set()
+    for parte in entrada.get("parts", []):
+        ids.update(read_csv_blob(parte, columns=["id"])["id"].astype(str))
+    return ids
+
+
+def append_particionado(df_new: pd.DataFrame, prefix: str) -> None:
+    """Agrega una parte nueva por cada día de `df_new`, sin reescribir el histórico.
+
+    Los ids ya presentes en la partición del mismo día se descartan, así el costo
+    es proporcional a los días tocados y no al tamaño del archivo completo.
+    """
+    if df_new.empty:
+        return
+    manifest = _manifest_o_vacio(prefix)
+    dias = _dia_de_cada_fila(df_new)
+
+    for dia, df_dia in df_new.groupby(dias):
+        entrada = manifest["partitions"].setdefault(dia, {"parts": [], "rows": 0, "pendientes": 0})
+        df_dia = _dedup(df_dia)
+        if "id" in df_dia.columns and entrada["parts"]:
+            ya_guardados = _ids_existentes(prefix, entrada)
+            df_dia = df_dia[~df_dia["id"].astype(str).isin(ya_guardados)]
+        if df_dia.empty:
+            continue
+
+        parte = _nueva_parte(prefix, dia)
+        write_csv_blob(df_dia, parte, background=False)
+        entrada["parts"].append(parte)
+        entrada["rows"] += len(df_dia)
+        entrada["pendientes"] += _pendientes(df_dia)
+        logger.info(f"➕ {len(df_dia)} filas agregadas en {parte}")
+
+    _escribir_manifest(prefix, manifest)
+
+
+def escribir_particionado(df: pd.DataFrame, prefix: str) -> None:
+    """Reemplaza por completo las particiones de los días presentes en `df` (una parte por día)."""
+    manifest = _manifest_o_vacio(prefix)
+    dias = _dia_de_cada_fila(df)
+    obsoletas = []
+
+    for dia, df_dia in df.groupby(dias):
+        df_dia = _dedup(df_dia)
+        parte = _nueva_parte(prefix, dia)
+        write_csv_blob(df_dia, parte, background=False)
+        anterior = manifest["partitions"].get(dia, {"parts": []})
+        obsoletas.extend(anterior["parts"])
+        manifest["partitions"][dia] = {"parts": [parte], "rows": len(df_dia), "pendientes": _pendientes(df_dia)}
+
+    # El manifest se publica antes de borrar para que los lectores nunca vean partes faltantes
+    _escribir_manifest(prefix, manifest)
+    for parte in obsoletas:
+        delete_blob(parte)
+    logger.info(f"💾 {df.shape[0]} filas escritas en {dias.nunique()} particiones de {prefix}")
+
+
+def dias_en_rango(manifest: dict, date_range=None) -> list:
+    """Días del manifest (ordenados) dentro del rango inclusivo `date_range`."""
+    dias = sorted(manifest["partitions"])
+    if date_range is None:
+        return dias
+    desde, hasta = date_range
+    desde = pd.Timestamp(desde).strftime("%Y-%m-%d") if desde is not None else None
+    hasta = pd.Timestamp(hasta).strftime("%Y-%m-%d") if hasta is not None else None
+    return [d for d in dias if (desde is None or d >= desde) and (hasta is None or d <= hasta)]
+
+
+def leer_particionado(prefix: str, columns=None, date_range=None, schema=None, dias=None) -> pd.DataFrame:
+    """Lee las particiones del rango pedido (o solo los `dias` listados) y las concatena (deduplicando por id).
+
+    El schema (por defecto el registrado para el prefijo) se vuelve a aplicar tras concatenar,
+    porque pd.concat degrada a object las categorías que difieren entre partes.
+    """
+    schema = (schema_para_blob(prefix) if schema is None else schema) or None
+    manifest = leer_manifest(prefix)
+    if dias is None:
+        dias = dias_en_rango(manifest, date_range)
+    else:
+        dias = sorted(d for d in dias if d in manifest["partitions"])
+    if columns is not None and "id" not in columns:
+        columns = list(columns) + ["id"]
+
+    frames = [
+        read_csv_blob(parte, columns=columns, schema=schema or False)
+        for dia in dias
+        for parte in manifest["partitions"][dia]["parts"]
+    ]
+    if not frames:
+        return pd.DataFrame(columns=columns or [])
+    df = aplicar_schema(_dedup(pd.concat(frames, ignore_index=True)), schema)
+    print(f"✅ Dataset particionado leído: {prefix} ({len(dias)} días, {df.shape})")
+    return df
+
+
+def iter_particionado(prefix: str, filas: int, columns=None, schema=None):
+    """Lee el dataset por grupos de días consecutivos de hasta ~`filas` filas (según el manifest).
+
+    Un día nunca se parte entre dos bloques; un día con más de `filas` filas forma su propio bloque.
+    """
+    manifest = leer_manifest(prefix)
+    grupo, acumuladas = [], 0
+    for dia in dias_en_rango(manifest):
+        filas_dia = manifest["partitions"][dia]["rows"]
+        if grupo and acumuladas + filas_dia > filas:
+            yield leer_particionado(prefix, columns=columns, date_range=(grupo[0], grupo[-1]), schema=schema)
+            grupo, acumuladas = [], 0
+        grupo.append(dia)
+        acumuladas += filas_dia
+    if grupo:
+        yield leer_particionado(prefix, columns=columns, date_range=(grupo[0], grupo[-1]), schema=schema)
+
+
+def ultima_fecha(prefix: str):
+    """Último día con datos según el manifest, o None si el dataset no existe."""
+    dias = sorted(_manifest_o_vacio(prefix)["partitions"])
+    return pd.Timestamp(dias[-1]).date() if dias else None
+
+
+def dias_pendientes(prefix: str) -> list:
+    """Días que tienen filas con `processed == False` según el manifest."""
+    manifest = _manifest_o_vacio(prefix)
+    return sorted(d for d, e in manifest["partitions"].items() if e.get("pendientes", 0) > 0)
+
+
+def compactar_particiones(prefix: str) -> int:
+    """Fusiona en una sola parte los días que acumularon varias partes por appends.
+
+    Returns:
+        int: Cantidad de días compactados.
+    """
+    try:
+        manifest = leer_manifest(prefix)
+    except FileNotFoundError:
+        logger.warning(f"No existe el dataset {prefix}; nada que compactar.")
+        return 0
+
+    dias = [d for d, e in manifest["partitions"].items() if len(e["parts"]) > 1]
+    for dia in dias:
+        df_dia = leer_particionado(prefix, date_range=(dia, dia))
+        escribir_particionado(df_dia, prefix)
+    print(f"🧱 Compactación de {prefix}: {len(dias)} días fusionados")
+    logger.info(f"Compactación de {prefix}: {len(dias)} días fusionados")
+    return len(dias)
+
+
+def migrar_a_particiones(blob_origen: str, prefix: str) -> None:
+    """Convierte un dataset monolítico (CSV/Parquet) al layout particionado por día."""
+    df = read_csv_blob(blob_origen)
+    escribir_particionado(df, prefix)
+    print(f"🔁 Migrado {blob_origen} → {prefix}")
+
+
+if __name__ == "__main__":
+    from src.config import RAW_DATA_PATH, PROCESSED_DATA_PATH
+
+    for dataset in (RAW_DATA_PATH, PROCESSED_DATA_PATH):
+        if dataset.endswith("/"):
+            compactar_particiones(dataset)
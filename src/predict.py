@@ -37,10 +37,17 @@ class Predictor:
             logger.error(f"❌ Error al descargar o cargar modelo {filename} desde Azure: {e}")
             return None
 
+    def features_requeridas(self):
+        """Unión de las `feature_names` de los modelos cargados (None si no se cargó ninguno)."""
+        bundles = [b for b in (self.aprobacion_bundle, self.desaprobacion_bundle) if b]
+        if not bundles:
+            return None
+        return sorted({f for bundle in bundles for f in bundle["feature_names"]})
+
     def predict(self):
         print("🚀 Entrando a método `predict()`")
         try:
-            df = read_csv_blob(str(self.features_path))
+            df = read_csv_blob(str(self.features_path), schema="features")
             if df.empty or df.shape[0] == 0 or df.shape[1] == 0:
                 logger.warning(f"⚠️ El archivo {self.features_path} fue cargado pero está vacío.")
                 return pd.DataFrame()
@@ -70,9 +77,6 @@ class Predictor:
                 #    print("Modelo entrenado:", model)
                 #    print("🔍 Bundle keys:", self.aprobacion_bundle.keys())
 
-                # Asegura que la columna date esté en formato reconocible de fecha
-                df_aprob["date"] = pd.to_datetime(df_aprob["date"], errors="coerce")
-
                 # Asegura que todas las columnas requeridas estén en el dataset
                 missing_cols = [col for col in feature_names if col not in df_aprob.columns]
                 if missing_cols:
@@ -136,8 +140,6 @@ class Predictor:
                 #print("Modelo entrenado:", model)
                 #print("🔍 Bundle keys:", self.desaprobacion_bundle.keys())
 
-                df_desaprob["date"] = pd.to_datetime(df_desaprob["date"], errors="coerce")
-
                 missing_cols = [col for col in feature_names if col not in df_desaprob.columns]
                 if missing_cols:
                     logger.error(f"❌ Faltan columnas en el DataFrame para desaprobación: {missing_cols}")
@@ -1,81 +1,220 @@
+import json
+from datetime import datetime
 import pandas as pd
-import re
-import nltk
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
-from langdetect import detect
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, AutoModel
-from scipy.special import softmax
+from functools import lru_cache, cached_property
 import torch
 import numpy as np
 from tqdm import tqdm
-from src.config import PREPROCESSED_PATH, SENTIMENT_DATA_PATH, EMBEDDING_DATA_PATH, PROCESSED_DATA_PATH, RAW_DATA_PATH
+from src.config import PREPROCESSED_PATH, SENTIMENT_DATA_PATH, EMBEDDING_DATA_PATH, PROCESSED_DATA_PATH, RAW_DATA_PATH, EMBEDDINGS_FORMAT
+from src.config import INFERENCE_BATCH_SIZE, SENTIMENT_MAX_LENGTH, EMBEDDING_SOURCE, EMBEDDING_DIM, INFERENCE_WORKERS
+from src.config import INFERENCE_BACKEND, INFERENCE_CACHE, HF_CACHE_DIR, MODELS_OFFLINE
+from src.config import PREPROCESS_CHUNK_SIZE, PREPROCESS_LEDGER_PREFIX, PREPROCESS_INTERMEDIATES
+from src.config import NEAR_DUP_DEDUP, LANG_FILTER
 from src.logger import get_logger
-from src.azure_blob import read_csv_blob, write_csv_blob, append_csv_blob
+from src.inferencia import preparar_modelo, backend_en_uso, inferir_en_paralelo, abrir_pool
+from src.normalizacion import normalizar_serie, stopwords_es
+from src.azure_blob import read_csv_blob, write_csv_blob, append_csv_blob, es_particionado
+from src.azure_blob import read_bytes_blob, write_bytes_blob, delete_blob, blobs_existentes
 logger = get_logger(__name__, "preprocessing.log")
 
-nltk.download("stopwords")
-nltk.download("wordnet")
-
-spanish_stopwords = set(stopwords.words("spanish"))
 custom_stopwords = {
     "q", "ver", "tan", "va", "ser", "cosa", "tra", "sido", "vez",
     "hoy", "ahora", "año", "día", "nuevo", "gente",
     "así", "solo", "parte", "mientras", "puede", "cómo", "hizo"
 }
-stopwords_final = spanish_stopwords.union(custom_stopwords)
-lemmatizer = WordNetLemmatizer()
+
+
+# ========================
+# 💤 CARGA PEREZOSA DE CORPUS Y MODELOS
+# ========================
+# Nada se descarga ni se carga al importar el módulo o al crear el TweetPreprocessor: una corrida
+# sin tweets nuevos termina sin tocar NLTK ni transformers. Los recursos se buscan primero en las
+# copias locales (NLTK_DATA_DIR en src/normalizacion.py, HF_CACHE_DIR) y solo si faltan se descargan una vez.
+
+@lru_cache(maxsize=None)
+def get_stopwords() -> frozenset:
+    """Stopwords en español de NLTK más las propias del proyecto."""
+    return stopwords_es().union(custom_stopwords)
+
+
+def cargar_pretrained(clase, nombre: str):
+    """`clase.from_pretrained` desde HF_CACHE_DIR sin consultar el Hub.
+
+    Solo si no hay copia local (y MODELS_OFFLINE no está activo) se descarga el checkpoint.
+    """
+    try:
+        return clase.from_pretrained(nombre, cache_dir=HF_CACHE_DIR, local_files_only=True)
+    except OSError:
+        if MODELS_OFFLINE:
+            raise
+        print(f"⬇️ Descargando {nombre} a {HF_CACHE_DIR}")
+        logger.info(f"Descargando {nombre} a {HF_CACHE_DIR}")
+        return clase.from_pretrained(nombre, cache_dir=HF_CACHE_DIR)
+
+
+SENTIMENT_MODEL_NAME = "pysentimiento/robertuito-sentiment-analysis"
+EMBEDDING_MODEL_NAME = "pysentimiento/robertuito-base-uncased"
+
+SENTIMENT_LABELS = ["Negative", "Neutral", "Positive"]
+SENTIMIENTO_VACIO = ("Neutral", 0.0, 0.0, 0.0, 0.0)
+
+
+def tupla_sentimiento(probs) -> tuple:
+    """(label, score_label, score_negative, score_neutral, score_positive) a partir de las probabilidades."""
+    k = int(np.argmax(probs))
+    return SENTIMENT_LABELS[k], float(probs[k]), float(probs[0]), float(probs[1]), float(probs[2])
+
+
+def softmax_np(logits: np.ndarray) -> np.ndarray:
+    """Softmax por fila, numéricamente estable."""
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def mean_pooling(hidden: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+    """Promedio de los hidden states ignorando las posiciones de padding."""
+    mask = attention_mask.unsqueeze(-1).to(hidden.dtype)
+    return (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1.0)
+
+
+def batches_por_largo(largos, batch_size: int):
+    """Índices agrupados en batches de largo similar (orden creciente de tokens)."""
+    orden = np.argsort(largos, kind="stable")
+    return [orden[i:i + batch_size] for i in range(0, len(orden), batch_size)]
 
 
 class TweetPreprocessor:
-    def __init__(self, input_path):
+    def __init__(self, input_path, chunk_size: int = PREPROCESS_CHUNK_SIZE):
         self.input_path = input_path
-        self.tokenizer = AutoTokenizer.from_pretrained("pysentimiento/robertuito-sentiment-analysis")
-        self.sentiment_model = AutoModelForSequenceClassification.from_pretrained("pysentimiento/robertuito-sentiment-analysis")
-        self.embedding_tokenizer = AutoTokenizer.from_pretrained("pysentimiento/robertuito-base-uncased")
-        self.embedding_model = AutoModel.from_pretrained("pysentimiento/robertuito-base-uncased").to(torch.device("cpu"))
+        self.chunk_size = chunk_size
+        # Resumen diario de inferencias evitadas por casi duplicados (uno por chunk)
+        self.resumenes_duplicados = []
+        # Revisión (commit del Hub) de cada checkpoint, se completa al cargar el modelo o su config
+        self._revisiones = {}
+
+    # Tokenizers y modelos se cargan en el primer uso (ver cargar_pretrained)
+    @cached_property
+    def tokenizer(self):
+        from transformers import AutoTokenizer
+        return cargar_pretrained(AutoTokenizer, SENTIMENT_MODEL_NAME)
+
+    @cached_property
+    def sentiment_model(self):
+        from transformers import AutoModelForSequenceClassification
+        modelo = cargar_pretrained(AutoModelForSequenceClassification, SENTIMENT_MODEL_NAME)
+        self._revisiones[SENTIMENT_MODEL_NAME] = getattr(modelo.config, "_commit_hash", None)
+        # Backend de inferencia (INFERENCE_BACKEND): fp32, int8 dinámico u ONNX Runtime
+        return preparar_modelo(modelo, self.tokenizer, SENTIMENT_MODEL_NAME, "sentiment",
+                               revision=self._revisiones[SENTIMENT_MODEL_NAME])
+
+    @cached_property
+    def embedding_tokenizer(self):
+        from transformers import AutoTokenizer
+        return cargar_pretrained(AutoTokenizer, EMBEDDING_MODEL_NAME)
+
+    @cached_property
+    def embedding_model(self):
+        from transformers import AutoModel
+        modelo = cargar_pretrained(AutoModel, EMBEDDING_MODEL_NAME).to(torch.device("cpu"))
+        self._revisiones[EMBEDDING_MODEL_NAME] = getattr(modelo.config, "_commit_hash", None)
+        return preparar_modelo(modelo, self.embedding_tokenizer, EMBEDDING_MODEL_NAME, "encoder",
+                               revision=self._revisiones[EMBEDDING_MODEL_NAME])
+
+    def revision(self, nombre: str):
+        """Commit del checkpoint; si el modelo aún no se cargó basta con leer su config local."""
+        if nombre not in self._revisiones:
+            from transformers import AutoConfig
+            config = cargar_pretrained(AutoConfig, nombre)
+            self._revisiones[nombre] = getattr(config, "_commit_hash", None)
+        return self._revisiones[nombre]
+
+    def clean_texts(self, texts) -> pd.Series:
+        """Limpieza de una Serie completa (ver src/normalizacion.py); los descartados quedan en None."""
+        return normalizar_serie(texts, stopwords_set=get_stopwords())
 
     def clean_text(self, text):
         if pd.isna(text):
             return None
-        
-        #text detection se puede activar si quieres filtrar idioma
-        #try:
-        #    if detect(text) != "es":
-        #        return None
-        #except:
-        #    return None
-        
-        text = text.lower()
-        text = re.sub(r"http\S+|www\S+|https\S+", "", text)     # quitar links
-        text = re.sub(r"@\w+", "", text)                        # quitar menciones
-        text = re.sub(r"[^\w\sáéíóúñü]", "", text)              # mantener palabras y acentos
-        text = re.sub(r"\s+", " ", text).strip()
-
-        words = text.split()
-        words = [w for w in words if w not in stopwords_final]
-        words = [lemmatizer.lemmatize(w) for w in words]
-        if len(words) < 3 or len(words) > 50:
-            return None
-        return " ".join(words)
+        # El filtro de idioma se aplica por chunk en chunks_limpios (LANG_FILTER)
+        return self.clean_texts([text]).iloc[0]
+
+    def filtrar_idioma(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Descarta los tweets que no están en español (texto original, antes de limpiar)."""
+        from src.idioma import es_espanol
+        conservar = es_espanol(chunk["text"].astype(str))
+        rechazados = int((~conservar).sum())
+        if rechazados:
+            print(f"🌐 {rechazados} de {len(chunk)} tweets descartados por idioma")
+            logger.info(f"Filtro de idioma: {rechazados} de {len(chunk)} tweets descartados")
+        return chunk[conservar]
     
     def analyze_sentiment(self, text):
-        if not isinstance(text, str) or text.strip() == "":
-            return "Neutral", 0.0, 0.0, 0.0, 0.0
-        try:
-            encoded = self.tokenizer(text, return_tensors='pt')
-            output = self.sentiment_model(**encoded)
-            logits = output.logits.detach().numpy()
+        return self.analyze_sentiment_batch([text], progreso=False)[0]
 
-            if logits.shape[0] == 0:
-                raise ValueError("Output logits vacíos")
+    def _forward_sentimiento(self, encoded: dict, con_embeddings: bool = False):
+        """Un forward del modelo de sentimiento: (probabilidades, embeddings o None)."""
+        batch = self.tokenizer.pad(encoded, return_tensors="pt")
+        with torch.inference_mode():
+            output = self.sentiment_model(**batch, output_hidden_states=con_embeddings)
+            embeddings = None
+            if con_embeddings:
+                embeddings = mean_pooling(output.hidden_states[-1], batch["attention_mask"]).numpy()
+        return softmax_np(output.logits.numpy()), embeddings
 
-            scores = softmax(logits[0])
-            label_score = max(zip(["Negative", "Neutral", "Positive"], scores), key=lambda x: x[1])
-            return label_score[0], label_score[1], scores[0], scores[1], scores[2]
-        except Exception as e:
-            logger.warning(f"⚠️ Error en análisis de sentimiento: {e}")
-            return "Neutral", 0.0, 0.0, 0.0, 0.0
+    def _inferir_sentimiento(self, texts, batch_size: int, progreso: bool, con_embeddings: bool):
+        texts = list(texts)
+        resultados = [SENTIMIENTO_VACIO] * len(texts)
+        embeddings = np.zeros((len(texts), EMBEDDING_DIM), dtype=np.float32) if con_embeddings else None
+        validos = [i for i, t in enumerate(texts) if isinstance(t, str) and t.strip() != ""]
+        if not validos:
+            return resultados, embeddings
+
+        tokens = self.tokenizer([texts[i] for i in validos], truncation=True, max_length=SENTIMENT_MAX_LENGTH)
+        largos = [len(ids) for ids in tokens["input_ids"]]
+        probs = np.zeros((len(validos), len(SENTIMENT_LABELS)), dtype=np.float32)
+        posiciones = np.asarray(validos)
+
+        with tqdm(total=len(validos), desc="🔍 Analizando sentimiento", disable=not progreso) as pbar:
+            for idx in batches_por_largo(largos, batch_size):
+                encoded = {k: [tokens[k][j] for j in idx] for k in tokens.keys()}
+                try:
+                    probs[idx], vectores = self._forward_sentimiento(encoded, con_embeddings)
+                    if con_embeddings:
+                        embeddings[posiciones[idx]] = vectores
+                except Exception as e:
+                    logger.warning(f"⚠️ Error en análisis de sentimiento (batch de {len(idx)}): {e}")
+                    probs[idx] = np.nan
+                pbar.update(len(idx))
+
+        for j, i in enumerate(validos):
+            if not np.isnan(probs[j]).any():
+                resultados[i] = tupla_sentimiento(probs[j])
+        return resultados, embeddings
+
+    def analyze_sentiment_batch(self, texts, batch_size: int = INFERENCE_BATCH_SIZE, progreso: bool = True) -> list:
+        """Analiza el sentimiento de muchos textos en batches agrupados por largo.
+
+        Args:
+            texts: Lista o Serie de textos (los vacíos o no string reciben el resultado neutro).
+            batch_size: Textos por forward del modelo.
+            progreso: Muestra una barra de progreso con tqdm.
+
+        Returns:
+            list: Una tupla (label, score_label, score_negative, score_neutral, score_positive)
+            por texto, en el mismo orden de entrada.
+        """
+        return self._inferir_sentimiento(texts, batch_size, progreso, con_embeddings=False)[0]
+
+    def analyze_sentiment_y_embeddings(self, texts, batch_size: int = INFERENCE_BATCH_SIZE, progreso: bool = True):
+        """Sentimiento y embedding de cada texto con un único forward del modelo de sentimiento.
+
+        El embedding es el promedio (con máscara de atención) de la última capa oculta.
+
+        Returns:
+            tuple: (lista de tuplas como analyze_sentiment_batch, array (n, 768) float32).
+            Los textos vacíos reciben un vector de ceros.
+        """
+        return self._inferir_sentimiento(texts, batch_size, progreso, con_embeddings=True)
         
     def get_embedding(self, text):
         if isinstance(text, float) and pd.isna(text):
@@ -89,10 +228,259 @@ class TweetPreprocessor:
             logger.warning(f"⚠️ Error generando embedding: {e}")
             return np.zeros(768)
     
+    def inferir(self, texts, progreso: bool = True):
+        """Sentimiento y embedding de cada texto según EMBEDDING_SOURCE.
+
+        Returns:
+            tuple: (lista de tuplas de sentimiento, array (n, 768) float32 de embeddings).
+        """
+        texts = list(texts)
+        if EMBEDDING_SOURCE == "sentiment":
+            return self.analyze_sentiment_y_embeddings(texts, progreso=progreso)
+        resultados = self.analyze_sentiment_batch(texts, progreso=progreso)
+        embeddings = [self.get_embedding(t) for t in tqdm(texts, desc="🔗 Generando embeddings", disable=not progreso)]
+        return resultados, np.vstack(embeddings).astype(np.float32) if embeddings else np.zeros((0, EMBEDDING_DIM))
+
+    def clave_modelo(self) -> str:
+        """Identifica modelos, revisión y modo de inferencia (invalida la caché si cambian).
+
+        El backend es el que quedó en uso, no el configurado: si preparar_modelo volvió a
+        PyTorch (fallo o paridad fuera de tolerancia) sus resultados no se mezclan con los del
+        backend pedido. Con un backend distinto de torch esto obliga a cargar los modelos.
+        """
+        modelos = {SENTIMENT_MODEL_NAME: "sentiment_model"}
+        if EMBEDDING_SOURCE != "sentiment":
+            modelos[EMBEDDING_MODEL_NAME] = "embedding_model"
+        partes = []
+        for nombre, atributo in modelos.items():
+            backend = "torch" if INFERENCE_BACKEND == "torch" else backend_en_uso(getattr(self, atributo))
+            partes.append(f"{nombre}@{self.revision(nombre)}:{backend}")
+        return "|".join(partes + [EMBEDDING_SOURCE])
+
+    def abrir_cache(self):
+        """Caché de inferencia de los modelos actuales (None si INFERENCE_CACHE está apagado)."""
+        if not INFERENCE_CACHE:
+            return None
+        from src.cache_inferencia import InferenceCache
+        return InferenceCache(self.clave_modelo()).cargar()
+
+    def guardar_cache(self, cache) -> None:
+        if cache is None:
+            return
+        cache.guardar()
+        print(f"♻️ {cache.resumen()}")
+        logger.info(cache.resumen())
+
+    def inferir_pendientes(self, textos: list, cache=None, pool=None):
+        """Sentimiento + embeddings de los tweets nuevos, consultando la caché antes de inferir.
+
+        Los textos repetidos en la corrida (retweets, términos de búsqueda solapados) se infieren
+        una sola vez; con INFERENCE_CACHE también se reutilizan resultados de corridas anteriores.
+
+        Args:
+            cache: Caché ya abierta (la guarda quien la abrió); por defecto se abre y guarda aquí.
+            pool: Pool de procesos abierto con abrir_pool (solo con INFERENCE_WORKERS > 1).
+        """
+        textos = list(textos)
+        resultados = [SENTIMIENTO_VACIO] * len(textos)
+        embeddings = np.zeros((len(textos), EMBEDDING_DIM), dtype=np.float32)
+
+        propia = cache is None
+        if propia:
+            cache = self.abrir_cache()
+        pendientes = list(range(len(textos)))
+        if cache is not None:
+            hits, scores, vectores, pendientes = cache.buscar(textos)
+            for pos, probs, vector in zip(hits, scores, vectores):
+                resultados[pos] = tupla_sentimiento(probs)
+                embeddings[pos] = vector
+
+        unicos = list(dict.fromkeys(textos[i] for i in pendientes))
+        print(f"🧮 {len(unicos)} textos únicos a inferir ({len(textos)} tweets, {len(pendientes)} sin caché)")
+        if unicos:
+            if INFERENCE_WORKERS > 1:
+                # Reprocesos grandes: shards repartidos entre procesos (sentimiento + embeddings)
+                res_unicos, emb_unicos = inferir_en_paralelo(unicos, workers=INFERENCE_WORKERS, pool=pool)
+            else:
+                res_unicos, emb_unicos = self.inferir(unicos)
+            posicion = {t: k for k, t in enumerate(unicos)}
+            for i in pendientes:
+                k = posicion[textos[i]]
+                resultados[i] = res_unicos[k]
+                embeddings[i] = emb_unicos[k]
+
+            if cache is not None:
+                # No se guardan los textos cuyo batch falló (resultado neutro con scores en cero)
+                validos = [k for k, r in enumerate(res_unicos) if r != SENTIMIENTO_VACIO]
+                scores_nuevos = np.array([r[2:] for r in res_unicos], dtype=np.float32).reshape(-1, 3)
+                cache.agregar([unicos[k] for k in validos], scores_nuevos[validos], emb_unicos[validos])
+
+        if propia:
+            self.guardar_cache(cache)
+        return resultados, embeddings
+
+    # ========================
+    # 🧩 PIPELINE POR CHUNKS
+    # ========================
+    # Cada chunk de PREPROCESS_CHUNK_SIZE tweets pasa por limpieza → sentimiento → embeddings y se
+    # confirma antes de leer el siguiente: embeddings (store) → parte del chunk → entrada del ledger.
+    # En layout de un solo archivo cada chunk se escribe como una parte propia bajo el prefijo del
+    # ledger y todas se fusionan en processed_data una sola vez al final; en layout particionado
+    # el chunk se agrega directo (solo crea partes nuevas por día). La entrada del ledger de cada
+    # chunk guarda solo sus ids, más los descartados por idioma o limpieza (que también se marcan
+    # como procesados para no volver a filtrarlos); el flag "processed" del raw se escribe al
+    # final, después de la fusión, y recién entonces se borran partes y ledger. Todo deduplica por id, así que repetir
+    # un paso tras una caída no duplica filas.
+
+    def _prefijo_ledger(self) -> str:
+        nombre = str(self.input_path).strip("/").replace("/", "__")
+        return f"{PREPROCESS_LEDGER_PREFIX}{nombre}/"
+
+    def _blobs_ledger(self, sufijo: str) -> list:
+        return sorted(b for b in blobs_existentes(self._prefijo_ledger(), ttl=0) if b.endswith(sufijo))
+
+    def leer_ledger(self, clave: str = "ids") -> set:
+        """Ids confirmados (o descartados, con clave="descartados") por una corrida anterior que no
+        alcanzó a marcar el raw."""
+        ids = set()
+        for entrada in self._blobs_ledger(".json"):
+            ids.update(json.loads(read_bytes_blob(entrada)).get(clave, []))
+        return ids
+
+    def _registrar_en_ledger(self, ids, chunk: int, descartados=()) -> None:
+        """Entrada del ledger de un chunk: solo los ids nuevos de ese chunk y sus descartados."""
+        entrada = {
+            "input": str(self.input_path),
+            "chunk": chunk,
+            "ids": sorted(ids),
+            "descartados": sorted(descartados),
+            "updated_at": datetime.utcnow().isoformat(),
+        }
+        write_bytes_blob(json.dumps(entrada).encode("utf-8"), f"{self._prefijo_ledger()}chunk-{chunk:05d}.json",
+                         content_type="application/json")
+
+    def chunks_limpios(self, df_nuevos: pd.DataFrame, chunk_size: int = None):
+        """Genera (chunk limpio, ids descartados por idioma o limpieza) para los tweets pendientes."""
+        chunk_size = chunk_size or self.chunk_size
+        for inicio in range(0, len(df_nuevos), chunk_size):
+            chunk = df_nuevos.iloc[inicio:inicio + chunk_size].copy()
+            ids = set(chunk["id"].astype(str))
+            if LANG_FILTER:
+                chunk = self.filtrar_idioma(chunk)
+            chunk["text"] = self.clean_texts(chunk["text"].astype(str))
+            chunk = chunk.dropna(subset=["text"])
+            yield chunk, ids - set(chunk["id"].astype(str))
+
+    def procesar_chunk(self, chunk: pd.DataFrame, cache=None, pool=None):
+        """Sentimiento y embeddings de un chunk limpio.
+
+        Returns:
+            tuple: (DataFrame con las columnas de sentimiento, array (n, 768) float32).
+        """
+        textos = chunk["text"].tolist()
+        df_sentiment = chunk.copy()
+        if NEAR_DUP_DEDUP:
+            # Solo se infiere el representante de cada grupo de casi duplicados
+            from src.casi_duplicados import representantes, resumen_por_dia
+            reps = representantes(textos)
+            unicos, posicion = np.unique(reps, return_inverse=True)
+            res_reps, emb_reps = self.inferir_pendientes([textos[i] for i in unicos], cache=cache, pool=pool)
+            resultados = [res_reps[p] for p in posicion]
+            embeddings = emb_reps[posicion]
+            df_sentiment["dup_group"] = chunk["id"].astype(str).to_numpy()[reps]
+            self.resumenes_duplicados.append(resumen_por_dia(chunk["createdAt"], textos, reps))
+        else:
+            resultados, embeddings = self.inferir_pendientes(textos, cache=cache, pool=pool)
+        df_sentiment[["sentiment_label", "score_label", "score_negative", "score_neutral", "score_positive"]] = pd.DataFrame(resultados, index=chunk.index)
+        return df_sentiment.reset_index(drop=True), embeddings
+
+    def reportar_duplicados(self) -> pd.DataFrame:
+        """Imprime y registra las inferencias evitadas por día en la corrida."""
+        if not self.resumenes_duplicados:
+            return pd.DataFrame()
+        resumen = pd.concat(self.resumenes_duplicados).groupby("date", as_index=False).sum()
+        for fila in resumen.itertuples():
+            print(f"👯 {fila.date}: {fila.tweets} tweets, {fila.inferencias} inferidos, "
+                  f"{fila.ahorradas} inferencias ahorradas ({fila.tweets - fila.textos_unicos} duplicados exactos)")
+            logger.info(f"Casi duplicados {fila.date}: tweets={fila.tweets} inferencias={fila.inferencias} "
+                        f"ahorradas={fila.ahorradas} textos_unicos={fila.textos_unicos}")
+        return resumen
+
+    def _guardar_intermedio(self, df: pd.DataFrame, blob: str, primero: bool) -> None:
+        # El primer chunk de la corrida reemplaza el archivo; los siguientes se agregan
+        if primero:
+            write_csv_blob(df, blob)
+        else:
+            append_csv_blob(df, blob)
+
+    def confirmar_chunk(self, df_sentiment: pd.DataFrame, embeddings: np.ndarray, primero: bool = True,
+                        chunk: int = 1) -> None:
+        """Escribe un chunk (parte propia o partición de processed_data, y store de embeddings) de forma síncrona."""
+        if PREPROCESS_INTERMEDIATES:
+            self._guardar_intermedio(df_sentiment, SENTIMENT_DATA_PATH, primero)
+
+        if EMBEDDINGS_FORMAT == "store":
+            # Vectores binarios por día (memmap) en vez de 768 columnas de texto
+            from src.embeddings_store import EmbeddingStore
+            store = EmbeddingStore()
+            store.guardar(df_sentiment["id"], df_sentiment["createdAt"], embeddings)
+            df_processed = df_sentiment
+            logger.info(f"💾 {len(df_sentiment)} embeddings guardados en el store: {store.prefix}")
+        else:
+            robertuito_features = pd.DataFrame(embeddings, columns=[f"robertuito_{i}" for i in range(768)])
+            df_processed = pd.concat([df_sentiment, robertuito_features], axis=1)
+            if PREPROCESS_INTERMEDIATES:
+                self._guardar_intermedio(df_processed, EMBEDDING_DATA_PATH, primero)
+
+        if es_particionado(PROCESSED_DATA_PATH):
+            append_csv_blob(df_processed, PROCESSED_DATA_PATH, background=False)
+            logger.info(f"✅ {len(df_processed)} tweets agregados a {PROCESSED_DATA_PATH}")
+        else:
+            parte = f"{self._prefijo_ledger()}parte-{chunk:05d}.{PROCESSED_DATA_PATH.rsplit('.', 1)[-1]}"
+            write_csv_blob(df_processed, parte, background=False)
+            logger.info(f"✅ {len(df_processed)} tweets guardados en la parte {parte}")
+
+    def fusionar_partes(self) -> int:
+        """Agrega a processed_data, en una sola escritura, las partes de chunk pendientes."""
+        partes = self._blobs_ledger(f".{PROCESSED_DATA_PATH.rsplit('.', 1)[-1]}")
+        if not partes:
+            return 0
+        df_partes = pd.concat([read_csv_blob(p, schema="processed") for p in partes], ignore_index=True)
+        append_csv_blob(df_partes, PROCESSED_DATA_PATH, background=False)
+        logger.info(f"✅ {len(partes)} partes ({len(df_partes)} tweets) fusionadas en {PROCESSED_DATA_PATH}")
+        return len(df_partes)
+
+    def marcar_procesados(self, df_all: pd.DataFrame, confirmados: set, descartados=frozenset()) -> None:
+        """Fusiona las partes, actualiza el flag "processed" del raw y cierra el ledger.
+
+        Los descartados (idioma o limpieza) también quedan procesados: no llegan a processed_data,
+        pero tampoco vuelven a cargarse ni a filtrarse en la próxima corrida.
+        """
+        self.fusionar_partes()
+        # (en layout particionado df_all solo contiene los días pendientes, y solo esas particiones se reescriben)
+        print(f"Actualizando flag 'processed'")
+        df_all.loc[df_all["id"].astype(str).isin(set(confirmados) | set(descartados)), "processed"] = True
+        write_csv_blob(df_all, self.input_path, background=False)
+        for blob in self._blobs_ledger(""):
+            delete_blob(blob)
+        print(f"Tweets clasificados como 'processed' en {self.input_path}")
+        logger.info(f"📝 Flag 'processed' actualizado en {self.input_path} "
+                    f"({len(confirmados)} tweets, {len(descartados)} descartados)")
+
     def run_pipeline(self) -> bool:
         try:
-            df_all = read_csv_blob(self.input_path)
-            df_all["createdAt"] = pd.to_datetime(df_all["createdAt"], errors="coerce")
+            if es_particionado(self.input_path):
+                # Solo se cargan los días con tweets pendientes según el manifest (no el rango entre
+                # el más antiguo y el más nuevo: un día viejo pendiente no arrastra meses de datos)
+                from src.particiones import dias_pendientes, leer_particionado
+                pendientes = dias_pendientes(self.input_path)
+                if not pendientes:
+                    print("⏭️ No hay nuevos tweets para procesar.")
+                    logger.info("No hay nuevos tweets para procesar.")
+                    return False
+                df_all = leer_particionado(self.input_path, dias=pendientes, schema="raw")
+            else:
+                df_all = read_csv_blob(self.input_path, schema="raw")
         except FileNotFoundError:
             print(f"❌ No se encontró el archivo {self.input_path}.")
             logger.error(f"No se encontró el archivo {self.input_path}.")
@@ -101,72 +489,66 @@ class TweetPreprocessor:
         if "processed" not in df_all.columns:
             df_all["processed"] = False
 
-        df_nuevos = df_all[df_all["processed"] == False].copy()
-        if df_nuevos.empty:
+        # Tweets confirmados por una corrida interrumpida: ya están en processed_data
+        confirmados = self.leer_ledger()
+        descartados = self.leer_ledger("descartados")
+        if confirmados or descartados:
+            print(f"↩️ Retomando corrida anterior: {len(confirmados)} tweets ya confirmados en el ledger")
+            logger.info(f"Ledger con {len(confirmados)} tweets confirmados y {len(descartados)} descartados "
+                        f"de una corrida anterior")
+
+        df_nuevos = df_all[(df_all["processed"] == False) & ~df_all["id"].astype(str).isin(confirmados | descartados)]
+        if df_nuevos.empty and not (confirmados or descartados):
             print("⏭️ No hay nuevos tweets para procesar.")
             logger.info("No hay nuevos tweets para procesar.")
             return False
 
-        print(f"🔄 Procesando tweets ")
+        n_chunks = -(-len(df_nuevos) // self.chunk_size)
+        print(f"🔄 Procesando {len(df_nuevos)} tweets en {n_chunks} chunks de hasta {self.chunk_size}")
 
-        # === 1. Limpieza de texto ===
-        print(f"Comenzando limpieza de texto")
-        df_nuevos["text"] = df_nuevos["text"].astype(str).apply(self.clean_text)
-        df_nuevos = df_nuevos.dropna(subset=["text"])
-        if df_nuevos.empty:
+        self.resumenes_duplicados = []
+        # Las partes y entradas de una corrida interrumpida se conservan: se numera a continuación
+        previos = len(self._blobs_ledger(".json"))
+        cache = self.abrir_cache()
+        pool = abrir_pool() if INFERENCE_WORKERS > 1 and n_chunks else None
+        confirmados_corrida = 0
+        try:
+            for k, (chunk, descartados_chunk) in enumerate(self.chunks_limpios(df_nuevos), start=1):
+                descartados.update(descartados_chunk)
+                if chunk.empty:
+                    self._registrar_en_ledger((), previos + k, descartados_chunk)
+                    print(f"⏭️ Chunk {k}/{n_chunks}: todos los tweets descartados tras limpieza")
+                    continue
+                if PREPROCESS_INTERMEDIATES:
+                    self._guardar_intermedio(chunk, PREPROCESSED_PATH, confirmados_corrida == 0)
+
+                df_sentiment, embeddings = self.procesar_chunk(chunk, cache=cache, pool=pool)
+                self.confirmar_chunk(df_sentiment, embeddings, primero=confirmados_corrida == 0, chunk=previos + k)
+                ids_chunk = set(chunk["id"].astype(str))
+                confirmados.update(ids_chunk)
+                confirmados_corrida += len(chunk)
+                self._registrar_en_ledger(ids_chunk, previos + k, descartados_chunk)
+                print(f"🧩 Chunk {k}/{n_chunks}: {len(chunk)} tweets confirmados")
+                logger.info(f"Chunk {k}/{n_chunks} confirmado ({len(chunk)} tweets)")
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            self.guardar_cache(cache)
+            self.reportar_duplicados()
+
+        if not confirmados:
             print("⏭️ Todos los tweets fueron descartados tras limpieza.")
             logger.info("Todos los tweets fueron descartados tras limpieza.")
+            if descartados:
+                self.marcar_procesados(df_all, confirmados, descartados)
             return False
 
-        write_csv_blob(df_nuevos, PREPROCESSED_PATH)
-        print(f"💾 Guardado texto limpio en: {PREPROCESSED_PATH}")
-        logger.info(f"💾 Texto limpio guardado en: {PREPROCESSED_PATH}")
-
-        # === 2. Análisis de sentimiento ===
-        print(f"Comenzando análisis de sentimiento de los tweets limpios")
-        tqdm.pandas(desc="🔍 Analizando sentimiento")
-        resultados = df_nuevos["text"].progress_apply(self.analyze_sentiment)
-
-        df_sentiment = df_nuevos.copy()
-        df_sentiment[["sentiment_label", "score_label", "score_negative", "score_neutral", "score_positive"]] = pd.DataFrame(resultados.tolist(), index=df_nuevos.index)
-
-        write_csv_blob(df_sentiment, SENTIMENT_DATA_PATH)
-        print(f"💾 Guardado análisis de sentimiento en: {SENTIMENT_DATA_PATH}")
-        logger.info(f"💾 Sentimiento guardado en: {SENTIMENT_DATA_PATH}")
-
-        # === 3. Embeddings ===
-        print(f"Comenzando embedding de los tweets")
-        tqdm.pandas(desc="🔗 Generando embeddings")
-        embeddings_list = df_sentiment["text"].progress_apply(self.get_embedding).tolist()
-        robertuito_features = pd.DataFrame(embeddings_list, columns=[f"robertuito_{i}" for i in range(768)])
-
-        df_embedding = df_sentiment.reset_index(drop=True)
-        df_embedding_final = pd.concat([df_embedding, robertuito_features], axis=1)
-
-        write_csv_blob(df_embedding_final, EMBEDDING_DATA_PATH)
-        print(f"💾 Embeddings guardados en: {EMBEDDING_DATA_PATH}")
-        logger.info(f"💾 Embeddings guardados en: {EMBEDDING_DATA_PATH}")
-
-        # === 4. Guardar todo en processed_data.csv
-        print(f"Guardando nuevos tweets en {PROCESSED_DATA_PATH}")
-        df_processed = df_embedding_final.copy()
-        df_processed["id"] = df_processed["id"].astype(str)
-
-        append_csv_blob(df_processed, PROCESSED_DATA_PATH)
-        print(f"✅ Archivo final actualizado en: {PROCESSED_DATA_PATH}")
+        print(f"✅ Archivo final actualizado en: {PROCESSED_DATA_PATH} ({confirmados_corrida} tweets nuevos)")
         logger.info(f"✅ Archivo final actualizado en: {PROCESSED_DATA_PATH}")
-
-        # === 5. Actualizar raw_data con flag "processed"
-        print(f"Actualizando flag 'processed'")
-        df_all.loc[df_all["id"].isin(df_nuevos["id"]), "processed"] = True
-        write_csv_blob(df_all, self.input_path)
-        print(f"Tweets clasificados como 'processed' en {self.input_path}")
-        logger.info(f"📝 Flag 'processed' actualizado en {self.input_path}")
-
+        self.marcar_procesados(df_all, confirmados, descartados)
         return True
 
 
-
 if __name__ == "__main__":
     preprocessor = TweetPreprocessor(input_path=RAW_DATA_PATH)
     preprocessor.run_pipeline()
@@ -0,0 +1,80 @@
+from io import BytesIO
+
+import numpy as np
+
+from src.azure_blob import read_bytes_blob, write_bytes_blob
+from src.config import EMBEDDING_PROJECTION_DIMS, EMBEDDING_PROJECTION_SEED, EMBEDDING_PROJECTION_BLOB
+from src.logger import get_logger
+
+logger = get_logger(__name__, "features.log")
+
+METODOS = ("pca", "random")
+
+# Reducción de las medias diarias de embeddings (768 dims) a un bloque compacto:
+#   - "pca": componentes principales de las medias diarias disponibles al ajustar
+#   - "random": matriz gaussiana con semilla fija, N(0, 1/dims) (Johnson-Lindenstrauss)
+# En ambos casos se centra con la media de los datos de ajuste. Se ajusta una sola vez y se
+# guarda como .npz (sin pickle) junto a los modelos, para que entrenamiento, corridas diarias
+# e incrementales usen siempre la misma proyección.
+
+
+class ProyeccionEmbeddings:
+    def __init__(self, metodo: str, media: np.ndarray, componentes: np.ndarray):
+        self.metodo = metodo
+        self.media = media
+        self.componentes = componentes
+
+    @property
+    def dims(self) -> int:
+        return self.componentes.shape[0]
+
+    @classmethod
+    def ajustar(cls, medias_diarias, metodo: str, dims: int = EMBEDDING_PROJECTION_DIMS,
+                seed: int = EMBEDDING_PROJECTION_SEED) -> "ProyeccionEmbeddings":
+        """Ajusta la proyección sobre una matriz (días, 768) de medias diarias.
+
+        Las filas con NaN (días sin embeddings) se ignoran. PCA necesita más días que
+        dimensiones; si no los hay se usa la proyección aleatoria.
+        """
+        if metodo not in METODOS:
+            raise ValueError(f"Método de proyección desconocido: {metodo} (opciones: {METODOS})")
+        X = np.asarray(medias_diarias, dtype="float64")
+        X = X[~np.isnan(X).any(axis=1)]
+        media = X.mean(axis=0) if len(X) else np.zeros(X.shape[1])
+
+        if metodo == "pca" and len(X) <= dims:
+            logger.warning(f"⚠️ PCA necesita más de {dims} días con embeddings ({len(X)}); se usa proyección aleatoria")
+            metodo = "random"
+
+        if metodo == "pca":
+            _, _, vt = np.linalg.svd(X - media, full_matrices=False)
+            componentes = vt[:dims]
+            # Signo determinista: la carga de mayor magnitud de cada componente es positiva
+            signos = np.sign(componentes[np.arange(dims), np.abs(componentes).argmax(axis=1)])
+            componentes = componentes * signos[:, None]
+        else:
+            rng = np.random.default_rng(seed)
+            componentes = rng.normal(0.0, 1.0 / np.sqrt(dims), size=(dims, X.shape[1]))
+
+        logger.info(f"Proyección de embeddings ajustada: {metodo}, {X.shape[1]} → {dims} dims con {len(X)} días")
+        return cls(metodo, media, componentes)
+
+    def transformar(self, medias_diarias) -> np.ndarray:
+        """(días, 768) → (días, dims). Los días sin embeddings (NaN) quedan en NaN."""
+        X = np.asarray(medias_diarias, dtype="float64")
+        return (X - self.media) @ self.componentes.T
+
+    def guardar(self, blob_name: str = EMBEDDING_PROJECTION_BLOB) -> None:
+        buffer = BytesIO()
+        np.savez(buffer, metodo=np.array(self.metodo), media=self.media, componentes=self.componentes)
+        write_bytes_blob(buffer.getvalue(), blob_name)
+        logger.info(f"💾 Proyección de embeddings guardada en {blob_name}")
+
+    @classmethod
+    def cargar(cls, blob_name: str = EMBEDDING_PROJECTION_BLOB):
+        """Proyección guardada, o None si todavía no se ajustó ninguna."""
+        try:
+            data = np.load(BytesIO(read_bytes_blob(blob_name)), allow_pickle=False)
+        except FileNotFoundError:
+            return None
+        return cls(str(data["metodo"]), data["media"], data["componentes"])
@@ -0,0 +1,130 @@
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import pandas as pd
+
+from src.config import EMBEDDING_PROJECTION_DIMS
+from src.logger import get_logger
+
+logger = get_logger(__name__, "features.log")
+
+# ========================
+# 🗂️ REGISTRO DECLARATIVO DE FEATURES
+# ========================
+# Cada columna de features_dataset se declara con sus dependencias:
+#   - base: salen de la agregación diaria de FeatureEngineer (medias, ponderadas, embeddings,
+#     encuestas) y no tienen función de cálculo
+#   - derivadas: se calculan sobre las filas diarias a partir de sus dependencias
+# El orden de registro es topológico (una dependencia siempre se registra antes) y es el orden
+# de las columnas en el dataset. Con cierre() se obtiene todo lo que necesita un conjunto de
+# features, p. ej. las `feature_names` de los modelos desplegados.
+
+ENGAGEMENT_VARS = ["retweetCount", "replyCount", "likeCount", "quoteCount"]
+SCORE_COLS = ["score_positive", "score_negative", "score_neutral"]
+EMBEDDING_COLS = [f"robertuito_{i}" for i in range(768)]
+# Bloque reducido de embeddings (ver src/proyeccion_embeddings.py)
+EMBEDDING_PROY_COLS = [f"embedding_proy_{i}" for i in range(EMBEDDING_PROJECTION_DIMS)]
+WEIGHTED_COLS = [
+    f"weighted_{col.replace('score_', '')}_{var}" for var in ENGAGEMENT_VARS for col in SCORE_COLS
+]
+TARGET_COLS = ["aprobacion_boric", "desaprobacion_boric"]
+# Columnas que se escriben siempre: objetivos de entrenamiento y las que lee metricas.py
+FEATURES_SIEMPRE = ["score_negative"] + TARGET_COLS
+
+
+@dataclass(frozen=True)
+class Feature:
+    nombre: str
+    dependencias: tuple = ()
+    calcular: Optional[Callable[[pd.DataFrame], pd.Series]] = None
+
+    @property
+    def es_base(self) -> bool:
+        return self.calcular is None
+
+
+REGISTRO = {}
+
+
+def registrar(nombre: str, dependencias=(), calcular=None) -> Feature:
+    """Agrega una feature al registro (sus dependencias deben estar registradas antes)."""
+    faltantes = [d for d in dependencias if d not in REGISTRO]
+    if faltantes:
+        raise ValueError(f"Dependencias no registradas para {nombre}: {faltantes}")
+    REGISTRO[nombre] = Feature(nombre, tuple(dependencias), calcular)
+    return REGISTRO[nombre]
+
+
+def _lag(col: str, dias: int):
+    return lambda df: df[col].shift(dias)
+
+
+def _rolling(col: str, ventana: int):
+    return lambda df: df[col].rolling(window=ventana, min_periods=ventana).mean()
+
+
+def _rolling_semana_previa(col: str):
+    # Encuesta de los 7 días anteriores, arrastrando el último valor conocido
+    return lambda df: df[col].shift(1).rolling(window=7, min_periods=7).mean().ffill()
+
+
+# === Base ===
+for _col in SCORE_COLS + ENGAGEMENT_VARS + EMBEDDING_COLS + EMBEDDING_PROY_COLS + WEIGHTED_COLS + TARGET_COLS:
+    registrar(_col)
+
+# === Derivadas ===
+registrar("approval_rolling_7d", ["aprobacion_boric"], _rolling_semana_previa("aprobacion_boric"))
+registrar("approval_lag_7d", ["aprobacion_boric"], _lag("aprobacion_boric", 7))
+registrar("approval_lag_14d", ["aprobacion_boric"], _lag("aprobacion_boric", 14))
+
+registrar("disapproval_rolling_7d", ["desaprobacion_boric"], _rolling_semana_previa("desaprobacion_boric"))
+registrar("disapproval_lag_7d", ["desaprobacion_boric"], _lag("desaprobacion_boric", 7))
+registrar("disapproval_lag_14d", ["desaprobacion_boric"], _lag("desaprobacion_boric", 14))
+
+for _lag_dias in range(1, 8):
+    for _col in ("score_positive", "score_negative", "score_neutral"):
+        registrar(f"{_col}_lag_{_lag_dias}", [_col], _lag(_col, _lag_dias))
+
+registrar("score_negative_rolling7", ["score_negative"], _rolling("score_negative", 7))
+registrar("score_negative_rolling3", ["score_negative"], _rolling("score_negative", 3))
+
+registrar("sentiment_net", ["score_positive", "score_negative"],
+          lambda df: df["score_positive"] - df["score_negative"])
+registrar("sentiment_net_rolling3", ["sentiment_net"], _rolling("sentiment_net", 3))
+registrar("sentiment_net_rolling7", ["sentiment_net"], _rolling("sentiment_net", 7))
+registrar("sentiment_net_rolling14", ["sentiment_net"], _rolling("sentiment_net", 14))
+registrar("sentiment_net_change", ["sentiment_net"],
+          lambda df: df["sentiment_net"] - df["sentiment_net"].shift(1))
+
+
+def cierre(nombres) -> set:
+    """Las features pedidas más todas sus dependencias (transitivas).
+
+    Los nombres que no están en el registro se ignoran con un warning.
+    """
+    resultado = set()
+    pendientes = list(nombres)
+    while pendientes:
+        nombre = pendientes.pop()
+        if nombre in resultado:
+            continue
+        if nombre not in REGISTRO:
+            logger.warning(f"⚠️ Feature no registrada, se ignora: {nombre}")
+            continue
+        resultado.add(nombre)
+        pendientes.extend(REGISTRO[nombre].dependencias)
+    return resultado
+
+
+def calcular_derivadas(df_daily: pd.DataFrame, requeridas=None) -> pd.DataFrame:
+    """Calcula, en orden de registro, las features derivadas (todas, o solo las requeridas).
+
+    Args:
+        df_daily: Filas diarias ordenadas por fecha con las columnas base necesarias.
+        requeridas: Conjunto ya cerrado con cierre(); None calcula todas.
+    """
+    for feature in REGISTRO.values():
+        if feature.es_base or (requeridas is not None and feature.nombre not in requeridas):
+            continue
+        df_daily[feature.nombre] = feature.calcular(df_daily)
+    return df_daily
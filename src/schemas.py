@@ -0,0 +1,144 @@
+import pandas as pd
+
+from src.config import (
+    RAW_DATA_PATH,
+    PREPROCESSED_PATH,
+    SENTIMENT_DATA_PATH,
+    PROCESSED_DATA_PATH,
+    EMBEDDING_DATA_PATH,
+    FEATURES_DATASET_PATH,
+    PREDICTIONS_PATH,
+    ENCUESTAS_PATH,
+    EMBEDDING_DIM,
+)
+
+# ========================
+# 📐 REGISTRO DE SCHEMAS
+# ========================
+# Tipos lógicos:
+#   "id"          → texto (string de pandas); los ids de tweet nunca se leen como números
+#   "datetime"    → datetime64 sin zona horaria
+#   "datetime_utc"→ datetime64 con zona UTC (createdAt)
+#   "flag"        → bool (NaN = False)
+#   "count"       → Int32 (entero con nulos)
+#   "float32", "category", "string" → dtype de pandas homónimo
+# Las columnas que no figuran en el schema se dejan como las infiere pandas.
+
+_ENGAGEMENT = {col: "count" for col in ["retweetCount", "replyCount", "likeCount", "quoteCount"]}
+_SCORES = {col: "float32" for col in ["score_label", "score_negative", "score_neutral", "score_positive"]}
+_EMBEDDINGS = {f"robertuito_{i}": "float32" for i in range(EMBEDDING_DIM)}
+
+SCHEMAS = {
+    "raw": {
+        "id": "id",
+        "createdAt": "datetime_utc",
+        "date": "datetime",
+        "text": "string",
+        "processed": "flag",
+        **_ENGAGEMENT,
+    },
+    "processed": {
+        "id": "id",
+        "createdAt": "datetime_utc",
+        "date": "datetime",
+        "text": "string",
+        "processed": "flag",
+        "sentiment_label": "category",
+        "dup_group": "id",
+        **_ENGAGEMENT,
+        **_SCORES,
+        **_EMBEDDINGS,
+    },
+    "features": {
+        "date": "datetime",
+        "score_positive": "float32",
+        "score_negative": "float32",
+        "score_neutral": "float32",
+        **_EMBEDDINGS,
+    },
+    "predictions": {
+        "date": "datetime",
+        "prediccion_aprobacion": "float32",
+        "prediccion_desaprobacion": "float32",
+        "indice_negatividad": "float32",
+        "porcentaje_tweets_negativos": "float32",
+        "tweets_positivos": "count",
+        "tweets_negativos": "count",
+        "tweets_neutros": "count",
+        "total_tweets": "count",
+    },
+    "encuestas": {
+        "date": "datetime",
+        "aprobacion_boric": "float32",
+        "desaprobacion_boric": "float32",
+    },
+}
+
+# Blob (o prefijo particionado) → schema
+SCHEMA_POR_BLOB = {
+    RAW_DATA_PATH: "raw",
+    PREPROCESSED_PATH: "raw",
+    SENTIMENT_DATA_PATH: "processed",
+    PROCESSED_DATA_PATH: "processed",
+    EMBEDDING_DATA_PATH: "processed",
+    FEATURES_DATASET_PATH: "features",
+    PREDICTIONS_PATH: "predictions",
+    ENCUESTAS_PATH: "encuestas",
+}
+
+# Tipos que read_csv puede aplicar directamente durante el parseo
+_TIPOS_PARSEO = {"id": "string", "string": "string", "float32": "float32", "category": "category"}
+
+
+def schema_para_blob(blob_name: str):
+    """Nombre del schema registrado para un blob (incluye partes de datasets particionados)."""
+    for ruta, nombre in SCHEMA_POR_BLOB.items():
+        if blob_name == ruta or (ruta.endswith("/") and str(blob_name).startswith(ruta)):
+            return nombre
+    return None
+
+
+def dtypes_de_parseo(nombre: str) -> dict:
+    """Mapa columna → dtype para pasar a pd.read_csv(dtype=...)."""
+    if nombre is None:
+        return {}
+    return {col: _TIPOS_PARSEO[tipo] for col, tipo in SCHEMAS[nombre].items() if tipo in _TIPOS_PARSEO}
+
+
+def _convertir(serie: pd.Series, tipo: str) -> pd.Series:
+    if tipo == "datetime":
+        serie = pd.to_datetime(serie, errors="coerce")
+        return serie.dt.tz_localize(None) if serie.dt.tz is not None else serie
+    if tipo == "datetime_utc":
+        return pd.to_datetime(serie, errors="coerce", utc=True)
+    if tipo == "flag":
+        valores = serie.map({True: True, False: False, "True": True, "False": False, 1: True, 0: False})
+        return valores.fillna(False).astype(bool)
+    if tipo == "count":
+        return pd.to_numeric(serie, errors="coerce").round().astype("Int32")
+    if tipo == "id":
+        return serie.astype("string")
+    return serie.astype(tipo)
+
+
+def aplicar_schema(df: pd.DataFrame, nombre: str) -> pd.DataFrame:
+    """Devuelve `df` con los dtypes compactos del schema `nombre` (no modifica el original)."""
+    if nombre is None or df is None:
+        return df
+    schema = SCHEMAS[nombre]
+    df = df.copy(deep=False)
+
+    # Los float32 se convierten en bloque (las 768 columnas de embeddings de una sola vez)
+    floats = [c for c in df.columns if schema.get(c) == "float32" and df[c].dtype != "float32"]
+    if floats:
+        df[floats] = df[floats].apply(pd.to_numeric, errors="coerce").astype("float32")
+
+    for col in df.columns:
+        tipo = schema.get(col)
+        if tipo is None or tipo == "float32":
+            continue
+        try:
+            df[col] = _convertir(df[col], tipo)
+        except (TypeError, ValueError):
+            pass  # se conserva el tipo inferido si la columna trae valores inesperados
+    return df
@@ -3,7 +3,7 @@ from datetime import datetime, timedelta
 from apify_client import ApifyClient
 from src.config import APIFY_API_KEY, RAW_DATA_PATH
 from src.logger import get_logger
-from src.azure_blob import read_csv_blob, write_csv_blob
+from src.azure_blob import read_csv_blob, write_csv_blob, append_csv_blob, es_particionado
 
 logger = get_logger(__name__, "scraping.log")
 
@@ -17,11 +17,22 @@ class TweetScraper:
 
         nuevos_tweets = False  # <--- Flag para saber si hay novedades
 
+        particionado = es_particionado(RAW_DATA_PATH)
+        nuevos_por_dia = []
+
         try:
             logger.info("📂 Buscando raw_data con tweets...")
-            df_existing = read_csv_blob(RAW_DATA_PATH)
-            df_existing["createdAt"] = pd.to_datetime(df_existing["createdAt"], errors="coerce")
-            df_existing["date"] = pd.to_datetime(df_existing["createdAt"], errors="coerce").dt.date
+            if particionado:
+                # Solo se consulta el manifest: no hace falta descargar el histórico
+                from src.particiones import ultima_fecha
+                ultimo = ultima_fecha(RAW_DATA_PATH)
+                if ultimo is None:
+                    raise FileNotFoundError(RAW_DATA_PATH)
+                df_existing = pd.DataFrame({"date": [ultimo]})
+            else:
+                df_existing = read_csv_blob(RAW_DATA_PATH)
+                df_existing["createdAt"] = pd.to_datetime(df_existing["createdAt"], errors="coerce")
+                df_existing["date"] = pd.to_datetime(df_existing["createdAt"], errors="coerce").dt.date
             logger.info(f"✅ Base cargada con éxito.")
         except FileNotFoundError:
             df_existing = pd.DataFrame(columns=["id", "createdAt", "text"])
@@ -66,7 +77,10 @@ class TweetScraper:
                 df_nuevos["date"] = pd.to_datetime(df_nuevos["createdAt"].dt.date)
                 df_nuevos["processed"] = False
 
-                df_existing = pd.concat([df_existing, df_nuevos], ignore_index=True).drop_duplicates(subset=["id"])
+                if particionado:
+                    nuevos_por_dia.append(df_nuevos)
+                else:
+                    df_existing = pd.concat([df_existing, df_nuevos], ignore_index=True).drop_duplicates(subset=["id"])
                 nuevos_tweets = True  # <--- Se encontraron tweets nuevos
                 print((f"✅ {len(df_nuevos)} tweets agregados para {dia}."))
                 logger.info(f"✅ {len(df_nuevos)} tweets agregados para {dia}.")
@@ -74,7 +88,12 @@ class TweetScraper:
                 print((f"❌ Error al scrapear para {dia}: {e}"))
                 logger.error(f"❌ Error al scrapear para {dia}: {e}")
 
-        if nuevos_tweets:
+        if nuevos_tweets and particionado:
+            df_append = pd.concat(nuevos_por_dia, ignore_index=True).drop_duplicates(subset=["id"])
+            append_csv_blob(df_append, RAW_DATA_PATH)
+            logger.info(f"💾 {len(df_append)} registros agregados a {RAW_DATA_PATH}.")
+            print(("Scraping finalizado y guardado."))
+        elif nuevos_tweets:
             print((f"Guardando nuevos tweets"))
             print(df_existing.tail())
             write_csv_blob(df_existing, RAW_DATA_PATH)
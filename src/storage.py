@@ -0,0 +1,739 @@
+import io
+import os
+import base64
+import hashlib
+import zlib
+from io import BytesIO
+from pathlib import Path
+from collections import deque
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from src.config import DATA_DIR
+
+load_dotenv()
+
+# Backend de almacenamiento: "azure" (por defecto) o "local" (carpeta en disco, útil offline)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "azure")
+LOCAL_STORAGE_DIR = Path(os.getenv("LOCAL_STORAGE_DIR", DATA_DIR / "storage"))
+
+AZURE_BLOB_CONTAINER = os.getenv("AZURE_BLOB_CONTAINER", "data")
+
+# Parquet: filas por row group (las estadísticas min/max de "date" permiten saltar días)
+PARQUET_ROW_GROUP_SIZE = int(os.getenv("PARQUET_ROW_GROUP_SIZE", "5000"))
+
+# Transferencias en streaming: tamaño de rango/bloque y descargas/subidas simultáneas
+STREAMING_TRANSFERS = os.getenv("STREAMING_TRANSFERS", "0") == "1"
+TRANSFER_CHUNK_SIZE = int(float(os.getenv("TRANSFER_CHUNK_MB", "8")) * 1024 * 1024)
+TRANSFER_MAX_CONCURRENCY = int(os.getenv("TRANSFER_MAX_CONCURRENCY", "4"))
+# Filas serializadas por tramo al subir en streaming
+STREAMING_ROWS_PER_PART = int(os.getenv("STREAMING_ROWS_PER_PART", "20000"))
+
+# Compresión de transferencias CSV: "none" (por defecto), "gzip" o "zstd" (requiere `zstandard`).
+# BLOB_COMPRESSION_POLICY permite excepciones por blob: "processed_data.csv=zstd,encuestas.csv=none"
+BLOB_COMPRESSION = os.getenv("BLOB_COMPRESSION", "none")
+BLOB_COMPRESSION_POLICY = os.getenv("BLOB_COMPRESSION_POLICY", "")
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+ZSTD_LEVEL = int(os.getenv("ZSTD_LEVEL", "3"))
+
+
+# ========================
+# 📄 FORMATOS (CSV / Parquet)
+# ========================
+
+def es_parquet(blob_name: str) -> bool:
+    """Indica si el blob usa el formato columnar Parquet (según su extensión)."""
+    return str(blob_name).endswith(".parquet")
+
+
+def _sin_tz(valor) -> pd.Timestamp:
+    ts = pd.Timestamp(valor)
+    return ts.tz_localize(None) if ts.tzinfo is not None else ts
+
+
+def row_groups_en_rango(parquet_file, date_range):
+    """Selecciona los row groups cuyas estadísticas de "date" intersectan el rango pedido."""
+    todos = list(range(parquet_file.num_row_groups))
+    if date_range is None or "date" not in parquet_file.schema_arrow.names:
+        return todos
+
+    idx_date = parquet_file.schema_arrow.get_field_index("date")
+    desde = pd.Timestamp(date_range[0]) if date_range[0] is not None else None
+    hasta = pd.Timestamp(date_range[1]) if date_range[1] is not None else None
+
+    seleccionados = []
+    for i in todos:
+        stats = parquet_file.metadata.row_group(i).column(idx_date).statistics
+        if stats is None or not stats.has_min_max:
+            seleccionados.append(i)
+            continue
+        rg_min, rg_max = _sin_tz(stats.min), _sin_tz(stats.max)
+        if (hasta is not None and rg_min > hasta) or (desde is not None and rg_max < desde):
+            continue
+        seleccionados.append(i)
+    return seleccionados
+
+
+def filtrar_fechas(df: pd.DataFrame, date_range) -> pd.DataFrame:
+    """Aplica el rango de fechas (inclusivo) sobre la columna "date" ya parseada."""
+    if date_range is None or "date" not in df.columns:
+        return df
+    desde, hasta = date_range
+    fechas = df["date"].dt.tz_localize(None) if df["date"].dt.tz is not None else df["date"]
+    mask = pd.Series(True, index=df.index)
+    if desde is not None:
+        mask &= fechas >= pd.Timestamp(desde)
+    if hasta is not None:
+        mask &= fechas <= pd.Timestamp(hasta)
+    return df[mask].reset_index(drop=True)
+
+
+def leer_parquet(fuente, columns=None, date_range=None) -> pd.DataFrame:
+    """Lee un Parquet (ruta, archivo o memory map) aplicando proyección y poda de row groups."""
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(fuente)
+    row_groups = row_groups_en_rango(parquet_file, date_range)
+    table = parquet_file.read_row_groups(row_groups, columns=columns)
+    print(f"📦 Row groups leídos: {len(row_groups)}/{parquet_file.num_row_groups}")
+    return table.to_pandas()
+
+
+def leer_csv(fuente, columns=None, memory_map=False, dtype=None) -> pd.DataFrame:
+    """Parsea un CSV (ruta o buffer) con la misma convención de fechas del pipeline.
+
+    `dtype` (columna → tipo) se aplica durante el parseo; las columnas ausentes se ignoran.
+    """
+    if columns is None:
+        return pd.read_csv(fuente, low_memory=False, parse_dates=["date"], memory_map=memory_map, dtype=dtype)
+    # Proyección tolerante: columnas ausentes en el CSV se ignoran
+    return pd.read_csv(fuente, low_memory=False, usecols=lambda c: c in columns, memory_map=memory_map,
+                       dtype=dtype)
+
+
+def iter_csv(fuente, filas: int, columns=None, dtype=None):
+    """Como leer_csv, pero parsea el CSV en bloques de `filas` filas (iterador de DataFrames)."""
+    if columns is None:
+        return pd.read_csv(fuente, low_memory=False, parse_dates=["date"], dtype=dtype, chunksize=filas)
+    return pd.read_csv(fuente, low_memory=False, usecols=lambda c: c in columns, dtype=dtype, chunksize=filas)
+
+
+def iter_parquet(fuente, filas: int, columns=None):
+    """Lee un Parquet en lotes de hasta `filas` filas, sin materializar la tabla completa."""
+    import pyarrow.parquet as pq
+
+    for lote in pq.ParquetFile(fuente).iter_batches(batch_size=filas, columns=columns):
+        yield lote.to_pandas()
+
+
+def normalizar_objetos(df: pd.DataFrame) -> pd.DataFrame:
+    """Convierte a texto las columnas object con tipos mezclados (ids int/str, dicts de Apify).
+
+    En CSV esto ocurre implícitamente; Parquet exige un tipo único por columna.
+    """
+    df = df.copy(deep=False)
+    for col in df.columns[df.dtypes == object]:
+        no_nulos = df[col].dropna()
+        if not no_nulos.map(lambda v: isinstance(v, str)).all():
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+
+def serializar(df: pd.DataFrame, blob_name: str) -> BytesIO:
+    """Serializa el DataFrame en el formato que indica la extensión del blob."""
+    buffer = BytesIO()
+    if es_parquet(blob_name):
+        # Ordenar por fecha para que cada row group cubra un rango acotado de días
+        if "date" in df.columns:
+            df = df.sort_values("date", kind="stable")
+        normalizar_objetos(df).to_parquet(buffer, index=False, row_group_size=PARQUET_ROW_GROUP_SIZE)
+    else:
+        df.to_csv(buffer, index=False)
+    buffer.seek(0)
+    return buffer
+
+
+class _SinkBuffer(io.RawIOBase):
+    """Destino de escritura en memoria que se vacía por tramos (para ParquetWriter)."""
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._buf += b
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self):
+        return self._pos
+
+    def drain(self) -> bytes:
+        data = bytes(self._buf)
+        self._buf.clear()
+        return data
+
+
+def _tramos_serializados(df: pd.DataFrame, blob_name: str, filas: int):
+    """Serializa el DataFrame por tramos de `filas` filas, sin armar el archivo completo."""
+    if es_parquet(blob_name):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if "date" in df.columns:
+            df = df.sort_values("date", kind="stable")
+        table = pa.Table.from_pandas(normalizar_objetos(df), preserve_index=False)
+        sink = _SinkBuffer()
+        with pq.ParquetWriter(sink, table.schema) as writer:
+            for inicio in range(0, max(table.num_rows, 1), filas):
+                writer.write_table(table.slice(inicio, filas), row_group_size=PARQUET_ROW_GROUP_SIZE)
+                yield sink.drain()
+        yield sink.drain()
+    else:
+        for inicio in range(0, max(len(df), 1), filas):
+            yield df.iloc[inicio:inicio + filas].to_csv(index=False, header=(inicio == 0)).encode("utf-8")
+
+
+def serializar_por_bloques(df: pd.DataFrame, blob_name: str, block_size: int = None, filas: int = None):
+    """Genera bloques de ~`block_size` bytes del DataFrame serializado (CSV o Parquet).
+
+    La memoria extra queda acotada a un bloque, en vez de una copia completa del archivo.
+    """
+    block_size = block_size or TRANSFER_CHUNK_SIZE
+    filas = filas or STREAMING_ROWS_PER_PART
+    pendiente = bytearray()
+    for tramo in _tramos_serializados(df, blob_name, filas):
+        pendiente += tramo
+        while len(pendiente) >= block_size:
+            yield bytes(pendiente[:block_size])
+            del pendiente[:block_size]
+    if pendiente:
+        yield bytes(pendiente)
+
+
+def iter_rangos(storage, name: str, size: int, chunk_size: int = None, max_concurrency: int = None):
+    """Descarga el blob por rangos en paralelo y entrega los chunks en orden.
+
+    Mantiene a lo sumo `max_concurrency` rangos en vuelo, así la memoria queda acotada.
+    """
+    chunk_size = chunk_size or TRANSFER_CHUNK_SIZE
+    max_concurrency = max_concurrency or TRANSFER_MAX_CONCURRENCY
+    offsets = iter(range(0, size, chunk_size))
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        en_vuelo = deque()
+
+        def _pedir_siguiente():
+            offset = next(offsets, None)
+            if offset is not None:
+                en_vuelo.append(pool.submit(storage.read_range, name, offset, min(chunk_size, size - offset)))
+
+        for _ in range(max_concurrency):
+            _pedir_siguiente()
+        while en_vuelo:
+            data = en_vuelo.popleft().result()
+            _pedir_siguiente()
+            yield data
+
+
+class ChunkStream(io.RawIOBase):
+    """Archivo de lectura secuencial sobre un iterador de chunks (para parsear mientras se descarga)."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._actual = memoryview(b"")
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not len(self._actual):
+            siguiente = next(self._chunks, None)
+            if siguiente is None:
+                return 0
+            self._actual = memoryview(siguiente)
+        n = min(len(b), len(self._actual))
+        b[:n] = self._actual[:n]
+        self._actual = self._actual[n:]
+        return n
+
+
+def normalizar_fechas(df: pd.DataFrame, date_range=None) -> pd.DataFrame:
+    """Parsea la columna "date" y aplica el filtro de rango, igual para todos los formatos."""
+    if "date" in df.columns:
+        df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    return filtrar_fechas(df, date_range)
+
+
+# ========================
+# 🗜️ COMPRESIÓN DE TRANSFERENCIAS
+# ========================
+# La codificación se guarda en la metadata del blob ("encoding"). No se usa el header HTTP
+# Content-Encoding para que ni el SDK ni el transporte intenten decodificar descargas por rangos.
+# Si el blob no trae metadata (blobs antiguos sin comprimir) se detecta por los magic bytes.
+
+CODIFICACIONES = ("gzip", "zstd")
+_MAGIC = {b"\x1f\x8b": "gzip", b"\x28\xb5\x2f\xfd": "zstd"}
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def _politica_por_blob() -> dict:
+    politica = {}
+    for regla in filter(None, (r.strip() for r in BLOB_COMPRESSION_POLICY.split(","))):
+        nombre, _, codificacion = regla.partition("=")
+        politica[nombre.strip()] = codificacion.strip()
+    return politica
+
+
+def codificacion_para(blob_name: str):
+    """Codificación con que se sube el blob según la política, o None si va sin comprimir.
+
+    Solo se comprimen CSV: Parquet ya comprime por columna y necesita lecturas por rango.
+    """
+    if not str(blob_name).endswith(".csv"):
+        return None
+    codificacion = _politica_por_blob().get(blob_name, BLOB_COMPRESSION)
+    if codificacion not in CODIFICACIONES:
+        return None
+    if codificacion == "zstd" and _zstd() is None:
+        print("⚠️ zstandard no está instalado; se comprime con gzip")
+        return "gzip"
+    return codificacion
+
+
+def detectar_codificacion(inicio: bytes):
+    """Codificación según los magic bytes del inicio del contenido (None = sin comprimir)."""
+    for magic, codificacion in _MAGIC.items():
+        if bytes(inicio[:len(magic)]) == magic:
+            return codificacion
+    return None
+
+
+def _compresor(codificacion: str):
+    if codificacion == "gzip":
+        return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return _zstd().ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+
+def _descompresor(codificacion: str):
+    if codificacion == "gzip":
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    zstandard = _zstd()
+    if zstandard is None:
+        raise RuntimeError("❌ El blob está comprimido con zstd: instalar el paquete `zstandard`")
+    return zstandard.ZstdDecompressor().decompressobj()
+
+
+def comprimir(data, codificacion: str) -> bytes:
+    """Comprime un buffer completo (sin cambios si `codificacion` es None)."""
+    if codificacion is None:
+        return data
+    compresor = _compresor(codificacion)
+    return compresor.compress(bytes(data)) + compresor.flush()
+
+
+def comprimir_chunks(chunks, codificacion: str):
+    """Comprime un iterador de bloques a medida que se producen."""
+    if codificacion is None:
+        yield from chunks
+        return
+    compresor = _compresor(codificacion)
+    for chunk in chunks:
+        salida = compresor.compress(chunk)
+        if salida:
+            yield salida
+    yield compresor.flush()
+
+
+def descomprimir_chunks(chunks, codificacion: str = None):
+    """Descomprime un iterador de chunks a medida que llegan.
+
+    Sin `codificacion` se decide por los magic bytes del primer chunk, así los blobs
+    antiguos (sin comprimir y sin metadata) se leen igual que antes.
+    """
+    chunks = iter(chunks)
+    primero = next(chunks, None)
+    if primero is None:
+        return
+    codificacion = codificacion or detectar_codificacion(primero)
+    if codificacion is None:
+        yield primero
+        yield from chunks
+        return
+
+    descompresor = _descompresor(codificacion)
+    for chunk in _encadenar(primero, chunks):
+        salida = descompresor.decompress(chunk)
+        if salida:
+            yield salida
+    if codificacion == "gzip":
+        resto = descompresor.flush()
+        if resto:
+            yield resto
+
+
+def _encadenar(primero, resto):
+    yield primero
+    yield from resto
+
+
+class RangeFile(io.RawIOBase):
+    """Archivo de solo lectura sobre un blob que descarga únicamente los rangos pedidos.
+
+    Permite a pyarrow leer el footer y solo los column chunks / row groups necesarios.
+    """
+
+    def __init__(self, storage, name: str, size: int):
+        self._storage = storage
+        self._name = name
+        self._size = size
+        self._pos = 0
+        self.bytes_descargados = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = self._size + offset
+        return self._pos
+
+    def readinto(self, b):
+        length = min(len(b), self._size - self._pos)
+        if length <= 0:
+            return 0
+        data = self._storage.read_range(self._name, self._pos, length)
+        b[:len(data)] = data
+        self._pos += len(data)
+        self.bytes_descargados += len(data)
+        return len(data)
+
+
+# ========================
+# 🗄️ BACKENDS
+# ========================
+
+@dataclass
+class BlobInfo:
+    size: int
+    etag: str
+    encoding: str = None  # "gzip" | "zstd" | None (metadata del blob)
+
+
+class BlobDownload:
+    """Descarga en curso: tamaño, ETag, codificación y un iterador de chunks de bytes (crudos)."""
+
+    def __init__(self, size: int, etag: str, chunks, encoding: str = None):
+        self.size = size
+        self.etag = etag
+        self.encoding = encoding
+        self._chunks = chunks
+
+    def chunks(self):
+        return self._chunks
+
+
+class StorageBackend:
+    """Interfaz de almacenamiento usada por los helpers de src/azure_blob.py.
+
+    Las operaciones de bytes son abstractas; leer/escribir DataFrames se apoya en ellas.
+    """
+
+    # True si los blobs viven en disco local (no requieren caché ni descarga)
+    es_local = False
+
+    def exists(self, name: str) -> bool:
+        raise NotImplementedError
+
+    def list_prefix(self, prefix: str) -> list:
+        """Nombres de todos los blobs que empiezan con `prefix`."""
+        raise NotImplementedError
+
+    def properties(self, name: str) -> BlobInfo:
+        """Tamaño y ETag del blob. Lanza FileNotFoundError si no existe."""
+        raise NotImplementedError
+
+    def open_stream(self, name: str, if_none_match: str = None):
+        """Abre una descarga completa. Devuelve None si el ETag coincide con `if_none_match`."""
+        raise NotImplementedError
+
+    def read_range(self, name: str, offset: int, length: int) -> bytes:
+        raise NotImplementedError
+
+    def write_bytes(self, name: str, data, content_type: str = None, progress_hook=None,
+                    encoding: str = None) -> str:
+        """Sube `data` (bytes o archivo; sobrescribe) y devuelve el nuevo ETag.
+
+        `encoding` se registra como metadata cuando `data` ya viene comprimido.
+        """
+        raise NotImplementedError
+
+    def write_stream(self, name: str, chunks, content_type: str = None, max_concurrency: int = None,
+                     encoding: str = None) -> str:
+        """Sube el blob a partir de un iterador de bloques. Devuelve el nuevo ETag."""
+        return self.write_bytes(name, b"".join(chunks), content_type=content_type, encoding=encoding)
+
+    def delete(self, name: str) -> None:
+        raise NotImplementedError
+
+    def local_path(self, name: str):
+        """Ruta en disco del blob si el backend es local (permite memory map); None si es remoto."""
+        return None
+
+    def read_bytes(self, name: str) -> bytes:
+        stream = self.open_stream(name)
+        return b"".join(descomprimir_chunks(stream.chunks(), stream.encoding))
+
+    def read_frame(self, name: str, columns=None, date_range=None, dtype=None) -> pd.DataFrame:
+        """Lee un DataFrame (CSV o Parquet) con proyección de columnas y rango de fechas.
+
+        `dtype` solo se usa al parsear CSV; Parquet ya conserva los tipos con que se escribió.
+        """
+        path = self.local_path(name)
+        if es_parquet(name):
+            if path is not None:
+                import pyarrow as pa
+                with pa.memory_map(str(path)) as source:
+                    df = leer_parquet(source, columns=columns, date_range=date_range)
+            else:
+                with RangeFile(self, name, self.properties(name).size) as f:
+                    df = leer_parquet(f, columns=columns, date_range=date_range)
+        elif path is not None:
+            df = leer_csv(path, columns=columns, memory_map=True, dtype=dtype)
+        else:
+            df = leer_csv(BytesIO(self.read_bytes(name)), columns=columns, dtype=dtype)
+        return normalizar_fechas(df, date_range)
+
+    def write_frame(self, df: pd.DataFrame, name: str) -> str:
+        """Serializa y sube un DataFrame según la extensión de `name`."""
+        buffer = serializar(df, name)
+        return self.write_bytes(name, buffer.getbuffer())
+
+
+class AzureBlobBackend(StorageBackend):
+    """Contenedor de Azure Blob Storage. El cliente se crea recién en el primer uso."""
+
+    def __init__(self, connection_string: str = None, container: str = AZURE_BLOB_CONTAINER):
+        self._connection_string = connection_string
+        self.container = container
+        self._container_client = None
+
+    @property
+    def container_client(self):
+        if self._container_client is None:
+            from azure.storage.blob import BlobServiceClient
+            conn_str = self._connection_string or os.getenv("AZURE_STORAGE_CONNECTION_STRING")
+            if not conn_str:
+                raise RuntimeError("❌ Falta AZURE_STORAGE_CONNECTION_STRING (o usar STORAGE_BACKEND=local)")
+            service = BlobServiceClient.from_connection_string(conn_str)
+            self._container_client = service.get_container_client(self.container)
+        return self._container_client
+
+    def _blob(self, name: str):
+        return self.container_client.get_blob_client(name)
+
+    def exists(self, name: str) -> bool:
+        return self._blob(name).exists()
+
+    def list_prefix(self, prefix: str) -> list:
+        return [b.name for b in self.container_client.list_blobs(name_starts_with=prefix)]
+
+    def properties(self, name: str) -> BlobInfo:
+        from azure.core.exceptions import ResourceNotFoundError
+        try:
+            props = self._blob(name).get_blob_properties()
+        except ResourceNotFoundError:
+            raise FileNotFoundError(f"❌ No existe el blob: {name}")
+        return BlobInfo(size=props.size, etag=props.etag, encoding=(props.metadata or {}).get("encoding"))
+
+    def open_stream(self, name: str, if_none_match: str = None):
+        from azure.core import MatchConditions
+        from azure.core.exceptions import ResourceNotFoundError, ResourceNotModifiedError
+        try:
+            if if_none_match:
+                stream = self._blob(name).download_blob(etag=if_none_match, match_condition=MatchConditions.IfModified)
+            else:
+                stream = self._blob(name).download_blob()
+        except ResourceNotModifiedError:
+            return None
+        except ResourceNotFoundError:
+            raise FileNotFoundError(f"❌ No existe el blob: {name}")
+        encoding = (stream.properties.metadata or {}).get("encoding")
+        return BlobDownload(stream.size, stream.properties.etag, stream.chunks(), encoding=encoding)
+
+    def read_range(self, name: str, offset: int, length: int) -> bytes:
+        return self._blob(name).download_blob(offset=offset, length=length).readall()
+
+    def write_bytes(self, name: str, data, content_type: str = None, progress_hook=None,
+                    encoding: str = None) -> str:
+        from azure.storage.blob import ContentSettings
+        kwargs = {}
+        if content_type:
+            kwargs["content_settings"] = ContentSettings(content_type=content_type)
+        if encoding:
+            kwargs["metadata"] = {"encoding": encoding}
+        if progress_hook is not None:
+            kwargs["raw_response_hook"] = progress_hook
+        resultado = self._blob(name).upload_blob(data, overwrite=True, **kwargs)
+        return resultado.get("etag")
+
+    def write_stream(self, name: str, chunks, content_type: str = None, max_concurrency: int = None,
+                     encoding: str = None) -> str:
+        """Sube por bloques (stage_block en paralelo + commit_block_list) a medida que se producen."""
+        from azure.storage.blob import BlobBlock, ContentSettings
+
+        max_concurrency = max_concurrency or TRANSFER_MAX_CONCURRENCY
+        blob = self._blob(name)
+        block_ids = []
+        with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+            en_vuelo = deque()
+            for i, chunk in enumerate(chunks):
+                block_id = base64.b64encode(f"{i:08d}".encode()).decode()
+                block_ids.append(block_id)
+                en_vuelo.append(pool.submit(blob.stage_block, block_id, chunk))
+                if len(en_vuelo) >= max_concurrency:
+                    en_vuelo.popleft().result()
+            for futuro in en_vuelo:
+                futuro.result()
+
+        kwargs = {"content_settings": ContentSettings(content_type=content_type)} if content_type else {}
+        if encoding:
+            kwargs["metadata"] = {"encoding": encoding}
+        resultado = blob.commit_block_list([BlobBlock(block_id=b) for b in block_ids], **kwargs)
+        return resultado.get("etag")
+
+    def delete(self, name: str) -> None:
+        blob = self._blob(name)
+        if blob.exists():
+            blob.delete_blob()
+
+
+class LocalBackend(StorageBackend):
+    """Carpeta local que imita el contenedor (los nombres de blob son rutas relativas)."""
+
+    es_local = True
+
+    def __init__(self, root=LOCAL_STORAGE_DIR):
+        self.root = Path(root)
+
+    def _path(self, name: str) -> Path:
+        return self.root / name
+
+    def exists(self, name: str) -> bool:
+        return self._path(name).is_file()
+
+    def list_prefix(self, prefix: str) -> list:
+        if not self.root.exists():
+            return []
+        nombres = (p.relative_to(self.root).as_posix() for p in self.root.rglob("*") if p.is_file())
+        return sorted(n for n in nombres if n.startswith(prefix))
+
+    def _etag(self, path: Path) -> str:
+        stat = path.stat()
+        return '"' + hashlib.sha1(f"{stat.st_mtime_ns}-{stat.st_size}".encode()).hexdigest() + '"'
+
+    def properties(self, name: str) -> BlobInfo:
+        path = self._path(name)
+        if not path.is_file():
+            raise FileNotFoundError(f"❌ No existe el blob: {name}")
+        return BlobInfo(size=path.stat().st_size, etag=self._etag(path))
+
+    def open_stream(self, name: str, if_none_match: str = None):
+        info = self.properties(name)
+        if if_none_match and if_none_match == info.etag:
+            return None
+        path = self._path(name)
+
+        def chunks(chunk_size=4 * 1024 * 1024):
+            with open(path, "rb") as f:
+                while True:
+                    data = f.read(chunk_size)
+                    if not data:
+                        break
+                    yield data
+
+        return BlobDownload(info.size, info.etag, chunks())
+
+    def read_range(self, name: str, offset: int, length: int) -> bytes:
+        with open(self._path(name), "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def read_bytes(self, name: str) -> bytes:
+        if not self.exists(name):
+            raise FileNotFoundError(f"❌ No existe el blob: {name}")
+        return self._path(name).read_bytes()
+
+    def write_bytes(self, name: str, data, content_type: str = None, progress_hook=None,
+                    encoding: str = None) -> str:
+        # Sin metadata en disco: la codificación se detecta por magic bytes al leer
+        path = self._path(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            if hasattr(data, "read"):
+                f.write(data.read())
+            else:
+                f.write(data)
+        os.replace(tmp, path)
+        return self._etag(path)
+
+    def write_stream(self, name: str, chunks, content_type: str = None, max_concurrency: int = None,
+                     encoding: str = None) -> str:
+        path = self._path(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp, path)
+        return self._etag(path)
+
+    def delete(self, name: str) -> None:
+        self._path(name).unlink(missing_ok=True)
+
+    def local_path(self, name: str):
+        path = self._path(name)
+        if not path.is_file():
+            raise FileNotFoundError(f"❌ No existe el blob: {name}")
+        return path
+
+
+_storage = None
+
+
+def get_storage() -> StorageBackend:
+    """Backend activo según STORAGE_BACKEND (se instancia una sola vez, sin conectar)."""
+    global _storage
+    if _storage is None:
+        _storage = LocalBackend() if STORAGE_BACKEND == "local" else AzureBlobBackend()
+    return _storage
+
+
+def set_storage(backend: StorageBackend) -> None:
+    """Reemplaza el backend activo (tests, benchmarks o ejecución contra datos locales)."""
+    global _storage
+    _storage = backend
@@ -1,29 +1,24 @@
 import os
+import sys
+from pathlib import Path
 import pandas as pd
 from datetime import datetime
 from apify_client import ApifyClient
 from config import APIFY_API_KEY
-import re
-import nltk
 import spacy
-import emoji
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
-from tqdm import tqdm
 from dateutil.relativedelta import relativedelta
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from src.normalizacion import normalizar_serie_spacy, stopwords_es
 
 APIFY_API_KEY = os.getenv("APIFY_API_KEY") or "TU_API_KEY_AQUI"
 client = ApifyClient(APIFY_API_KEY)
 
-nltk.download("stopwords")
-nltk.download("wordnet")
-
 # Stopwords
 stopwords_lda_extra = {
     "haber", "tener", "hacer", "decir", "poder", "dar", "ir", "poner", "ser", "estar", "querer"
 }
 
-spanish_stopwords = set(stopwords.words("spanish"))
+spanish_stopwords = set(stopwords_es())
 custom_stopwords = {
     "q", "va", "ser", "tra", "sido", "vez", "hoy", "ahora", "nuevo", "así"
 }
@@ -34,8 +29,7 @@ stopwords_final_general = spanish_stopwords.union(custom_stopwords)
 # Stopwords final para Topic Modeling (con los verbos)
 stopwords_final_topic = stopwords_final_general.union(stopwords_lda_extra)
 
-# Lematizer
-lemmatizer = WordNetLemmatizer()
+# Lematizador (spaCy)
 nlp = spacy.load("es_core_news_sm")
 
 
@@ -152,31 +146,15 @@ def scrape_comments_candidate(usuario_cuenta: str, tweet_ids: list, df_tweets: p
     else:
         print("⚠️ No se encontraron comentarios.")
 
+def clean_texts(texts, min_words=3, max_words=50, stopwords_set=stopwords_final_topic):
+    """Limpieza en batch (ver src/normalizacion.py): links, menciones, hashtags, emojis y
+    stopwords fuera, lemas de spaCy. Los textos descartados quedan en None."""
+    return normalizar_serie_spacy(texts, nlp, stopwords_set, min_words=min_words, max_words=max_words)
+
 def clean_text(text, min_words=3, max_words=50, stopwords_set=stopwords_final_topic):
     if pd.isna(text):
         return None
-    
-    text = text.lower()
-    text = re.sub(r"http\S+|www\S+|https\S+", "", text)
-    text = re.sub(r"@\w+", "", text)
-    text = re.sub(r"#\w+", "", text)
-    text = emoji.replace_emoji(text, replace="")
-    text = re.sub(r"[^\w\sáéíóúñü]", "", text)
-    text = re.sub(r"\s+", " ", text).strip()
-    
-    doc = nlp(text)
-    words = [
-        token.lemma_ for token in doc
-        if token.lemma_ not in stopwords_set
-        and not token.is_punct
-        and not token.is_space
-        and not token.is_digit
-    ]
-    
-    if len(words) < min_words or len(words) > max_words:
-        return None
-    
-    return " ".join(words)
+    return clean_texts([text], min_words, max_words, stopwords_set).iloc[0]
 
 def preprocess_tweets_csv(csv_path: str, text_column: str = "text") -> pd.DataFrame:
     """
@@ -199,8 +177,7 @@ def preprocess_tweets_csv(csv_path: str, text_column: str = "text") -> pd.DataFr
 
     print(f"🔍 Preprocesando {len(df)} tweets...")
     
-    tqdm.pandas(desc="🧹 Limpiando texto")
-    df["clean_text"] = df[text_column].astype(str).progress_apply(clean_text)
+    df["clean_text"] = clean_texts(df[text_column].astype(str))
     
     # Eliminar los que quedaron vacíos tras limpieza
     df = df.dropna(subset=["clean_text"]).reset_index(drop=True)
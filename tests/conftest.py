@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.storage import LocalBackend, set_storage
+from src.azure_blob import write_csv_blob
+
+
+# === Almacenamiento local en un directorio temporal (en vez de Azure) ===
+@pytest.fixture
+def storage(tmp_path):
+    backend = LocalBackend(tmp_path)
+    set_storage(backend)
+    yield backend
+    set_storage(None)
+
+
+# === Tweets procesados sintéticos (scores, engagement y embeddings) ===
+def _tweets(dias, por_dia, inicio_id):
+    filas = []
+    rng = np.random.default_rng(inicio_id)
+    for dia in dias:
+        for k in range(por_dia):
+            scores = rng.dirichlet(np.ones(3))
+            filas.append({
+                "id": str(inicio_id + len(filas)),
+                "date": dia,
+                "createdAt": pd.Timestamp(dia, tz="UTC") + pd.Timedelta(hours=k),
+                "score_negative": scores[0], "score_neutral": scores[1], "score_positive": scores[2],
+                # Engagement con ciclo fijo: mediana e IQR no cambian al agregar días
+                "retweetCount": k % 5, "replyCount": (k + 1) % 5, "likeCount": (2 * k) % 5, "quoteCount": 0,
+                **{f"robertuito_{i}": rng.normal() for i in range(768)},
+            })
+    return pd.DataFrame(filas)
+
+
+@pytest.fixture
+def tweets():
+    """Fábrica de tweets procesados: tweets(dias, por_dia, inicio_id)."""
+    return _tweets
+
+
+# === Encuestas semanales de muestra en encuestas.csv ===
+@pytest.fixture
+def encuestas(storage):
+    df = pd.DataFrame({
+        "date": pd.date_range("2025-03-02", "2025-05-04", freq="W-SUN"),
+        "aprobacion_boric": np.linspace(25, 35, 10),
+        "desaprobacion_boric": np.linspace(65, 55, 10),
+    })
+    write_csv_blob(df, "encuestas.csv", background=False)
+    return df
+
+
+# === 20 días de tweets procesados (5 por día) en processed.csv ===
+@pytest.fixture
+def procesados(storage):
+    df = _tweets(pd.date_range("2025-03-10", periods=20), 5, 0)
+    write_csv_blob(df, "processed.csv", background=False)
+    return df
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from src.cache_inferencia import InferenceCache
+
+
+def _resultados(n):
+    rng = np.random.default_rng(0)
+    scores = rng.dirichlet(np.ones(3), size=n).astype(np.float32)
+    return scores, rng.normal(size=(n, 768)).astype(np.float32)
+
+
+# === Test 1: lo guardado en una corrida se reutiliza en la siguiente ===
+def test_cache_persistente_hits(storage):
+    textos = ["gobierno mal", "buena noticia", "otra cosa"]
+    scores, embeddings = _resultados(3)
+    cache = InferenceCache("modelo@abc").cargar()
+    cache.agregar(textos, scores, embeddings)
+    cache.guardar()
+
+    cache = InferenceCache("modelo@abc").cargar()
+    hits, scores_hit, emb_hit, misses = cache.buscar(["otra cosa", "texto nuevo", "gobierno mal"])
+
+    assert hits == [0, 2] and misses == [1]
+    assert np.allclose(scores_hit, scores[[2, 0]])
+    # Un hit devuelve exactamente el vector de la inferencia sin caché
+    assert emb_hit.dtype == np.float32 and np.array_equal(emb_hit, embeddings[[2, 0]])
+    assert cache.tasa_aciertos() == pytest.approx(2 / 3)
+
+
+# === Test 2: otro modelo invalida la caché y el tamaño queda acotado ===
+def test_cache_invalida_y_acota(storage):
+    scores, embeddings = _resultados(5)
+    cache = InferenceCache("modelo@abc", max_entries=3).cargar()
+    cache.agregar([f"texto {i}" for i in range(5)], scores, embeddings)
+    cache.guardar()
+
+    assert len(InferenceCache("modelo@abc").cargar()) == 3
+    assert len(InferenceCache("modelo@def").cargar()) == 0
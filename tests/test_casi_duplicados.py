@@ -0,0 +1,26 @@
+import numpy as np
+from src.casi_duplicados import representantes, resumen_por_dia
+
+
+# === Test 1: variantes casi idénticas comparten representante, textos distintos no ===
+def test_representantes_agrupa_casi_duplicados():
+    textos = [
+        "gobierno anuncia reforma pensiones congreso discute proyecto",
+        "rt gobierno anuncia reforma pensiones congreso discute proyecto",
+        "otro tema totalmente distinto seguridad ciudadana",
+        "gobierno anuncia reforma pensiones congreso discute proyecto",
+        "economía crece inflación baja según banco central",
+    ]
+    reps = representantes(textos)
+    assert reps.tolist() == [0, 0, 2, 0, 4]
+
+
+# === Test 2: resumen diario de inferencias ahorradas ===
+def test_resumen_por_dia():
+    textos = ["a b c", "a b c", "x y z", "x y z"]
+    fechas = ["2025-06-01T10:00:00Z", "2025-06-01T11:00:00Z", "2025-06-02T10:00:00Z", "2025-06-02T12:00:00Z"]
+    resumen = resumen_por_dia(fechas, textos, np.array([0, 0, 2, 2]))
+
+    assert resumen["date"].tolist() == ["2025-06-01", "2025-06-02"]
+    assert resumen["ahorradas"].tolist() == [1, 1]
+    assert resumen["inferencias"].tolist() == [1, 1]
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.embeddings_store import EmbeddingStore
+
+
+pytestmark = pytest.mark.usefixtures("storage")
+
+
+def _datos(n=20):
+    rng = np.random.default_rng(0)
+    ids = [str(i) for i in range(n)]
+    fechas = pd.to_datetime(["2025-04-14T10:00:00Z"] * (n // 2) + ["2025-04-15T23:00:00Z"] * (n - n // 2))
+    return ids, fechas, rng.normal(size=(n, 768)).astype(np.float32)
+
+
+# === Test 1: las medias diarias coinciden con el promedio de los vectores ===
+def test_medias_diarias_float32():
+    ids, fechas, vectores = _datos()
+    store = EmbeddingStore(dtype="float32")
+    store.guardar(ids, fechas, vectores)
+
+    medias = store.medias_diarias()
+    assert list(medias["date"]) == list(pd.to_datetime(["2025-04-14", "2025-04-15"]))
+    assert np.allclose(medias.iloc[0, 1:].to_numpy(float), vectores[:10].mean(axis=0), atol=1e-6)
+
+
+# === Test 2: int8 con escala conserva los vectores y no duplica ids ===
+def test_int8_y_deduplicacion():
+    ids, fechas, vectores = _datos()
+    store = EmbeddingStore(dtype="int8")
+    store.guardar(ids, fechas, vectores)
+    store.guardar(ids[:3], fechas[:3], vectores[:3])  # reproceso de los mismos tweets
+
+    ids_dia, vec_dia = store.cargar_dia("2025-04-14")
+    assert sorted(ids_dia, key=int) == ids[:10]
+    originales = vectores[[int(i) for i in ids_dia]]
+    cos = (vec_dia * originales).sum(1) / (np.linalg.norm(vec_dia, axis=1) * np.linalg.norm(originales, axis=1))
+    assert cos.min() > 0.999
+
+
+# === Test 3: los vectores sin createdAt válido se descartan con un warning ===
+def test_guardar_descarta_fechas_invalidas(caplog):
+    ids, fechas, vectores = _datos()
+    fechas = list(fechas)
+    fechas[0] = "no es fecha"
+    store = EmbeddingStore(dtype="float32")
+    with caplog.at_level("WARNING", logger="src.embeddings_store"):
+        store.guardar(ids, fechas, vectores)
+
+    ids_dia, _ = store.cargar_dia("2025-04-14")
+    assert ids[0] not in list(ids_dia) and len(ids_dia) == 9
+    assert "1 embeddings sin createdAt válido" in caplog.text
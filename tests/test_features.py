@@ -43,4 +43,176 @@ def test_merge_encuestas_diarias():
     df_merged = df_daily.merge(df_encuestas[["week_start", "aprobacion_boric"]], on="week_start", how="left")
 
     assert "aprobacion_boric" in df_merged.columns
-    assert df_merged["aprobacion_boric"].isna().sum() < len(df_merged)
\ No newline at end of file
+    assert df_merged["aprobacion_boric"].isna().sum() < len(df_merged)
+
+# === Test: medias diarias con casi duplicados de-ponderados ===
+def test_medias_sin_duplicados():
+    df = pd.DataFrame({
+        "date": pd.to_datetime(["2025-04-14"] * 4 + ["2025-04-15"]),
+        "dup_group": ["a", "a", "a", "b", None],
+        "score_positive": [0.9, 0.9, 0.9, 0.1, 0.5],
+    })
+    medias = fe.medias_sin_duplicados(df, ["score_positive"])
+
+    # El grupo "a" (3 tweets) pesa lo mismo que el tweet "b"
+    assert np.isclose(medias.loc[pd.Timestamp("2025-04-14"), "score_positive"], 0.5)
+    assert np.isclose(medias.loc[pd.Timestamp("2025-04-15"), "score_positive"], 0.5)
+
+# === Test: el modo incremental coincide con el cálculo completo ===
+def test_features_incremental_equivale_a_completo(encuestas, procesados, tweets, monkeypatch):
+    import src.features as features
+    from src.azure_blob import read_csv_blob, append_csv_blob
+
+    monkeypatch.setattr(features, "FEATURES_INCREMENTAL", True)
+    incremental = FeatureEngineer("processed.csv", "encuestas.csv", "features_inc.csv")
+    incremental.run()
+    assert incremental.cargar_estado() is not None
+
+    nuevos = tweets([pd.Timestamp("2025-03-29")] + list(pd.date_range("2025-03-30", periods=2)), 5, 1000)
+    append_csv_blob(nuevos, "processed.csv", background=False)
+    incremental.run()
+
+    monkeypatch.setattr(features, "FEATURES_INCREMENTAL", False)
+    FeatureEngineer("processed.csv", "encuestas.csv", "features_full.csv").run()
+
+    inc = read_csv_blob("features_inc.csv", schema="features")
+    full = read_csv_blob("features_full.csv", schema="features")
+    assert len(inc) == len(full) == 22
+    assert list(inc.columns) == list(full.columns)
+    numericas = full.select_dtypes("number").columns
+    assert np.allclose(inc[numericas].to_numpy(float), full[numericas].to_numpy(float), equal_nan=True, atol=1e-5)
+
+# === Test: agregación ponderada vectorizada = weighted_avg por día ===
+def _ponderados_anterior(df, engagement_vars):
+    # Implementación anterior (oráculo): un groupby().apply por variable de engagement + merges
+    resultados = []
+    for var in engagement_vars:
+        df_w = df.groupby("date", group_keys=False).apply(
+            lambda x: pd.Series({
+                f"weighted_positive_{var}": fe.weighted_avg(x["score_positive"], x[var]),
+                f"weighted_negative_{var}": fe.weighted_avg(x["score_negative"], x[var]),
+                f"weighted_neutral_{var}": fe.weighted_avg(x["score_neutral"], x[var])
+            })
+        ).reset_index()
+        resultados.append(df_w)
+    df_all = resultados[0]
+    for df_w in resultados[1:]:
+        df_all = df_all.merge(df_w, on="date", how="left")
+    return df_all
+
+
+def test_agregados_ponderados_equivale_a_weighted_avg():
+    from src.registro_features import ENGAGEMENT_VARS
+
+    rng = np.random.default_rng(0)
+    n = 500
+    df = pd.DataFrame({
+        "date": pd.to_datetime("2025-04-01") + pd.to_timedelta(rng.integers(0, 10, n), unit="D"),
+        "score_positive": rng.random(n).astype("float32"),
+        "score_negative": rng.random(n).astype("float32"),
+        "score_neutral": rng.random(n).astype("float32"),
+        **{var: rng.normal(size=n) for var in ENGAGEMENT_VARS},
+    })
+    # Un día con todos los pesos en cero usa la media simple
+    df.loc[df["date"] == "2025-04-03", ENGAGEMENT_VARS] = 0.0
+
+    esperado = _ponderados_anterior(df, ENGAGEMENT_VARS)
+    resultado = fe.agregados_ponderados(df, ENGAGEMENT_VARS)
+
+    assert list(resultado.columns) == list(esperado.columns)
+    assert (resultado["date"].to_numpy() == esperado["date"].to_numpy()).all()
+    assert np.allclose(resultado.drop(columns="date").to_numpy(float),
+                       esperado.drop(columns="date").to_numpy(float), rtol=1e-6, atol=1e-9)
+
+# === Test: solo se calcula el cierre de las features pedidas ===
+def test_features_solo_las_requeridas(encuestas, procesados):
+    from src.azure_blob import read_csv_blob
+    from src.registro_features import cierre
+
+    assert cierre(["sentiment_net_rolling7"]) == {"sentiment_net_rolling7", "sentiment_net", "score_positive", "score_negative"}
+
+    pedidas = ["approval_rolling_7d", "score_negative_rolling7", "sentiment_net_rolling7", "robertuito_3"]
+    FeatureEngineer("processed.csv", "encuestas.csv", "features_sel.csv", features=pedidas).run()
+    FeatureEngineer("processed.csv", "encuestas.csv", "features_full.csv").run()
+
+    sel = read_csv_blob("features_sel.csv", schema="features")
+    full = read_csv_blob("features_full.csv", schema="features")
+    assert set(sel.columns) == {"date"} | cierre(pedidas + ["score_negative", "aprobacion_boric", "desaprobacion_boric"])
+    assert not any(c.startswith("weighted_") for c in sel.columns)
+    assert np.allclose(sel[pedidas].to_numpy(float), full[pedidas].to_numpy(float), equal_nan=True)
+
+# === Test: percentiles exactos desde conteos de valores (RobustScaler por bloques) ===
+def test_percentil_desde_conteos():
+    from src.features import percentil_desde_conteos
+
+    valores = pd.Series(np.random.default_rng(1).integers(0, 40, 1001).astype("float64"))
+    conteos = valores.value_counts()
+    for q in (25, 50, 75):
+        assert np.isclose(percentil_desde_conteos(conteos, q), np.percentile(valores, q))
+
+# === Test: el modo por bloques coincide con el cálculo en memoria ===
+def test_features_por_bloques_equivale_a_completo(encuestas, tweets):
+    from src.azure_blob import read_csv_blob, write_csv_blob
+
+    df = tweets(pd.date_range("2025-03-10", periods=20), 6, 0)
+    df["likeCount"] = np.random.default_rng(2).integers(0, 50, len(df))
+    write_csv_blob(df, "processed.csv", background=False)
+
+    FeatureEngineer("processed.csv", "encuestas.csv", "features_full.csv").run()
+    FeatureEngineer("processed.csv", "encuestas.csv", "features_bloques.csv").run_por_bloques(7)
+
+    full = read_csv_blob("features_full.csv", schema="features")
+    bloques = read_csv_blob("features_bloques.csv", schema="features")
+    assert list(bloques.columns) == list(full.columns)
+    numericas = full.select_dtypes("number").columns
+    assert np.allclose(bloques[numericas].to_numpy(float), full[numericas].to_numpy(float), equal_nan=True, atol=1e-5)
+
+# === Test: el bloque reducido reemplaza a las 768 medias de embeddings ===
+def test_features_con_proyeccion_de_embeddings(encuestas, procesados, monkeypatch):
+    import src.features as features
+    from src.azure_blob import read_csv_blob
+    from src.proyeccion_embeddings import ProyeccionEmbeddings
+
+    monkeypatch.setattr(features, "EMBEDDING_PROJECTION", "random")
+    FeatureEngineer("processed.csv", "encuestas.csv", "features_proy.csv").run()
+    monkeypatch.setattr(features, "EMBEDDING_PROJECTION", "")
+    FeatureEngineer("processed.csv", "encuestas.csv", "features_full.csv").run()
+
+    proy = read_csv_blob("features_proy.csv", schema="features")
+    full = read_csv_blob("features_full.csv", schema="features")
+    bloque = [c for c in proy.columns if c.startswith("embedding_proy_")]
+    assert bloque == features.EMBEDDING_PROY_COLS
+    assert not any(c.startswith("robertuito_") for c in proy.columns)
+
+    # Misma proyección (guardada junto a los modelos) aplicada a las medias completas
+    proyeccion = ProyeccionEmbeddings.cargar()
+    esperado = proyeccion.transformar(full[features.EMBEDDING_COLS].to_numpy(float))
+    assert np.allclose(proy[bloque].to_numpy(float), esperado, atol=1e-4)
+
+# === Test: el modo incremental nunca ajusta la proyección con solo los días nuevos ===
+def test_incremental_sin_proyeccion_guardada_no_ajusta(encuestas, procesados, tweets, monkeypatch):
+    import pytest
+    import src.features as features
+    from src.azure_blob import read_csv_blob, append_csv_blob, delete_blob
+    from src.proyeccion_embeddings import ProyeccionEmbeddings
+
+    monkeypatch.setattr(features, "FEATURES_INCREMENTAL", True)
+    monkeypatch.setattr(features, "EMBEDDING_PROJECTION", "pca")
+    fe_inc = FeatureEngineer("processed.csv", "encuestas.csv", "features_inc.csv")
+    fe_inc.run()
+    delete_blob(features.EMBEDDING_PROJECTION_BLOB)
+
+    with pytest.raises(RuntimeError):
+        fe_inc.reducir_embeddings(read_csv_blob("features_inc.csv", schema="features").head(2), ajustar=False)
+
+    append_csv_blob(tweets(list(pd.date_range("2025-03-30", periods=2)), 5, 1000), "processed.csv", background=False)
+    fe_inc.run()
+
+    # Sin proyección guardada se rehízo el histórico completo: el ajuste usa los 22 días
+    monkeypatch.setattr(features, "FEATURES_INCREMENTAL", False)
+    monkeypatch.setattr(features, "EMBEDDING_PROJECTION", "")
+    FeatureEngineer("processed.csv", "encuestas.csv", "features_full.csv").run()
+    full = read_csv_blob("features_full.csv", schema="features")
+    esperada = ProyeccionEmbeddings.ajustar(full[features.EMBEDDING_COLS].to_numpy(), "pca")
+    assert np.allclose(ProyeccionEmbeddings.cargar().media, esperada.media)
+    assert len(read_csv_blob("features_inc.csv", schema="features")) == 22
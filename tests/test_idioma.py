@@ -0,0 +1,28 @@
+from src.idioma import es_espanol
+
+
+# === Test 1: se descartan inglés y portugués, se conserva español y lo ambiguo ===
+def test_es_espanol_filtra_otros_idiomas():
+    textos = [
+        "El gobierno anunció que la reforma de pensiones se vota en el congreso",
+        "The president said that this is not what the people want",
+        "O governo não vai fazer isso com a gente, é muito ruim",
+        "Boric Kast Matthei",
+        "@usuario https://t.co/x 😡",
+        None,
+    ]
+    assert es_espanol(textos).tolist() == [True, False, False, True, True, True]
+
+# === Test 2: negaciones y respuestas cortas en español no se descartan ===
+def test_es_espanol_conserva_negaciones_y_respuestas_cortas():
+    textos = [
+        "Boric no sabe nada, no hace nada",
+        "No, no y no al gobierno",
+        "No tenemos seguridad",
+        "No son ni las 9 y ya el ministro metió la pata",
+        "Sí",
+        "No.",
+        "ok jaja",
+        "Jeannette Jara y Evelyn Matthei en Chilevisión",
+    ]
+    assert es_espanol(textos).all()
@@ -0,0 +1,47 @@
+import numpy as np
+from src.preprocessing import TweetPreprocessor
+from src.inferencia import cuantizar_dinamico, verificar_paridad, inferir_en_paralelo, preparar_modelo, backend_en_uso
+
+# Se reutilizan los modelos fp32 que carga el preprocesador (backend por defecto: torch)
+preprocessor = TweetPreprocessor("tests/fake_path.csv")
+
+
+# === Test 1: int8 dinámico dentro de tolerancia para el clasificador de sentimiento ===
+def test_paridad_cuantizado_sentimiento():
+    cuantizado = cuantizar_dinamico(preprocessor.sentiment_model)
+    resultado = verificar_paridad(preprocessor.sentiment_model, cuantizado, preprocessor.tokenizer, "sentiment")
+    assert resultado["ok"], resultado
+    # También se compara el hidden state que se usa como embedding con EMBEDDING_SOURCE=sentiment
+    assert {"max_diff_score", "min_coseno"} <= set(resultado)
+
+
+# === Test 2: int8 dinámico dentro de tolerancia para el encoder de embeddings ===
+def test_paridad_cuantizado_embeddings():
+    cuantizado = cuantizar_dinamico(preprocessor.embedding_model)
+    resultado = verificar_paridad(
+        preprocessor.embedding_model, cuantizado, preprocessor.embedding_tokenizer, "encoder"
+    )
+    assert resultado["ok"], resultado
+
+
+# === Test 3: el pool multi-proceso devuelve lo mismo y en el mismo orden que un solo proceso ===
+def test_inferencia_en_paralelo_conserva_orden():
+    textos = ["gobierno mal", "excelente anuncio presidente", "", "pésima gestión", "feliz con la noticia"]
+    resultados, embeddings = inferir_en_paralelo(textos, workers=2, hilos=1, shard_size=2)
+    esperados, embeddings_esperados = preprocessor.inferir(textos, progreso=False)
+
+    assert [r[0] for r in resultados] == [r[0] for r in esperados]
+    assert embeddings.shape == (len(textos), 768)
+    assert np.allclose(embeddings, embeddings_esperados, atol=1e-4)
+
+
+# === Test 4: si el backend pedido falla, el modelo queda marcado con el backend en uso ===
+def test_backend_en_uso_tras_fallback(monkeypatch):
+    import src.inferencia as inferencia
+
+    def falla(*args, **kwargs):
+        raise RuntimeError("onnxruntime no disponible")
+
+    monkeypatch.setattr(inferencia, "exportar_onnx", falla)
+    modelo = preparar_modelo(preprocessor.sentiment_model, preprocessor.tokenizer, "modelo", "sentiment", backend="onnx")
+    assert backend_en_uso(modelo) == "torch"
@@ -0,0 +1,51 @@
+import re
+from functools import lru_cache
+import pandas as pd
+from src.normalizacion import normalizar_serie, limpiar_serie
+
+STOPWORDS = {"de", "la", "el", "que", "y", "en", "los"}
+
+
+def _clean_text_por_tweet(text):
+    # Implementación anterior (por tweet), sin lematizar
+    text = text.lower()
+    text = re.sub(r"http\S+|www\S+|https\S+", "", text)
+    text = re.sub(r"@\w+", "", text)
+    text = re.sub(r"[^\w\sáéíóúñü]", "", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    words = [w for w in text.split() if w not in STOPWORDS]
+    if len(words) < 3 or len(words) > 50:
+        return None
+    return " ".join(words)
+
+
+# === Test 1: la versión en batch da lo mismo que la limpieza por tweet ===
+def test_normalizar_serie_equivale_a_limpieza_por_tweet():
+    textos = pd.Series([
+        "Hola @juan mira https://t.co/x ¡qué BUENO! 😀 la noticia",
+        "El Presidente (Boric) habló, de la #Reforma de pensiones",
+        "muy corto",
+        "www.gob.cl anuncia: medidas, medidas y más medidas!!!",
+        " ".join(["palabra"] * 60),
+    ], index=[10, 3, 7, 1, 2])
+    resultado = normalizar_serie(textos, stopwords_set=STOPWORDS, lematizar=None)
+
+    assert list(resultado.index) == [10, 3, 7, 1, 2]
+    assert resultado.tolist() == [_clean_text_por_tweet(t) for t in textos]
+
+
+# === Test 2: valores no string y lematizador memoizado (una llamada por palabra distinta) ===
+def test_normalizar_serie_nulos_y_lemas():
+    llamadas = []
+
+    @lru_cache(maxsize=None)
+    def lematizar(palabra):
+        llamadas.append(palabra)
+        return palabra.rstrip("s")
+
+    textos = pd.Series([None, 3.0, "gatos perros gatos casas", "gatos perros casas"])
+    resultado = normalizar_serie(textos, stopwords_set=STOPWORDS, lematizar=lematizar)
+
+    assert resultado.tolist() == [None, None, "gato perro gato casa", "gato perro casa"]
+    assert sorted(llamadas) == ["casas", "gatos", "perros"]
+    assert limpiar_serie(["#Chile @yo!"], quitar_hashtags=True).str.strip().tolist() == [""]
@@ -28,4 +28,116 @@ def test_analyze_sentiment_texto_vacio():
 def test_get_embedding_devuelve_vector_correcto():
     emb = preprocessor.get_embedding("hola mundo")
     assert isinstance(emb, np.ndarray)
-    assert emb.shape == (768,)
\ No newline at end of file
+    assert emb.shape == (768,)
+
+# 4. Test batch de sentimiento: mismo resultado y orden que el análisis individual
+def test_analyze_sentiment_batch_conserva_orden():
+    textos = ["gobierno mal", "", "excelente anuncio presidente hoy gran noticia para todos", None, "feliz"]
+    resultados = preprocessor.analyze_sentiment_batch(textos, batch_size=2)
+
+    assert len(resultados) == len(textos)
+    assert resultados[1] == ("Neutral", 0.0, 0.0, 0.0, 0.0)
+    assert resultados[3] == ("Neutral", 0.0, 0.0, 0.0, 0.0)
+    for texto, resultado in zip(textos, resultados):
+        individual = preprocessor.analyze_sentiment(texto)
+        assert resultado[0] == individual[0]
+        assert np.allclose(resultado[1:], individual[1:], atol=1e-4)
+
+# 5. Test modo de un solo forward: mismos scores y embeddings 768 por texto
+def test_sentimiento_y_embeddings_un_forward():
+    textos = ["gobierno mal", "", "excelente anuncio presidente"]
+    resultados, embeddings = preprocessor.analyze_sentiment_y_embeddings(textos)
+
+    assert embeddings.shape == (3, 768)
+    assert not embeddings[1].any()
+    assert [r[0] for r in resultados] == [r[0] for r in preprocessor.analyze_sentiment_batch(textos)]
+
+# 6. Test carga perezosa: crear el preprocesador no carga modelos
+def test_preprocesador_no_carga_modelos_al_crearse():
+    nuevo = TweetPreprocessor(PRETEND_INPUT_PATH)
+    assert not {"tokenizer", "sentiment_model", "embedding_tokenizer", "embedding_model"} & set(vars(nuevo))
+
+# 7. Test pipeline por chunks: una caída a mitad de corrida se retoma desde el ledger
+def test_pipeline_por_chunks_retoma_desde_ledger(tmp_path, monkeypatch):
+    import pandas as pd
+    from src.storage import LocalBackend, set_storage
+    from src.azure_blob import read_csv_blob, write_csv_blob, blob_exists, blobs_existentes
+    from src.config import PROCESSED_DATA_PATH
+
+    set_storage(LocalBackend(tmp_path))
+    try:
+        textos = [f"gobierno anuncia reforma pensiones número {i}" for i in range(5)]
+        write_csv_blob(pd.DataFrame({
+            "id": [str(100 + i) for i in range(5)],
+            "text": textos,
+            "createdAt": pd.Timestamp("2025-06-01", tz="UTC"),
+            "date": "2025-06-01",
+            "processed": False,
+        }), "raw_test.csv", background=False)
+
+        pipeline = TweetPreprocessor("raw_test.csv", chunk_size=2)
+        llamadas = []
+        monkeypatch.setattr(pipeline, "inferir", lambda texts, progreso=True: (
+            llamadas.extend(texts) or [("Neutral", 1.0, 0.0, 1.0, 0.0)] * len(texts),
+            np.zeros((len(texts), 768), dtype=np.float32),
+        ))
+        confirmar = pipeline.confirmar_chunk
+
+        def falla_en_el_segundo(df, emb, primero=True, chunk=1):
+            if len(llamadas) > 2:
+                raise RuntimeError("caída simulada")
+            confirmar(df, emb, primero, chunk)
+
+        monkeypatch.setattr(pipeline, "confirmar_chunk", falla_en_el_segundo)
+        with pytest.raises(RuntimeError):
+            pipeline.run_pipeline()
+        assert pipeline.leer_ledger() == {"100", "101"}
+        assert not read_csv_blob("raw_test.csv", schema="raw")["processed"].any()
+        # El chunk confirmado queda en su propia parte: processed_data se escribe una vez al final
+        assert not blob_exists(PROCESSED_DATA_PATH)
+
+        monkeypatch.setattr(pipeline, "confirmar_chunk", confirmar)
+        llamadas.clear()
+        assert pipeline.run_pipeline()
+        assert len(llamadas) == 3
+        assert read_csv_blob(PROCESSED_DATA_PATH)["id"].astype(str).tolist() == [str(100 + i) for i in range(5)]
+        assert read_csv_blob("raw_test.csv", schema="raw")["processed"].all()
+        assert not blobs_existentes(pipeline._prefijo_ledger(), ttl=0)
+    finally:
+        set_storage(None)
+
+# 8. Test descartados: los rechazados por idioma o limpieza no se vuelven a cargar
+def test_descartados_quedan_procesados(storage, monkeypatch):
+    import pandas as pd
+    import src.preprocessing as preprocessing
+    from src.azure_blob import read_csv_blob, write_csv_blob, blobs_existentes
+
+    monkeypatch.setattr(preprocessing, "LANG_FILTER", True)
+    write_csv_blob(pd.DataFrame({
+        "id": ["1", "2", "3", "4"],
+        "text": [
+            "gobierno anuncia reforma de pensiones para este año",
+            "the president said that this is not what the people want at all",
+            "hola",  # queda vacío tras limpiar (menos de 3 palabras)
+            "no sabe nada, no hace nada y tampoco escucha",
+        ],
+        "createdAt": pd.Timestamp("2025-06-01", tz="UTC"),
+        "date": "2025-06-01",
+        "processed": False,
+    }), "raw_test.csv", background=False)
+
+    pipeline = TweetPreprocessor("raw_test.csv", chunk_size=10)
+    inferidos = []
+    monkeypatch.setattr(pipeline, "inferir", lambda texts, progreso=True: (
+        inferidos.extend(texts) or [("Neutral", 1.0, 0.0, 1.0, 0.0)] * len(texts),
+        np.zeros((len(texts), 768), dtype=np.float32),
+    ))
+    assert pipeline.run_pipeline()
+    assert len(inferidos) == 2
+    assert read_csv_blob("raw_test.csv", schema="raw")["processed"].all()
+    assert not blobs_existentes(pipeline._prefijo_ledger(), ttl=0)
+
+    filtrados = []
+    monkeypatch.setattr(pipeline, "filtrar_idioma", lambda chunk: filtrados.append(len(chunk)) or chunk)
+    assert not pipeline.run_pipeline()
+    assert filtrados == [] and len(inferidos) == 2
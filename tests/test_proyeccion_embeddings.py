@@ -0,0 +1,35 @@
+import numpy as np
+from src.proyeccion_embeddings import ProyeccionEmbeddings
+
+
+def _medias_diarias(dias, rango=4):
+    # Medias diarias con estructura de bajo rango + ruido
+    rng = np.random.default_rng(0)
+    return rng.normal(size=(dias, rango)) @ rng.normal(size=(rango, 768)) + 0.01 * rng.normal(size=(dias, 768))
+
+
+# === Test 1: PCA conserva la varianza y la proyección guardada es la misma ===
+def test_pca_guardar_y_cargar(storage):
+    X = _medias_diarias(60)
+    proyeccion = ProyeccionEmbeddings.ajustar(X, "pca", dims=8)
+    reducido = proyeccion.transformar(X)
+
+    assert reducido.shape == (60, 8)
+    assert reducido[:, :4].var(axis=0).sum() / (X - X.mean(axis=0)).var(axis=0).sum() > 0.99
+
+    proyeccion.guardar("models/proyeccion.npz")
+    cargada = ProyeccionEmbeddings.cargar("models/proyeccion.npz")
+    assert cargada.metodo == "pca"
+    assert np.allclose(cargada.transformar(X), reducido)
+
+
+# === Test 2: la proyección aleatoria es reproducible y PCA sin días suficientes cae en ella ===
+def test_random_reproducible_y_fallback():
+    X = _medias_diarias(10)
+    a = ProyeccionEmbeddings.ajustar(X, "random", dims=16)
+    b = ProyeccionEmbeddings.ajustar(X, "random", dims=16)
+    assert np.allclose(a.componentes, b.componentes)
+
+    assert ProyeccionEmbeddings.ajustar(X, "pca", dims=16).metodo == "random"
+    X[3] = np.nan
+    assert np.isnan(a.transformar(X)[3]).all()
@@ -0,0 +1,186 @@
+import pandas as pd
+import numpy as np
+import pytest
+from src.storage import LocalBackend, set_storage
+from src import azure_blob, schemas
+
+
+def _tweets(n_dias=10, por_dia=50):
+    fechas = pd.date_range("2025-04-01", periods=n_dias, freq="D").repeat(por_dia)
+    return pd.DataFrame({
+        "id": [str(i) for i in range(len(fechas))],
+        "date": fechas,
+        "text": "hola mundo",
+        "score_negative": np.linspace(0, 1, len(fechas)),
+    })
+
+
+# === Test 1: ida y vuelta CSV con el backend local ===
+def test_roundtrip_csv_local(storage):
+    df = _tweets()
+    azure_blob.write_csv_blob(df, "tweets.csv")
+
+    assert storage.exists("tweets.csv")
+    leido = azure_blob.read_csv_blob("tweets.csv")
+    assert leido.shape == df.shape
+    assert pd.api.types.is_datetime64_any_dtype(leido["date"])
+
+
+# === Test 2: Parquet con proyección de columnas y filtro de fechas ===
+def test_parquet_proyeccion_y_rango(storage, monkeypatch):
+    monkeypatch.setattr("src.storage.PARQUET_ROW_GROUP_SIZE", 100)
+    df = _tweets()
+    azure_blob.write_csv_blob(df, "tweets.parquet")
+
+    leido = azure_blob.read_csv_blob(
+        "tweets.parquet", columns=["score_negative"], date_range=("2025-04-03", "2025-04-04")
+    )
+
+    assert set(leido.columns) == {"score_negative", "date"}
+    assert len(leido) == 100
+    assert leido["date"].min() == pd.Timestamp("2025-04-03")
+
+
+# === Test 3: dataset particionado agrega solo días nuevos ===
+def test_particionado_append(storage):
+    df = _tweets(n_dias=2)
+    azure_blob.append_csv_blob(df, "raw/")
+    azure_blob.append_csv_blob(df.iloc[:10], "raw/")  # ids repetidos: no se duplican
+
+    leido = azure_blob.read_csv_blob("raw/")
+    assert len(leido) == len(df)
+    assert len(storage.list_prefix("raw/date=")) == 2
+
+
+# === Test 3b: filas sin fecha válida no caen en silencio al particionar ===
+def test_particionado_filas_sin_fecha(storage, caplog):
+    df = _tweets(n_dias=2, por_dia=5).drop(columns="date")
+    df["createdAt"] = ["2025-04-01T10:00:00Z"] * 5 + ["basura", None] + ["2025-04-02T10:00:00Z"] * 3
+    with caplog.at_level("WARNING", logger="src.particiones"):
+        azure_blob.append_csv_blob(df, "raw/")
+
+    assert len(azure_blob.read_csv_blob("raw/")) == 8
+    assert "2 filas sin fecha válida" in caplog.text
+
+
+# === Test 3c: solo se leen los días pendientes, no el rango entre el primero y el último ===
+def test_particionado_solo_dias_pendientes(storage):
+    from src.particiones import dias_pendientes, leer_particionado
+
+    df = _tweets(n_dias=10, por_dia=5)
+    df["processed"] = ~df["date"].isin(pd.to_datetime(["2025-04-01", "2025-04-10"]))
+    azure_blob.append_csv_blob(df, "raw/")
+
+    pendientes = dias_pendientes("raw/")
+    assert pendientes == ["2025-04-01", "2025-04-10"]
+    leido = leer_particionado("raw/", dias=pendientes)
+    assert len(leido) == 10 and not leido["processed"].any()
+
+
+class _BackendRemotoSimulado(LocalBackend):
+    """Backend local que se comporta como remoto (pasa por caché y descargas por rangos)."""
+    es_local = False
+
+    def local_path(self, name):
+        return None
+
+
+# === Test 4: subida por bloques y lectura en streaming con rangos paralelos ===
+@pytest.mark.parametrize("blob_name", ["tweets.csv", "tweets.parquet"])
+def test_streaming_roundtrip(tmp_path, monkeypatch, blob_name):
+    monkeypatch.setattr("src.storage.TRANSFER_CHUNK_SIZE", 1024)
+    monkeypatch.setattr("src.storage.STREAMING_ROWS_PER_PART", 37)
+    monkeypatch.setattr("src.azure_blob.BLOB_CACHE_DIR", tmp_path / "cache")
+    set_storage(_BackendRemotoSimulado(tmp_path / "remoto"))
+    try:
+        df = _tweets()
+        azure_blob.write_csv_blob(df, blob_name, streaming=True)
+        # Caché vacía: la lectura debe descargar por rangos y parsear en streaming
+        monkeypatch.setattr("src.azure_blob.BLOB_CACHE_DIR", tmp_path / "cache_lectura")
+        leido = azure_blob.read_csv_blob(blob_name, streaming=True)
+    finally:
+        set_storage(None)
+
+    assert leido.shape == df.shape
+    assert leido["id"].astype(str).tolist() == df["id"].tolist()
+
+
+# === Test 5: índice de existencia por prefijo con un solo listado ===
+def test_blobs_existentes_un_listado(storage, monkeypatch):
+    azure_blob.upload_image_blob(b"png", "wordclouds/wordcloud_2025-04-01.png")
+    llamadas = []
+    listar = storage.list_prefix
+    monkeypatch.setattr(storage, "list_prefix", lambda p: llamadas.append(p) or listar(p))
+
+    assert "wordclouds/wordcloud_2025-04-01.png" in azure_blob.blobs_existentes("wordclouds/", ttl=0)
+    azure_blob.upload_image_blob(b"png", "wordclouds/wordcloud_2025-04-02.png")
+    assert "wordclouds/wordcloud_2025-04-02.png" in azure_blob.blobs_existentes("wordclouds/")
+    assert llamadas == ["wordclouds/"]
+
+
+# === Test 6: schema registrado aplica dtypes compactos al leer y escribir ===
+def test_schema_dtypes_compactos(storage, monkeypatch):
+    monkeypatch.setitem(schemas.SCHEMA_POR_BLOB, "procesados.csv", "processed")
+    df = _tweets(n_dias=2, por_dia=3)
+    df["id"] = ["1912345678901234567"] * len(df)
+    df["createdAt"] = df["date"].dt.tz_localize("UTC")
+    df["sentiment_label"] = "NEG"
+    df["likeCount"] = 3.0
+    azure_blob.write_csv_blob(df, "procesados.csv")
+
+    leido = azure_blob.read_csv_blob("procesados.csv")
+    assert leido["id"].dtype == "string" and leido["id"].iloc[0] == "1912345678901234567"
+    assert leido["score_negative"].dtype == np.float32
+    assert leido["likeCount"].dtype == "Int32"
+    assert isinstance(leido["sentiment_label"].dtype, pd.CategoricalDtype)
+    assert str(leido["createdAt"].dt.tz) == "UTC"
+
+
+# === Test 7: transferencias comprimidas y lectura de blobs antiguos sin comprimir ===
+@pytest.mark.parametrize("streaming", [False, True])
+def test_transferencia_comprimida(tmp_path, monkeypatch, streaming):
+    monkeypatch.setattr("src.storage.BLOB_COMPRESSION", "gzip")
+    monkeypatch.setattr("src.storage.TRANSFER_CHUNK_SIZE", 1024)
+    monkeypatch.setattr("src.azure_blob.BLOB_CACHE_DIR", tmp_path / "cache")
+    remoto = _BackendRemotoSimulado(tmp_path / "remoto")
+    set_storage(remoto)
+    try:
+        df = _tweets()
+        azure_blob.write_csv_blob(df, "tweets.csv", streaming=streaming)
+        remoto.write_bytes("antiguo.csv", df.to_csv(index=False).encode("utf-8"))
+
+        monkeypatch.setattr("src.azure_blob.BLOB_CACHE_DIR", tmp_path / "cache_lectura")
+        leido = azure_blob.read_csv_blob("tweets.csv", streaming=streaming)
+        antiguo = azure_blob.read_csv_blob("antiguo.csv", streaming=streaming)
+    finally:
+        set_storage(None)
+
+    crudo = (tmp_path / "remoto" / "tweets.csv").read_bytes()
+    assert crudo[:2] == b"\x1f\x8b"
+    assert len(crudo) < len(df.to_csv(index=False))
+    assert leido.shape == df.shape and antiguo.shape == df.shape
+
+
+# === Test 8: subidas en segundo plano, ordenadas por blob y legibles mientras están pendientes ===
+def test_write_behind(storage, monkeypatch):
+    import threading
+    liberar = threading.Event()
+    escribir = storage.write_bytes
+
+    def _escritura_lenta(*args, **kwargs):
+        liberar.wait(5)
+        return escribir(*args, **kwargs)
+
+    monkeypatch.setattr(storage, "write_bytes", _escritura_lenta)
+    df = _tweets(n_dias=2)
+    primero = azure_blob.write_csv_blob(df.iloc[:10], "tweets.csv", background=True)
+    segundo = azure_blob.write_csv_blob(df, "tweets.csv", background=True)
+
+    # Aún sin subir: la lectura usa la copia en memoria de la última escritura
+    assert not storage.exists("tweets.csv")
+    assert len(azure_blob.read_csv_blob("tweets.csv", columns=["id"])) == len(df)
+
+    liberar.set()
+    assert azure_blob.flush_uploads() == 2
+    assert primero.done() and segundo.done()
+    assert len(azure_blob.read_csv_blob("tweets.csv")) == len(df)